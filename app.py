@@ -1,13 +1,25 @@
 import streamlit as st
 import pandas as pd
-from ortools.sat.python import cp_model
+import hashlib
 import json
+import os
 from datetime import datetime, timedelta
 import calendar
-import io
 import xlsxwriter
 import time
 
+import batch
+import engine
+import horizon
+import jobs
+import scenarios
+from cache import SolutionCache, problem_key
+from feasibility import check_feasibility, explain_infeasibility, has_errors
+from jobs import SolveJob
+from excel_io import XLSX_MIME, ExcelImportError, format_issue, read_problem_excel, report_bytes, template_bytes
+from manual_grid import ManualGrid
+from storage import DEFAULT_DEPARTMENT, MonthStore, SnapshotError, decode_month
+
 # -----------------------------------------------------------------------------
 # 1. AYARLAR VE SAYFA YAPILANDIRMASI
 # -----------------------------------------------------------------------------
@@ -89,8 +101,6 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 # 3. VERİ YÖNETİMİ VE FONKSİYONLAR
 # -----------------------------------------------------------------------------
-def get_storage_key(y, m): return f"{y}_{m}"
-
 # Varsayılan Kadro
 VARSAYILAN_EKIP = [
     {"isim": "Dr. Ahmet", "kota24": 8, "kota16": 0}, {"isim": "Dr. Mehmet", "kota24": 8, "kota16": 0},
@@ -103,32 +113,66 @@ VARSAYILAN_EKIP = [
 if 'doctors' not in st.session_state: st.session_state.doctors = [k["isim"] for k in VARSAYILAN_EKIP]
 if 'year' not in st.session_state: st.session_state.year = datetime.now().year
 if 'month' not in st.session_state: st.session_state.month = datetime.now().month
-if 'db' not in st.session_state: st.session_state.db = {}
+if 'department' not in st.session_state: st.session_state.department = DEFAULT_DEPARTMENT
 if 'editor_key' not in st.session_state: st.session_state.editor_key = 0
 if 'daily_needs_24h' not in st.session_state: st.session_state.daily_needs_24h = {}
 if 'daily_needs_16h' not in st.session_state: st.session_state.daily_needs_16h = {}
 if 'quotas_24h' not in st.session_state: st.session_state.quotas_24h = {k["isim"]: k["kota24"] for k in VARSAYILAN_EKIP}
 if 'quotas_16h' not in st.session_state: st.session_state.quotas_16h = {k["isim"]: k["kota16"] for k in VARSAYILAN_EKIP}
 if 'seniority' not in st.session_state: st.session_state.seniority = {k["isim"]: "Orta" for k in VARSAYILAN_EKIP}
-if 'manual_constraints' not in st.session_state: st.session_state.manual_constraints = {}
+if 'manual_constraints' not in st.session_state: st.session_state.manual_constraints = ManualGrid(st.session_state.doctors, calendar.monthrange(st.session_state.year, st.session_state.month)[1])
 if 'couples' not in st.session_state: st.session_state.couples = []
-
-def save_current_month_data():
-    key = get_storage_key(st.session_state.year, st.session_state.month)
-    st.session_state.db[key] = {
+if 'solve_job' not in st.session_state: st.session_state.solve_job = None
+if 'precheck' not in st.session_state: st.session_state.precheck = None
+if 'download_cache' not in st.session_state: st.session_state.download_cache = {}  # özet -> üretilmiş çalışma kitabı
+if 'models' not in st.session_state: st.session_state.models = engine.ModelCache()  # servis/yıl/ay -> son kurulan model
+if 'horizon_rows' not in st.session_state: st.session_state.horizon_rows = None  # son çok aylı planlamanın özeti
+if 'scenario_table' not in st.session_state: st.session_state.scenario_table = None  # son senaryo karşılaştırması
+if 'batch_rows' not in st.session_state: st.session_state.batch_rows = None  # son çok servisli çözümün özeti
+if 'saved_digest' not in st.session_state: st.session_state.saved_digest = None  # depodaki son kaydın özeti
+
+# Her çözümün aşama süreleri ve çözücü istatistikleri bu JSON-lines dosyasına eklenir
+STATS_LOG = os.environ.get("NOBETINATOR_STATS_LOG", "nobetinator_stats.jsonl")
+
+@st.cache_resource
+def get_solution_cache():
+    """Tüm oturumların paylaştığı çözüm önbelleği (NOBETINATOR_CACHE_DIR ile diske de yazar)."""
+    return SolutionCache(disk_dir=os.environ.get("NOBETINATOR_CACHE_DIR"))
+
+@st.cache_resource
+def get_month_store():
+    """Tüm oturumların paylaştığı kalıcı ay deposu (NOBETINATOR_DB, varsayılan nobetinator.db)."""
+    return MonthStore(os.environ.get("NOBETINATOR_DB", "nobetinator.db"))
+
+def current_month_data():
+    """Görüntülenen ayın depoya yazılacak verisi."""
+    return {
+        "doctors": list(st.session_state.doctors),
         "daily_needs_24h": st.session_state.daily_needs_24h.copy(),
         "daily_needs_16h": st.session_state.daily_needs_16h.copy(),
         "quotas_24h": st.session_state.quotas_24h.copy(),
         "quotas_16h": st.session_state.quotas_16h.copy(),
         "seniority": st.session_state.seniority.copy(),
-        "manual_constraints": st.session_state.manual_constraints.copy(),
-        "couples": st.session_state.couples.copy()
+        "manual_constraints": manual_grid().copy(),
+        "couples": [list(p) for p in st.session_state.couples]
     }
 
+def save_current_month_data():
+    """Ayı depoya yazar; son kayıttan beri değişiklik yoksa yazmaz."""
+    data = current_month_data()
+    key = (st.session_state.department, st.session_state.year, st.session_state.month)
+    state = digest(key, {k: v for k, v in data.items() if k != "manual_constraints"}, data["manual_constraints"].codes)
+    if st.session_state.saved_digest != state:
+        get_month_store().save(*key, data)
+        st.session_state.saved_digest = state
+
 def load_month_data(y, m):
-    key = get_storage_key(y, m)
-    if key in st.session_state.db:
-        data = st.session_state.db[key]
+    """Ayı depodan yükler; kayıt yoksa personel/kotalar korunur, ihtiyaçlar ve manuel hücreler sıfırlanır."""
+    data = get_month_store().load(st.session_state.department, y, m)
+    st.session_state.saved_digest = None
+    if data is not None:
+        if data.get("doctors"):
+            st.session_state.doctors = data["doctors"]
         st.session_state.daily_needs_24h = data["daily_needs_24h"]
         st.session_state.daily_needs_16h = data["daily_needs_16h"]
         st.session_state.quotas_24h = data["quotas_24h"]
@@ -139,111 +183,170 @@ def load_month_data(y, m):
     else:
         st.session_state.daily_needs_24h = {}
         st.session_state.daily_needs_16h = {}
-        st.session_state.manual_constraints = {}
+        st.session_state.manual_constraints = ManualGrid(st.session_state.doctors, calendar.monthrange(y, m)[1])
+
+def restore_backups(files):
+    """Yüklenen yedekleri depoya uygular: ``.gz`` yedekler sırayla, eski JSON yedekleri seçili servise."""
+    store = get_month_store()
+    snapshots = [f.getvalue() for f in files if not f.name.lower().endswith(".json")]
+    if snapshots:
+        store.restore(snapshots)
+    for f in files:
+        if f.name.lower().endswith(".json"):
+            legacy = json.loads(f.getvalue())  # eski "Yedeği İndir (JSON)" biçimi: tek ay
+            y, m = int(legacy["year"]), int(legacy["month"])
+            store.save(st.session_state.department, y, m, decode_month(legacy, y, m))
+
+def manual_grid():
+    """Bu ayın manuel hücre matrisi; doktor listesi veya ay uzunluğu değiştiyse hizalanır."""
+    grid = st.session_state.manual_constraints
+    num_days = calendar.monthrange(st.session_state.year, st.session_state.month)[1]
+    if not isinstance(grid, ManualGrid):
+        grid = ManualGrid.from_dict(st.session_state.doctors, num_days, grid)  # eski "Doktor_Gün" sözlüğü
+    elif grid.doctors != st.session_state.doctors or grid.num_days != num_days:
+        grid = grid.reindex(st.session_state.doctors, num_days)
+    st.session_state.manual_constraints = grid
+    return grid
+
+# Yeni oturum: görüntülenen ay depoda varsa oradan başla
+if 'store_loaded' not in st.session_state:
+    load_month_data(st.session_state.year, st.session_state.month)
+    st.session_state.store_loaded = True
 
 # -----------------------------------------------------------------------------
-# YENİ ÖZELLİK 1: EXCEL ŞABLONU OLUŞTURMA FONKSİYONU
+# YENİ ÖZELLİK 1: EXCEL ŞABLONU VE ERTELENMİŞ İNDİRMELER
 # -----------------------------------------------------------------------------
+# Aynı girdilerle üretilmiş son birkaç çalışma kitabı oturumda saklanır
+DOWNLOAD_CACHE_SIZE = 4
+
+def deferred_download(key, build):
+    """``st.download_button`` için ertelenmiş veri.
+
+    Çalışma kitabı her yeniden çalıştırmada değil, yalnızca düğmeye
+    tıklanınca üretilir; aynı ``key`` (girdilerin özeti) için bir kez
+    üretilip ``download_cache``'te tutulur. Streamlit callable'ı ayrı bir
+    thread'de çağırdığından ``build`` session state'e erişmemelidir.
+    """
+    store = st.session_state.download_cache
+
+    def data():
+        entry = store.get(key)
+        if entry is None:
+            t0 = time.perf_counter()
+            payload = build()
+            entry = store[key] = {"data": payload, "build_time": time.perf_counter() - t0}
+            while len(store) > DOWNLOAD_CACHE_SIZE:
+                store.pop(next(iter(store)))
+        return entry["data"]
+    return data
+
+def download_build_time(key):
+    """``key`` için çalışma kitabı üretildiyse süresi (sn), yoksa None."""
+    entry = st.session_state.download_cache.get(key)
+    return entry["build_time"] if entry else None
+
+def digest(*parts):
+    """JSON'a çevrilebilir parçaların (ve numpy dizilerinin) kısa özeti."""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part.tobytes() if hasattr(part, "tobytes") else
+                 json.dumps(part, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
 def create_excel_template():
-    """Mevcut ayarları içeren indirilebilir Excel şablonu oluşturur."""
-    output = io.BytesIO()
-    num_days = calendar.monthrange(st.session_state.year, st.session_state.month)[1]
-    
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        # 1. Personel Sayfası
-        df_personel = pd.DataFrame({
-            "İsim": st.session_state.doctors,
-            "Kıdem": [st.session_state.seniority.get(d, "Orta") for d in st.session_state.doctors],
-            "24h Kotası": [st.session_state.quotas_24h.get(d, 8) for d in st.session_state.doctors],
-            "16h Kotası": [st.session_state.quotas_16h.get(d, 0) for d in st.session_state.doctors]
-        })
-        df_personel.to_excel(writer, sheet_name="Personel", index=False)
-        
-        # 2. Günlük İhtiyaçlar Sayfası
-        df_needs = pd.DataFrame({
-            "Gün": list(range(1, num_days + 1)),
-            "24h Sayısı": [st.session_state.daily_needs_24h.get(d, 1) for d in range(1, num_days + 1)],
-            "16h Sayısı": [st.session_state.daily_needs_16h.get(d, 1) for d in range(1, num_days + 1)]
-        })
-        df_needs.to_excel(writer, sheet_name="Günlük İhtiyaçlar", index=False)
-        
-        # 3. İzinler Sayfası (MATRİS YAPISI)
-        days_cols = [str(i) for i in range(1, num_days + 1)]
-        matrix_data = {"Doktor": st.session_state.doctors}
-        for col in days_cols:
-            matrix_data[col] = [st.session_state.manual_constraints.get(f"{d}_{col}", "") for d in st.session_state.doctors]
-        df_leaves = pd.DataFrame(matrix_data)
-        df_leaves.to_excel(writer, sheet_name="İzinler", index=False)
-        
-        # Formatlama
-        workbook = writer.book
-        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1})
-        for sheet_name in writer.sheets:
-            ws = writer.sheets[sheet_name]
-            ws.set_row(0, None, header_fmt)
-        writer.sheets['İzinler'].set_column('A:A', 15)
-        writer.sheets['İzinler'].set_column('B:AF', 4)
-        
-    return output.getvalue()
+    """Mevcut ayarları içeren Excel şablonunun ertelenmiş indirme verisi."""
+    grid = manual_grid().copy()
+    data = {
+        "year": st.session_state.year,
+        "month": st.session_state.month,
+        "doctors": list(st.session_state.doctors),
+        "seniority": dict(st.session_state.seniority),
+        "quotas_24h": dict(st.session_state.quotas_24h),
+        "quotas_16h": dict(st.session_state.quotas_16h),
+        "daily_needs_24h": dict(st.session_state.daily_needs_24h),
+        "daily_needs_16h": dict(st.session_state.daily_needs_16h),
+        "manual_constraints": grid,
+    }
+    key = "sablon:" + digest({k: v for k, v in data.items() if k != "manual_constraints"}, grid.codes)
+    return deferred_download(key, lambda: template_bytes(data))
 
 # -----------------------------------------------------------------------------
 # YENİ ÖZELLİK 2: EXCEL VERİ YÜKLEME FONKSİYONU (MATRİS YAPISI)
 # -----------------------------------------------------------------------------
 def load_excel_data(uploaded_file):
-    """Excel dosyasından verileri okur ve session state'e yükler."""
+    """Excel dosyasından verileri okur; hücre düzeyindeki sorunlar ``import_report``'a yazılır."""
     try:
-        # 1. Personel Sayfası
-        df_personel = pd.read_excel(uploaded_file, sheet_name="Personel")
-        doctors_list = []
-        quotas_24h, quotas_16h, seniority = {}, {}, {}
-        
-        for _, row in df_personel.iterrows():
-            name = str(row["İsim"]).strip()
-            doctors_list.append(name)
-            seniority[name] = str(row["Kıdem"]).strip() if "Kıdem" in row and pd.notna(row["Kıdem"]) else "Orta"
-            quotas_24h[name] = int(row["24h Kotası"]) if "24h Kotası" in row and pd.notna(row["24h Kotası"]) else 0
-            quotas_16h[name] = int(row["16h Kotası"]) if "16h Kotası" in row and pd.notna(row["16h Kotası"]) else 0
-        
-        # 2. Günlük İhtiyaçlar Sayfası
-        df_needs = pd.read_excel(uploaded_file, sheet_name="Günlük İhtiyaçlar")
-        daily_needs_24h, daily_needs_16h = {}, {}
-        
-        for _, row in df_needs.iterrows():
-            day = int(row["Gün"])
-            daily_needs_24h[day] = int(row["24h Sayısı"]) if "24h Sayısı" in row and pd.notna(row["24h Sayısı"]) else 1
-            daily_needs_16h[day] = int(row["16h Sayısı"]) if "16h Sayısı" in row and pd.notna(row["16h Sayısı"]) else 1
-        
-        # 3. İzinler Sayfası (MATRİS YAPISI)
-        manual_constraints = {}
-        try:
-            df_leaves = pd.read_excel(uploaded_file, sheet_name="İzinler")
-            for _, row in df_leaves.iterrows():
-                doc_name = str(row["Doktor"]).strip()
-                for col in df_leaves.columns:
-                    if col == "Doktor":
-                        continue
-                    try:
-                        day_num = int(col)
-                        val = str(row[col]).strip().upper() if pd.notna(row[col]) else ""
-                        if val in ["X", "S", "24", "16"]:
-                            manual_constraints[f"{doc_name}_{day_num}"] = val
-                    except:
-                        continue
-        except Exception as e:
-            st.warning(f"İzinler sayfası okunamadı: {e}")
-        
-        return {
-            "doctors": doctors_list,
-            "quotas_24h": quotas_24h,
-            "quotas_16h": quotas_16h,
-            "seniority": seniority,
-            "daily_needs_24h": daily_needs_24h,
-            "daily_needs_16h": daily_needs_16h,
-            "manual_constraints": manual_constraints
-        }
+        data, report = read_problem_excel(uploaded_file)
+    except ExcelImportError as e:
+        st.session_state.import_report = e.issues
+        st.error("Excel dosyası okunamadı: zorunlu sayfa veya sütun eksik.")
+        return None
     except Exception as e:
         st.error(f"Excel dosyası okunurken hata: {str(e)}")
         return None
+    st.session_state.import_report = report
+    return data
+
+def render_import_report():
+    """Son Excel yüklemesinin satır/sütun düzeyindeki sorun listesi."""
+    report = st.session_state.get("import_report")
+    if not report:
+        return
+    with st.expander(f"⚠️ Excel yükleme raporu ({len(report)} sorun)", expanded=True):
+        st.dataframe(pd.DataFrame([{
+            "Sayfa": r["sheet"],
+            "Satır": r["row"],
+            "Sütun": r["column"],
+            "Değer": "" if r["value"] is None else str(r["value"]),
+            "Sorun": r["message"],
+        } for r in report]), hide_index=True, use_container_width=True)
+        st.download_button("📄 Raporu İndir (.txt)", "\n".join(format_issue(r) for r in report),
+                           file_name="excel_yukleme_raporu.txt", key="dl_import_report")
+
+def current_problem(rest_days_24h):
+    """Session state'teki ayın verilerinden motorun problem sözlüğünü oluşturur.
+
+    Önceki ayın kayıtlı çizelgesi varsa son günlerindeki nöbetler bu ayın
+    başına dinlenme kuralı olarak taşınır (``engine.apply_carry_in``).
+    """
+    problem = engine.normalize_problem({
+        "year": st.session_state.year,
+        "month": st.session_state.month,
+        "doctors": st.session_state.doctors,
+        "daily_needs_24h": st.session_state.daily_needs_24h,
+        "daily_needs_16h": st.session_state.daily_needs_16h,
+        "quotas_24h": st.session_state.quotas_24h,
+        "quotas_16h": st.session_state.quotas_16h,
+        "seniority": st.session_state.seniority,
+        "manual_constraints": manual_grid(),
+        "couples": st.session_state.couples,
+        "rest_days_24h": rest_days_24h,
+    })
+    tail = get_month_store().load_schedule(st.session_state.department,
+                                           *horizon.previous_month(st.session_state.year, st.session_state.month))
+    return engine.apply_carry_in(problem, tail)[0]
+
+def scenario_overrides(row, base):
+    """Senaryo tablosunun bir satırını ``scenarios.apply_overrides`` değişikliklerine çevirir."""
+    overrides = {"name": row["Senaryo"] or "Senaryo", "rest_days_24h": int(row["24s Sonrası İzin"])}
+    delta = int(row["24h Kota Farkı"] or 0)
+    if delta:
+        overrides["quotas_24h"] = {d: max(0, q + delta) for d, q in base["quotas_24h"].items()}
+    if row["S Hücrelerini Yok Say"]:
+        overrides["manual_constraints"] = {k: "" for k, v in base["manual_constraints"].to_dict().items() if v == "S"}
+    return overrides
+
+def horizon_table(rows):
+    """Çok aylı planlama sonucunun ay ay özeti (tablo satırları)."""
+    return [{
+        "Ay": f"{r['year']}-{r['month']:02d}",
+        "Durum": r["result"]["status"] if r["result"] else "-",
+        "Yöntem": horizon.HORIZON_MODES[r["mode"]],
+        "Amaç": r["result"].get("objective") if r["result"] else None,
+        "Süre (sn)": round(r["result"]["wall_time"], 2) if r["result"] else None,
+        "Sınırdan Kapanan Hücre": r["carried"],
+        "Sınırla Çakışan Sabit Nöbet": ", ".join(f"{d} ({t}. gün)" for d, t in r["conflicts"]),
+    } for r in rows]
 
 # -----------------------------------------------------------------------------
 # 4. YAN MENÜ (SIDEBAR) - KONTROL PANELİ
@@ -281,9 +384,9 @@ with st.sidebar:
                     st.session_state.daily_needs_24h = data["daily_needs_24h"]
                     st.session_state.daily_needs_16h = data["daily_needs_16h"]
                     st.session_state.manual_constraints = data["manual_constraints"]
-                    st.success("✅ Veriler başarıyla yüklendi!")
-                    time.sleep(1)
+                    st.toast("✅ Veriler başarıyla yüklendi!")
                     st.rerun()
+            render_import_report()
         
         st.markdown("**📋 Excel Şablon Yapısı:**")
         st.markdown("""
@@ -295,7 +398,16 @@ with st.sidebar:
     
     st.markdown("---")
     
-    # Tarih Seçimi
+    # Servis ve Tarih Seçimi
+    departments = sorted(set(get_month_store().departments()) | {st.session_state.department})
+    selected_department = st.selectbox("Servis", departments, index=departments.index(st.session_state.department),
+                                       accept_new_options=True, help="Veriler servis / yıl / ay bazında kalıcı olarak saklanır; yeni bir servis adı yazabilirsiniz.")
+    if selected_department and selected_department != st.session_state.department:
+        save_current_month_data()
+        st.session_state.department = selected_department
+        load_month_data(st.session_state.year, st.session_state.month)
+        st.rerun()
+
     c1, c2 = st.columns(2)
     with c1: selected_year = st.number_input("Yıl", 2024, 2030, st.session_state.year)
     with c2: selected_month = st.selectbox("Ay", range(1, 13), index=st.session_state.month-1, format_func=lambda x: calendar.month_name[x])
@@ -312,7 +424,15 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### ⚙️ Algoritma Ayarları")
     rest_days_24h = st.slider("24s Sonrası İzin (Gün)", 1, 5, 2, help="Nöbetçinin 24 saat nöbetten sonra kaç gün boş kalacağını belirler.")
-    calc_time = st.slider("Düşünme Süresi (sn)", 5, 60, 20, help="AI'nın çözümü araması için maksimum süre.")
+    calc_time = st.slider("Düşünme Süresi (sn)", 5, 60, 20, help="AI'nın çözümü araması için maksimum süre. Aşağıdaki erken durdurma ölçütlerinden biri sağlanırsa arama daha önce biter.")
+    with st.expander("⏱️ Erken Durdurma", expanded=False):
+        stop_gap = st.slider("Boşluk Eşiği (%)", 0.0, 20.0, 0.0, 0.5, help="Çözüm ile kanıtlanmış en iyi sınır arasındaki göreli fark bu değerin altına inince dur. 0 = kapalı.")
+        stop_stall = st.number_input("İyileşme Yoksa Dur (sn)", 0, 60, 0, help="Bu kadar saniye daha iyi çözüm bulunamazsa dur. 0 = kapalı.")
+        stop_hard_zero = st.checkbox("S ihlali ve kota sapması sıfırsa dur", value=False)
+    stop_criteria = {"gap": stop_gap / 100, "stall_seconds": stop_stall, "hard_zero": stop_hard_zero}
+    warm_start = st.checkbox("♻️ Önceki çizelgeden başla", value=True, help="Bu ay için son bulunan çizelge çözücüye başlangıç noktası olarak verilir; küçük değişikliklerden sonra yeniden çözüm çok daha hızlı olur.")
+    keep_close = st.checkbox("📌 Mevcut çizelgeye yakın kal", value=False, disabled=not warm_start, help="Önceki çizelgeden değişen her hücre cezalandırılır; personele duyurulmuş program mümkün olduğunca korunur.")
+    st.checkbox("⚡ Ara çözümleri canlı göster", value=True, key="anytime_preview", help="Çözücü her daha iyi çizelge bulduğunda tablo anında güncellenir; aramanın bitmesini beklemeden incelemeye başlayabilirsiniz.")
     
     st.markdown("---")
     
@@ -328,8 +448,7 @@ with st.sidebar:
                 pair = sorted([c_p1, c_p2])
                 if pair not in st.session_state.couples:
                     st.session_state.couples.append(pair)
-                    st.success(f"{c_p1} & {c_p2} eklendi.")
-                    time.sleep(1)
+                    st.toast(f"{c_p1} & {c_p2} eklendi.")
                     st.rerun()
             else:
                 st.error("Geçersiz seçim.")
@@ -359,18 +478,28 @@ with st.sidebar:
             st.rerun()
             
     with st.expander("💾 Veri Yedekleme"):
-        if st.button("Yedeği İndir (JSON)"):
-            save_current_month_data()
-            d_out = {
-                "doctors": st.session_state.doctors,
-                "quotas_24h": st.session_state.quotas_24h,
-                "quotas_16h": st.session_state.quotas_16h,
-                "seniority": st.session_state.seniority,
-                "manual_constraints": st.session_state.manual_constraints,
-                "couples": st.session_state.couples,
-                "year": st.session_state.year, "month": st.session_state.month
-            }
-            st.download_button("📥 İndir", json.dumps(d_out, default=str, ensure_ascii=False, indent=2), f"yedek_{st.session_state.year}_{st.session_state.month}.json")
+        st.caption("Tüm servislerin ayları ve çizelgeleri sıkıştırılmış tek dosyada. Fark yedeği yalnızca son yedekten beri değişen ayları içerir.")
+        save_current_month_data()
+        store = get_month_store()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M")
+        base_id = store.last_snapshot_id()
+        c_full, c_delta = st.columns(2)
+        c_full.download_button("📥 Tam Yedek", store.snapshot, f"nobetinator_yedek_{stamp}.json.gz",
+                               "application/gzip", use_container_width=True)
+        c_delta.download_button("📥 Fark Yedeği", lambda: store.snapshot(base=base_id), f"nobetinator_fark_{stamp}.json.gz",
+                                "application/gzip", disabled=base_id is None, use_container_width=True)
+
+        backups = st.file_uploader("Yedek Dosyaları", type=["gz", "json"], accept_multiple_files=True,
+                                   help="Tam yedek ve ardından gelen fark yedeklerini sırayla seçin. Eski tek aylık JSON yedekleri de seçili servise yüklenebilir.")
+        if backups and st.button("♻️ Geri Yükle", use_container_width=True):
+            try:
+                restore_backups(backups)
+            except (SnapshotError, ValueError, KeyError) as e:
+                st.error(f"Yedek geri yüklenemedi: {e}")
+            else:
+                load_month_data(st.session_state.year, st.session_state.month)
+                st.toast("✅ Yedek geri yüklendi.")
+                st.rerun()
 
 # -----------------------------------------------------------------------------
 # 5. ANA EKRAN (DASHBOARD)
@@ -381,7 +510,7 @@ st.title(f"🗓️ {calendar.month_name[st.session_state.month]} {st.session_sta
 m1, m2, m3, m4 = st.columns(4)
 m1.metric("Toplam Gün", num_days, "Takvim")
 m2.metric("Aktif Personel", len(st.session_state.doctors), "Doktor")
-m3.metric("Kısıt Sayısı", len(st.session_state.manual_constraints), "Özel İstek")
+m3.metric("Kısıt Sayısı", manual_grid().count(), "Özel İstek")
 m4.metric("Evli Çiftler", len(st.session_state.couples), "Senkronize")
 
 st.write("") 
@@ -517,47 +646,163 @@ with tab_const:
         if st.button("Uygula ⚡", type="primary", use_container_width=True):
             if b_days:
                 val_map = {"❌ Kesin İzin (X)": "X", "⚠️ Esnek İzin (S)": "S", "🔴 24 Saat Nöbet": "24", "🟢 16 Saat Nöbet": "16", "🗑️ Temizle": ""}
-                val = val_map[b_type]
-                for d_str in b_days:
-                    d = int(d_str)
-                    key = f"{b_doc}_{d}"
-                    if val:
-                        st.session_state.manual_constraints[key] = val
-                    else:
-                        if key in st.session_state.manual_constraints: del st.session_state.manual_constraints[key]
-                st.success("İşlem Tamam!")
+                manual_grid().set(b_doc, [int(d) for d in b_days], val_map[b_type])
+                st.toast("İşlem Tamam!")
                 st.session_state.editor_key += 1
-                time.sleep(0.5)
                 st.rerun()
 
     st.markdown("---")
     st.caption("**X** = Kesin İzin (Asla nöbet yazılmaz) | **S** = Esnek İzin (Zorda kalınca yazılabilir) | **24/16** = Sabit Nöbet|Buraya excelden kopyala yapıştır yapabilrsiniz X ve S büyük harf olacak")
     
     with st.expander("📋 Detaylı Kısıt Tablosunu Göster", expanded=True):
-        grid_data = []
-        for doc in st.session_state.doctors:
-            row = {"Doktor": doc}
-            for d in range(1, num_days+1):
-                row[str(d)] = st.session_state.manual_constraints.get(f"{doc}_{d}", "")
-            grid_data.append(row)
-        
         cfg = {"Doktor": st.column_config.TextColumn(disabled=True)}
         for d in range(1, num_days+1):
             cfg[str(d)] = st.column_config.SelectboxColumn(width="small", options=["", "24", "16", "X", "S"])
             
         with st.form("manual_grid"):
-            ed_grid = st.data_editor(pd.DataFrame(grid_data), column_config=cfg, hide_index=True, key=f"grid_{st.session_state.editor_key}")
+            ed_grid = st.data_editor(manual_grid().to_frame(), column_config=cfg, hide_index=True, key=f"grid_{st.session_state.editor_key}")
             if st.form_submit_button("Tabloyu Kaydet"):
-                for _, r in ed_grid.iterrows():
-                    dc = r["Doktor"]
-                    for d in range(1, num_days+1):
-                        v = r[str(d)]
-                        k = f"{dc}_{d}"
-                        if v: st.session_state.manual_constraints[k] = v
-                        elif k in st.session_state.manual_constraints: del st.session_state.manual_constraints[k]
+                st.session_state.manual_constraints = ManualGrid.from_frame(ed_grid, num_days)
                 st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)
 
+# --- ÇÖZÜM GÖRÜNTÜLEME ---
+def color_map(val):
+    if val == "24h": return 'background-color: #ef4444; color: white; font-weight: bold'
+    elif val == "16h": return 'background-color: #22c55e; color: white; font-weight: bold'
+    return ''
+
+def render_schedule_tables(result):
+    """Günlük liste (res_list) ve renkli çizelge (res_grid) tabloları."""
+    st.markdown("#### 📅 Günlük Nöbet Listesi")
+    st.dataframe(pd.DataFrame(result["res_list"]), use_container_width=True)
+    
+    st.markdown("#### 🌈 Renkli Genel Çizelge")
+    st.dataframe(pd.DataFrame(result["res_grid"]).style.map(color_map), use_container_width=True)
+
+def render_conflict(job):
+    """Çözümsüz ay için çelişen kural gruplarını (varsayım çekirdeği) bulur ve gösterir."""
+    if job.frozen is not None:
+        # Analiz tüm ay modeli üzerinde çalışır; dondurulmuş hücreli onarımı açıklayamaz
+        st.info("Onarım penceresinde çözüm yok: pencereyi genişletmeyi ya da ayı baştan çözmeyi deneyin.")
+        return
+    if job.conflict is None:
+        if st.button("🔍 Çelişen Kuralları Bul", help="Her gün ihtiyacı, manuel hücre ve dinlenme kuralı ayrı ayrı test edilerek birbiriyle çelişen en küçük kural kümesi bulunur."):
+            with st.spinner("Çelişki analizi yapılıyor..."):
+                job.conflict = explain_infeasibility(job.problem)
+    if job.conflict is not None:
+        core, minimal = job.conflict
+        if core is None:
+            st.info("Belirlenen sürede kesin bir çelişki kanıtlanamadı; 'Düşünme Süresi'ni artırmayı deneyin.")
+        else:
+            title = "en küçük çelişen küme" if minimal else "çelişen küme (süre yetmediği için küçültme tamamlanamadı)"
+            with st.expander(f"🧩 Birlikte sağlanamayan kurallar — {title}", expanded=True):
+                st.caption("Aşağıdakilerden en az birini gevşetmeden bu ay çözülemez:")
+                for c in core:
+                    st.write(f"• {c['message']}")
+
+def render_result(result, previous=None, job=None):
+    """Motorun sonuç sözlüğünü tablolar ve Excel indirme butonu olarak gösterir."""
+    if result["feasible"]:
+        reason = engine.STOP_REASONS.get(result.get("stop_reason"), "")
+        st.success(f"✅ Çözüm Bulundu! ({result['status']} · {reason} · boşluk %{result['gap'] * 100:.1f})")
+        if previous:
+            st.caption(f"♻️ Önceki çizelgeden başlatıldı — değişen hücre sayısı: {engine.count_changes(previous, result['schedule'])}")
+        warnings = result["warnings"]
+        
+        # Esnek İzin İhlalleri Uyarısı
+        if warnings:
+            with st.expander("⚠️ Esnek İzin İhlalleri", expanded=True):
+                st.warning("Aşağıdaki kişilere esnek izin (S) verilmesine rağmen çözüm için nöbet yazılmak zorunda kalındı:")
+                for w in warnings:
+                    st.write(w)
+        
+        st.markdown("#### 📊 Dağılım İstatistikleri")
+        st.dataframe(pd.DataFrame(result["stat_rows"]), use_container_width=True)
+        
+        render_schedule_tables(result)
+        
+        # Excel İndirme (rapor yalnızca tıklanınca üretilir)
+        key = "rapor:" + digest(result["res_list"], result["res_grid"], result["stat_rows"], result.get("warnings"))
+        st.download_button("📥 Excel Raporunu İndir", deferred_download(key, lambda: report_bytes(result)),
+                           "Nobetinator_Ai_Final.xlsx", XLSX_MIME, type="primary")
+        export_time = download_build_time(key)
+        render_stats(result, export_time)
+        return export_time
+
+    st.error("⚠️ Çözüm bulunamadı!")
+    st.warning("Çok fazla kısıt (özellikle manuel yasaklar) olabilir. Yasakları azaltmayı veya 'Düşünme Süresi'ni artırmayı deneyin.")
+    if job is not None and result["status"] == "INFEASIBLE":
+        render_conflict(job)
+    render_stats(result)
+    return None
+
+def render_stats(result, export_time=None):
+    """Aşama süreleri ve CP-SAT istatistikleri (açılır panel)."""
+    timings = dict(result.get("timings") or {})
+    if export_time is not None:
+        timings["export"] = export_time
+    stats = result.get("solver_stats")
+    if not timings and not stats:
+        return
+    with st.expander("⏱️ Performans Ayrıntıları", expanded=False):
+        if stats:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Değişken", stats["variables"])
+            c2.metric("Kısıt", stats["constraints"])
+            c3.metric("Çatışma", stats["conflicts"])
+            c4.metric("Dallanma", stats["branches"])
+            c5, c6, c7, _ = st.columns(4)
+            c5.metric("Presolve", "-" if stats["presolve_time"] is None else f"{stats['presolve_time']:.2f} sn")
+            c6.metric("En İyi Sınır", "-" if stats["best_bound"] is None else f"{stats['best_bound']:.0f}")
+            c7.metric("Boşluk", "-" if stats["gap"] is None else f"%{stats['gap'] * 100:.1f}")
+        total = sum(timings.values()) or 1.0
+        st.dataframe(pd.DataFrame([{"Aşama": engine.PHASE_LABELS.get(k, k), "Süre (ms)": round(v * 1000, 1),
+                                    "Pay (%)": round(100 * v / total, 1)} for k, v in timings.items()]),
+                     hide_index=True, use_container_width=True)
+
+def render_precheck(issues):
+    """Ön kontrol bulgularını gösterir (hatalar kırmızı, uyarılar sarı)."""
+    errors = [i for i in issues if i["level"] == "error"]
+    warns = [i for i in issues if i["level"] == "warning"]
+    if errors:
+        st.error(f"⛔ Ön kontrol: bu ay mevcut kısıtlarla çözülemez ({len(errors)} sorun). Çözücü çalıştırılmadı.")
+        with st.expander("🔍 Sorunlu Günler ve Doktorlar", expanded=True):
+            for i in errors:
+                st.write(f"• {i['message']}")
+    if warns:
+        with st.expander(f"⚠️ Ön Kontrol Uyarıları ({len(warns)})", expanded=False):
+            for i in warns:
+                st.write(f"• {i['message']}")
+
+def render_solve_progress():
+    """Arka plandaki çözümün ilerlemesi; fragment olarak yarım saniyede bir yenilenir."""
+    job = st.session_state.solve_job
+    if not job.running:
+        st.rerun()
+    
+    p = job.snapshot()
+    elapsed = job.elapsed()
+    st.progress(min(elapsed / job.time_limit, 1.0))
+    if p["solutions"]:
+        st.text(f"AI optimum çözümü arıyor... {elapsed:.0f}/{job.time_limit:.0f} sn | "
+                f"Bulunan çözüm: {p['solutions']} | Amaç: {p['objective']:.0f} | En iyi sınır: {p['best_bound']:.0f}")
+    else:
+        st.text(f"AI ilk çözümü arıyor... {elapsed:.0f}/{job.time_limit:.0f} sn")
+    
+    c_acc, c_cancel = st.columns(2)
+    if c_acc.button("✅ Mevcut En İyiyi Kabul Et", disabled=not p["solutions"], use_container_width=True):
+        job.accept()
+    if c_cancel.button("⏹️ İptal Et", use_container_width=True):
+        job.cancel()
+    
+    # Anytime mod: her iyileşen çözüm anında tablolara dökülür
+    if st.session_state.anytime_preview and p["solutions"]:
+        preview = job.best_so_far()
+        if preview is not None:
+            st.caption(f"🕒 Ara çözüm #{p['solutions']} (ilk çözüm {p['first_solution_time']:.2f} sn'de bulundu) — arama sürdükçe güncellenir.")
+            render_schedule_tables(preview)
+
 # --- TAB 4: HESAPLAMA VE ÇÖZÜM ---
 with tab_run:
     st.markdown('<div class="css-card">', unsafe_allow_html=True)
@@ -568,261 +813,160 @@ with tab_run:
         st.info("Kıdem dengesi, kotalar, eş durumları ve homojen dağılım dikkate alınarak program oluşturulacak.")
     with col_act2:
         run_btn = st.button("Çizelgeyi Oluştur", type="primary", use_container_width=True)
-        
-    if run_btn:
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        status_text.text("Veriler hazırlanıyor...")
-        progress_bar.progress(10)
-        time.sleep(0.5)
-        
-        # --- OR-TOOLS MODELİ ---
-        model = cp_model.CpModel()
-        docs = st.session_state.doctors
-        days = range(1, num_days+1)
-        x24, x16 = {}, {}
-        soft_violations = {}  # Esnek izin ihlalleri için
-        
-        seniors = [d for d in docs if st.session_state.seniority.get(d) == "Kıdemli"]
-        mids = [d for d in docs if st.session_state.seniority.get(d) == "Orta"]
-        juniors = [d for d in docs if st.session_state.seniority.get(d) == "Çömez"]
-        
-        status_text.text("Değişkenler oluşturuluyor...")
-        progress_bar.progress(20)
-
-        # 1. TEMEL DEĞİŞKENLER
-        for d in docs:
-            for t in days:
-                x24[(d,t)] = model.NewBoolVar(f'x24_{d}_{t}')
-                x16[(d,t)] = model.NewBoolVar(f'x16_{d}_{t}')
-                model.Add(x24[(d,t)] + x16[(d,t)] <= 1)
-
-        # 2. GÜNLÜK İHTİYAÇLAR
-        for t in days:
-            model.Add(sum(x24[(d,t)] for d in docs) == st.session_state.daily_needs_24h.get(t, 1))
-            model.Add(sum(x16[(d,t)] for d in docs) == st.session_state.daily_needs_16h.get(t, 1))
-            
-        # 3. YASAKLAR VE DİNLENME
-        for d in docs:
-            # Peş peşe gün çalışmama
-            for t in range(1, num_days):
-                model.Add(x24[(d,t)] + x16[(d,t)] + x24[(d,t+1)] + x16[(d,t+1)] <= 1)
-            
-            # 24h sonrası izin
-            for t_base in range(1, num_days + 1 - rest_days_24h):
-                block_days = [x24[(d, k)] for k in range(t_base+1, t_base + rest_days_24h + 1)] + \
-                             [x16[(d, k)] for k in range(t_base+1, t_base + rest_days_24h + 1)]
-                model.Add(sum(block_days) == 0).OnlyEnforceIf(x24[(d, t_base)])
-
-            # Manuel Kısıtlar (X, S, 24, 16)
-            for t in days:
-                c = st.session_state.manual_constraints.get(f"{d}_{t}", "")
-                if c == "24":
-                    model.Add(x24[(d,t)] == 1)
-                elif c == "16":
-                    model.Add(x16[(d,t)] == 1)
-                elif c == "X":
-                    model.Add(x24[(d,t)] == 0)
-                    model.Add(x16[(d,t)] == 0)
-                elif c == "S":
-                    # Esnek İzin: Soft Constraint
-                    violation = model.NewBoolVar(f'viol_{d}_{t}')
-                    model.Add(x24[(d,t)] + x16[(d,t)] == violation)
-                    soft_violations[(d, t)] = violation
-
-        status_text.text("Evlilik ve Sosyal kurallar işleniyor...")
-        progress_bar.progress(40)
-        
-        penalties = []
-        
-        # Esnek İzin Cezaları
-        for (d, t), v in soft_violations.items():
-            penalties.append(v * 5000)  # Yüksek ceza ama imkansız değil
-        
-        # 4. EVLİ ÇİFTLER (ESNEK)
-        for (d1, d2) in st.session_state.couples:
-            if d1 in docs and d2 in docs:
-                for t in days:
-                    w1 = model.NewBoolVar(f'w_{d1}_{t}')
-                    w2 = model.NewBoolVar(f'w_{d2}_{t}')
-                    model.Add(x24[(d1,t)] + x16[(d1,t)] == w1)
-                    model.Add(x24[(d2,t)] + x16[(d2,t)] == w2)
-                    
-                    both = model.NewBoolVar(f'both_{d1}_{d2}_{t}')
-                    model.AddBoolAnd([w1, w2]).OnlyEnforceIf(both)
-                    model.AddBoolOr([w1.Not(), w2.Not()]).OnlyEnforceIf(both.Not())
-                    
-                    mismatch = model.NewIntVar(0, 1, f'mm_{d1}_{d2}_{t}')
-                    model.Add(mismatch == w1 + w2 - 2 * both)
-                    penalties.append(mismatch * 100) 
-
-        # 5. KOTALAR (Soft Constraints)
-        for d in docs:
-            t24 = sum(x24[(d,t)] for t in days)
-            goal24 = st.session_state.quotas_24h.get(d, 0)
-            diff24 = model.NewIntVar(0, 31, f'd24_{d}')
-            model.Add(diff24 >= t24 - goal24)
-            model.Add(diff24 >= goal24 - t24)
-            penalties.append(diff24 * 500)
-            
-            t16 = sum(x16[(d,t)] for t in days)
-            goal16 = st.session_state.quotas_16h.get(d, 0)
-            diff16 = model.NewIntVar(0, 31, f'd16_{d}')
-            model.Add(diff16 >= t16 - goal16)
-            model.Add(diff16 >= goal16 - t16)
-            penalties.append(diff16 * 500)
-
-        # 6. HOMOJEN DAĞILIM (Haftalık Denge)
-        weeks = [range(1, 8), range(8, 15), range(15, 22), range(22, num_days+1)]
-        for d in docs:
-            week_counts = []
-            for w_idx, week_days in enumerate(weeks):
-                valid_days = [t for t in week_days if t <= num_days]
-                if not valid_days: continue
-                wc = model.NewIntVar(0, 7, f'wc_{d}_{w_idx}')
-                model.Add(wc == sum(x24[(d,t)] + x16[(d,t)] for t in valid_days))
-                week_counts.append(wc)
-            
-            for i in range(len(week_counts) - 1):
-                wdiff = model.NewIntVar(0, 7, f'wdiff_{d}_{i}')
-                model.Add(wdiff >= week_counts[i] - week_counts[i+1])
-                model.Add(wdiff >= week_counts[i+1] - week_counts[i])
-                penalties.append(wdiff * 20)
-
-        # 7. KIDEM DENGESİ
-        for t in days:
-            cnt_s = sum(x24[(d,t)] for d in seniors)
-            cnt_m = sum(x24[(d,t)] for d in mids)
-            
-            if seniors and mids:
-                d1 = model.NewIntVar(0, 10, f'sm_{t}')
-                model.Add(d1 >= cnt_s - cnt_m)
-                model.Add(d1 >= cnt_m - cnt_s)
-                penalties.append(d1 * 5)
-        
-        # HEDEF FONKSİYON
-        model.Minimize(sum(penalties))
-
-        status_text.text("AI optimum çözümü arıyor...")
-        progress_bar.progress(70)
-        
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = float(calc_time)
-        status = solver.Solve(model)
-        
-        progress_bar.progress(100)
-        status_text.empty()
 
-        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            st.success(f"✅ Çözüm Bulundu! ({solver.StatusName(status)})")
-            
-            # --- SONUÇLARI İŞLEME ---
-            res_list = []
-            res_grid = []
-            stats = {d: {"24":0, "16":0} for d in docs}
-            warnings = []  # Esnek izin ihlalleri
-            
-            for t in days:
-                dt = datetime(st.session_state.year, st.session_state.month, t)
-                t_str = f"{t:02d} {['Pzt','Sal','Çar','Per','Cum','Cmt','Paz'][dt.weekday()]}"
-                
-                row_g = {"Tarih": t_str}
-                l24, l16 = [], []
-                
-                for d in docs:
-                    val = ""
-                    if solver.Value(x24[(d,t)]):
-                        val = "24h"
-                        l24.append(d)
-                        stats[d]["24"] += 1
-                        # Esnek izin ihlali kontrolü
-                        if (d, t) in soft_violations and solver.Value(soft_violations[(d, t)]):
-                            warnings.append(f"⚠️ {d}: {t}. gün esnek izin (S) istemişti ama 24h nöbet yazıldı.")
-                    elif solver.Value(x16[(d,t)]):
-                        val = "16h"
-                        l16.append(d)
-                        stats[d]["16"] += 1
-                        if (d, t) in soft_violations and solver.Value(soft_violations[(d, t)]):
-                            warnings.append(f"⚠️ {d}: {t}. gün esnek izin (S) istemişti ama 16h nöbet yazıldı.")
-                    row_g[d] = val
-                
-                res_grid.append(row_g)
-                res_list.append({
-                    "Tarih": t_str,
-                    "🔴 24 Saat Ekibi": ", ".join(l24),
-                    "🟢 16 Saat Ekibi": ", ".join(l16)
-                })
-            
-            # Esnek İzin İhlalleri Uyarısı
-            if warnings:
-                with st.expander("⚠️ Esnek İzin İhlalleri", expanded=True):
-                    st.warning("Aşağıdaki kişilere esnek izin (S) verilmesine rağmen çözüm için nöbet yazılmak zorunda kalındı:")
-                    for w in warnings:
-                        st.write(w)
-            
-            # --- İSTATİSTİK TABLOSU ---
-            stat_rows = []
-            for d in docs:
-                h24 = st.session_state.quotas_24h.get(d, 0)
-                g24 = stats[d]["24"]
-                h16 = st.session_state.quotas_16h.get(d, 0)
-                g16 = stats[d]["16"]
-                
-                durum = "✅ Tam"
-                if g24 != h24: durum = f"⚠️ {g24-h24:+d}"
-                
-                stat_rows.append({
-                    "Doktor": d,
-                    "Kıdem": st.session_state.seniority.get(d),
-                    "24h (Hedef/Gerçek)": f"{h24} / {g24}",
-                    "16h (Hedef/Gerçek)": f"{h16} / {g16}",
-                    "Sapma Durumu": durum
+    # Ay ortası onarım: yalnızca seçilen gün aralığı yeniden planlanır, kalan günler korunur
+    saved_schedule = get_month_store().load_schedule(st.session_state.department, st.session_state.year, st.session_state.month)
+    repair_btn = False
+    with st.expander("🩹 Hızlı Onarım (ay ortası devamsızlık)", expanded=False):
+        if not saved_schedule:
+            st.caption("Onarım için önce bu ayın çizelgesi oluşturulmalı.")
+        else:
+            st.caption("Yeni X hücrelerini kısıt tablosuna girin ve yeniden planlanacak günleri seçin. Aralık dışındaki "
+                       "ve bugünden önceki günlerin nöbetleri aynen korunur; en az değişiklikle birkaç saniyede yamalı çizelge üretilir.")
+            now = datetime.now()
+            today = now.day if (st.session_state.year, st.session_state.month) == (now.year, now.month) else 1
+            repair_days = st.slider("Yeniden Planlanacak Günler", 1, num_days, (today, min(today + 6, num_days)))
+            repair_btn = st.button("🩹 Çizelgeyi Onar", use_container_width=True)
+
+    # Çok aylı planlama: depodaki ardışık aylar, ay sınırları taşınarak tek işte çözülür
+    with st.expander("📆 Çok Aylı Planlama (ay sınırları taşınır)", expanded=False):
+        st.caption("Bu aydan başlayarak depodaki ardışık aylar çözülür; her ayın son günlerindeki nöbetler sonraki ayın "
+                   "başına dinlenme kuralı olarak taşınır. Bulunan çizelgeler depoya kaydedilir.")
+        c_h1, c_h2 = st.columns(2)
+        horizon_count = c_h1.number_input("Ay Sayısı", 2, 12, 3)
+        horizon_parallel = c_h2.checkbox("Ayları paralel çöz", value=False, help="Aylar aynı anda çözülür; önceki ayın sonuyla çelişen ayın yalnızca başı onarılır. Çok çekirdekli sunucuda çeyrek/yıl planı çok daha kısa sürer.")
+        if st.button("📆 Ayları Planla", use_container_width=True):
+            save_current_month_data()
+            bar = st.progress(0.0, text="Aylar çözülüyor...")
+            rows = horizon.solve_horizon(
+                get_month_store(), st.session_state.department, st.session_state.year, st.session_state.month,
+                int(horizon_count), rest_days_24h, calc_time, stop=stop_criteria, parallel=horizon_parallel,
+                on_month=lambda k, r: bar.progress((k + 1) / horizon_count, text=f"{r['year']}-{r['month']:02d} tamamlandı"))
+            st.session_state.horizon_rows = horizon_table(rows)
+        if st.session_state.horizon_rows:
+            st.dataframe(pd.DataFrame(st.session_state.horizon_rows), hide_index=True, use_container_width=True)
+
+    # Senaryo karşılaştırması: aynı ayın varyantları ayrı süreçlerde eşzamanlı çözülür
+    with st.expander("🧪 Senaryo Karşılaştırma", expanded=False):
+        st.caption("Her satır bu ayın bir varyantıdır; hepsi (değişiklik yapılmamış temel ay ile birlikte) aynı anda "
+                   "çözülür ve ceza bileşenleri yan yana gösterilir.")
+        scenario_rows = st.data_editor(pd.DataFrame([
+            {"Senaryo": "İzin +1 gün", "24s Sonrası İzin": rest_days_24h + 1, "24h Kota Farkı": 0, "S Hücrelerini Yok Say": False},
+            {"Senaryo": "Esnek izinler olmadan", "24s Sonrası İzin": rest_days_24h, "24h Kota Farkı": 0, "S Hücrelerini Yok Say": True},
+        ]), num_rows="dynamic", hide_index=True, use_container_width=True, key="scenario_editor", column_config={
+            "24s Sonrası İzin": st.column_config.NumberColumn(min_value=1, max_value=5, step=1),
+            "24h Kota Farkı": st.column_config.NumberColumn(min_value=-10, max_value=10, step=1,
+                                                             help="Her doktorun 24h kotasına eklenir"),
+        })
+        if st.button("🧪 Senaryoları Karşılaştır", use_container_width=True):
+            base = current_problem(rest_days_24h)
+            rows = [r for r in scenario_rows.to_dict("records") if pd.notna(r["24s Sonrası İzin"])]
+            with st.spinner(f"{len(rows) + 1} senaryo çözülüyor..."):
+                results = scenarios.run_scenarios(base, [scenario_overrides(r, base) for r in rows], calc_time, stop=stop_criteria)
+            st.session_state.scenario_table = scenarios.comparison_table(results)
+        if st.session_state.scenario_table is not None:
+            st.dataframe(st.session_state.scenario_table, hide_index=True, use_container_width=True)
+
+    # Tüm servisler: depoda bu ay için kaydı olan her servis ayrı süreçte çözülür, sonuçlar bittikçe listelenir
+    with st.expander("🏥 Tüm Servisleri Çöz (bu ay)", expanded=False):
+        st.caption("Depoda bu ay için kaydı olan tüm servisler çekirdeklere dağıtılarak aynı anda çözülür; "
+                   "biten servis hemen listeye eklenir ve çizelgesi depoya kaydedilir.")
+        if st.button("🏥 Tüm Servisleri Çöz", use_container_width=True):
+            save_current_month_data()
+            store = get_month_store()
+            problems = batch.department_problems(store, st.session_state.year, st.session_state.month, rest_days_24h)
+            table, st.session_state.batch_rows = st.empty(), []
+            for dep, result in batch.solve_batch(problems, calc_time, stop=stop_criteria):
+                if result["feasible"]:
+                    store.save_schedule(dep, result["year"], result["month"], result["schedule"])
+                st.session_state.batch_rows.append({
+                    "Servis": dep,
+                    "Durum": result["status"],
+                    "Neden": engine.STOP_REASONS.get(result["stop_reason"], result["stop_reason"]),
+                    "Amaç": result.get("objective"),
+                    "Süre (sn)": round(result["wall_time"], 2),
                 })
-            
-            df_list = pd.DataFrame(res_list)
-            df_grid = pd.DataFrame(res_grid)
-            df_stat = pd.DataFrame(stat_rows)
-            
-            st.markdown("#### 📊 Dağılım İstatistikleri")
-            st.dataframe(df_stat, use_container_width=True)
-            
-            st.markdown("#### 📅 Günlük Nöbet Listesi")
-            st.dataframe(df_list, use_container_width=True)
-            
-            st.markdown("#### 🌈 Renkli Genel Çizelge")
-            def color_map(val):
-                if val == "24h": return 'background-color: #ef4444; color: white; font-weight: bold'
-                elif val == "16h": return 'background-color: #22c55e; color: white; font-weight: bold'
-                return ''
-            
-            st.dataframe(df_grid.style.map(color_map), use_container_width=True)
-            
-            # Excel İndirme
-            buf = io.BytesIO()
-            with pd.ExcelWriter(buf, engine='xlsxwriter') as writer:
-                df_list.to_excel(writer, sheet_name='Liste', index=False)
-                df_grid.to_excel(writer, sheet_name='Cizelge', index=False)
-                df_stat.to_excel(writer, sheet_name='Istatistik', index=False)
-                
-                # Uyarılar sayfası
-                if warnings:
-                    df_warn = pd.DataFrame({"Uyarılar": warnings})
-                    df_warn.to_excel(writer, sheet_name='Uyarilar', index=False)
-                
-                # Excel Renklendirme
-                wb = writer.book
-                ws = writer.sheets['Cizelge']
-                fmt_red = wb.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'})
-                fmt_grn = wb.add_format({'bg_color': '#C6EFCE', 'font_color': '#006100'})
-                
-                ws.conditional_format(1, 1, num_days, len(docs), {'type': 'text', 'criteria': 'containing', 'value': '24h', 'format': fmt_red})
-                ws.conditional_format(1, 1, num_days, len(docs), {'type': 'text', 'criteria': 'containing', 'value': '16h', 'format': fmt_grn})
-                
-            st.download_button("📥 Excel Raporunu İndir", buf.getvalue(), "Nobetinator_Ai_Final.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", type="primary")
+                table.dataframe(pd.DataFrame(st.session_state.batch_rows), hide_index=True, use_container_width=True)
+        elif st.session_state.batch_rows:
+            st.dataframe(pd.DataFrame(st.session_state.batch_rows), hide_index=True, use_container_width=True)
 
+    if run_btn:
+        # Önceki çözüm hâlâ sürüyorsa durdur; yenisini arka planda başlat
+        if st.session_state.solve_job is not None and st.session_state.solve_job.running:
+            st.session_state.solve_job.cancel()
+        problem = current_problem(rest_days_24h)
+        
+        # Model kurmadan önce milisaniyelik ön kontrol: kesin çözümsüz ayları hemen yakala
+        issues = check_feasibility(problem)
+        department = st.session_state.department
+        st.session_state.precheck = {"key": (department, problem["year"], problem["month"]), "issues": issues}
+        hint = get_month_store().load_schedule(department, st.session_state.year, st.session_state.month) if warm_start else None
+        change_weight = engine.CHANGE_PENALTY if keep_close else 0
+        
+        # Aynı girdiler daha önce çözüldüyse (bu veya başka bir oturumda) sonucu önbellekten al
+        solution_cache = get_solution_cache()
+        key = problem_key(problem, hint, change_weight)
+        cached = solution_cache.get(key, time_limit=calc_time)
+        if has_errors(issues):
+            st.session_state.solve_job = None
+        elif cached is not None:
+            st.session_state.solve_job = SolveJob.from_result(problem, cached, calc_time, department=department)
+        else:
+            st.session_state.solve_job = SolveJob(problem, calc_time, stop=stop_criteria, hint=hint, change_weight=change_weight,
+                                                  cache=solution_cache, cache_key=key, models=st.session_state.models,
+                                                  model_key=(department, problem["year"], problem["month"]),
+                                                  department=department).start()
+
+    if repair_btn:
+        if st.session_state.solve_job is not None and st.session_state.solve_job.running:
+            st.session_state.solve_job.cancel()
+        problem, frozen, _ = engine.repair_problem(current_problem(rest_days_24h), saved_schedule, *repair_days, today=today)
+        st.session_state.precheck = None  # ön kontrol tüm ay içindir; onarımda pencere dışı zaten sabit
+        solution_cache = get_solution_cache()
+        key = problem_key(problem, saved_schedule, engine.REPAIR_CHANGE_PENALTY, frozen)
+        cached = solution_cache.get(key, time_limit=engine.REPAIR_TIME_LIMIT)
+        if cached is not None:
+            st.session_state.solve_job = SolveJob.from_result(problem, cached, engine.REPAIR_TIME_LIMIT, hint=saved_schedule,
+                                                              frozen=frozen, department=st.session_state.department)
         else:
-            st.error("⚠️ Çözüm bulunamadı!")
-            st.warning("Çok fazla kısıt (özellikle manuel yasaklar) olabilir. Yasakları azaltmayı veya 'Düşünme Süresi'ni artırmayı deneyin.")
+            st.session_state.solve_job = SolveJob(problem, engine.REPAIR_TIME_LIMIT, hint=saved_schedule,
+                                                  change_weight=engine.REPAIR_CHANGE_PENALTY, frozen=frozen,
+                                                  cache=solution_cache, cache_key=key, department=st.session_state.department).start()
+
+    precheck = st.session_state.precheck
+    current_key = (st.session_state.department, st.session_state.year, st.session_state.month)
+    if precheck and precheck["key"] == current_key:
+        render_precheck(precheck["issues"])
+
+    job = st.session_state.solve_job
+    if job is not None and (job.department, job.problem["year"], job.problem["month"]) == current_key:
+        if job.running:
+            st.fragment(render_solve_progress, run_every=0.5)()
+        elif job.state == jobs.HATA:
+            st.error(f"⚠️ Çözüm sırasında hata: {job.error}")
+        elif job.state == jobs.IPTAL:
+            st.info("Çözüm iptal edildi.")
+        else:
+            if job.from_cache:
+                st.caption("⚡ Bu girdiler daha önce çözülmüştü; sonuç önbellekten getirildi.")
+            if job.frozen is not None:
+                days = job.repair_days()
+                st.caption(f"🩹 Onarım: yalnızca {', '.join(map(str, days))}. günler yeniden planlandı; diğer günler korundu." if days
+                           else "🩹 Onarım: yeniden planlanacak gün kalmadı; çizelge aynen korundu.")
+            export_time = render_result(job.result, previous=job.hint, job=job)
+            if not job.stats_logged:
+                # Sonuç ilk kez gösteriliyor: çizelgeyi sonraki çözümlerin başlangıç noktası olarak sakla
+                if job.result["feasible"]:
+                    get_month_store().save_schedule(job.department, job.problem["year"], job.problem["month"],
+                                                    job.result["schedule"])
+                extra = {} if export_time is None else {"timings": dict(job.result.get("timings", {}), export=export_time)}
+                try:
+                    engine.log_run_stats(STATS_LOG, job.result, source="app", from_cache=job.from_cache, **extra)
+                except OSError:
+                    pass  # Kayıt dosyası yazılamıyorsa çözümü göstermeye engel olmasın
+                job.stats_logged = True
 
     st.markdown('</div>', unsafe_allow_html=True)
+
+# Bu çalıştırmada yapılan düzenlemeler kalıcı depoya yazılır (değişiklik yoksa yazılmaz)
+save_current_month_data()
@@ -0,0 +1,152 @@
+"""Çok servisli toplu çözüm (süreç havuzu).
+
+Her servisin ayı aynı modelin bağımsız bir örneğidir; ``solve_batch`` bunları
+``ProcessPoolExecutor`` ile çekirdeklere dağıtır ve her sonucu biter bitmez
+``(anahtar, sonuç)`` olarak verir. Toplam CPU bütçesi (``cpu_budget``)
+eşzamanlı süreçler ve her çözümün CP-SAT işçileri arasında paylaştırılır.
+Depodaki bir ayın tüm servisleri komut satırından da çözülebilir:
+
+    python batch.py --year 2025 --month 3 -o sonuclar/ --cpu 8 --time-limit 30
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import engine
+import horizon
+from excel_io import report_sections, write_report_stream
+from feasibility import check_feasibility, has_errors
+from storage import MonthStore
+
+
+def solve_job(problem, time_limit, num_workers, stop=None):
+    """Havuzdaki tek çözüm (``spawn`` ile çağrılabilmesi için modül düzeyinde)."""
+    return engine.solve_model(engine.build_model(problem), time_limit, num_workers, stop=stop)
+
+
+def precheck_result(problem, issues):
+    """Ön kontrolde çözümsüz bulunan problem için (çözücü çalıştırılmadan) sonuç sözlüğü."""
+    return {"year": problem["year"], "month": problem["month"], "status": "INFEASIBLE", "feasible": False,
+            "wall_time": 0.0, "stop_reason": "precheck", "issues": issues}
+
+
+def plan_workers(jobs, cpu_budget=None, num_workers=None):
+    """``(eşzamanlı süreç, süreç başına CP-SAT işçisi)``; toplamları ``cpu_budget``'ı aşmaz.
+
+    ``num_workers`` verilmezse önce süreç sayısı (iş sayısı kadar) belirlenir,
+    kalan çekirdekler işçilere bölünür.
+    """
+    budget = max(1, cpu_budget or os.cpu_count() or 1)
+    if num_workers:
+        num_workers = min(num_workers, budget)
+        return max(1, min(jobs, budget // num_workers)), num_workers
+    processes = max(1, min(jobs, budget))
+    return processes, max(1, budget // processes)
+
+
+def solve_batch(problems, time_limit=engine.DEFAULT_TIME_LIMIT, cpu_budget=None, num_workers=None, stop=None,
+                precheck=True):
+    """Problemleri süreç havuzunda çözer; ``(anahtar, sonuç)`` çiftlerini bitiş sırasıyla üretir.
+
+    ``problems`` anahtar -> problem sözlüğü ya da ``(anahtar, problem)``
+    listesidir. ``time_limit`` tek sayı ya da anahtar başına süre sözlüğüdür.
+    ``precheck`` açıksa ön kontrolde çözümsüz çıkan problemler havuza hiç
+    gönderilmez ve hemen döner. Bir çözüm hata verirse diğerleri sürer;
+    o anahtar için ``status`` "ERROR" ve ``error`` alanlı sonuç döner.
+    Üretici erken bırakılırsa bekleyen çözümler iptal edilir.
+    """
+    items = problems.items() if isinstance(problems, dict) else problems
+    pending = []
+    for key, problem in items:
+        problem = engine.normalize_problem(problem)
+        issues = check_feasibility(problem) if precheck else []
+        if has_errors(issues):
+            yield key, precheck_result(problem, issues)
+        else:
+            pending.append((key, problem, issues))
+    if not pending:
+        return
+
+    processes, workers = plan_workers(len(pending), cpu_budget, num_workers)
+    limit = time_limit.get if isinstance(time_limit, dict) else lambda key, default: time_limit
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {pool.submit(solve_job, problem, limit(key, engine.DEFAULT_TIME_LIMIT), workers, stop):
+                   (key, problem, issues) for key, problem, issues in pending}
+        for future in as_completed(futures):
+            key, problem, issues = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"year": problem["year"], "month": problem["month"], "status": "ERROR", "feasible": False,
+                          "wall_time": 0.0, "stop_reason": "error", "error": str(e)}
+            yield key, dict(result, issues=issues)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def department_problems(store, year, month, rest_days_24h=engine.DEFAULT_REST_DAYS_24H, departments=None):
+    """Depoda o ay için kaydı olan servislerin problemleri (servis -> problem).
+
+    Önceki ayın kayıtlı çizelgesi varsa ay sınırı taşınır (bkz. ``engine.apply_carry_in``).
+    """
+    if departments is None:
+        departments = [d for d, y, m in store.months() if (y, m) == (year, month)]
+    problems = {}
+    for department in departments:
+        problem = horizon.load_month_problem(store, department, year, month, rest_days_24h)
+        if problem is not None:
+            tail = store.load_schedule(department, *horizon.previous_month(year, month))
+            problems[department] = engine.apply_carry_in(problem, tail)[0]
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nobetinatör Ai çok servisli toplu çözüm")
+    parser.add_argument("--db", default=os.environ.get("NOBETINATOR_DB", "nobetinator.db"), help="Ay deposu (SQLite)")
+    parser.add_argument("--year", type=int, required=True, help="Yıl")
+    parser.add_argument("--month", type=int, required=True, help="Ay")
+    parser.add_argument("--departments", nargs="+", default=None, help="Çözülecek servisler (varsayılan: o ayın tümü)")
+    parser.add_argument("-o", "--output-dir", default="sonuclar", help="Sonuçların yazılacağı klasör")
+    parser.add_argument("--rest-days", type=int, default=engine.DEFAULT_REST_DAYS_24H, help="24s sonrası izin (gün)")
+    parser.add_argument("--time-limit", type=float, default=engine.DEFAULT_TIME_LIMIT, help="Servis başına süre (sn)")
+    parser.add_argument("--cpu", type=int, default=None, help="Toplam çekirdek bütçesi (varsayılan: tüm çekirdekler)")
+    parser.add_argument("--workers", type=int, default=None, help="Servis başına CP-SAT işçi sayısı (varsayılan: bütçeden)")
+    parser.add_argument("--dry-run", action="store_true", help="Bulunan çizelgeleri depoya yazma")
+    args = parser.parse_args(argv)
+
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    store = MonthStore(args.db)
+    problems = department_problems(store, args.year, args.month, args.rest_days, args.departments)
+    if not problems:
+        print(f"{args.year}-{args.month:02d} için depoda servis bulunamadı.", file=sys.stderr)
+        return 1
+
+    failed = 0
+    for department, result in solve_batch(problems, args.time_limit, args.cpu, args.workers):
+        name = f"{department}-{args.year}-{args.month:02d}"
+        with open(out_dir / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        if result["feasible"]:
+            write_report_stream(out_dir / f"{name}.xlsx", report_sections(
+                result["res_list"], result["res_grid"], result["stat_rows"], result["warnings"]))
+            if not args.dry_run:
+                store.save_schedule(department, args.year, args.month, result["schedule"])
+        else:
+            failed += 1
+        reason = engine.STOP_REASONS.get(result["stop_reason"], result["stop_reason"])
+        print(f"{department}: {result['status']} ({reason}) amaç={result.get('objective', '-')} "
+              f"süre={result['wall_time']:.2f}s")
+        if result.get("error"):
+            print(f"  ! {result['error']}", file=sys.stderr)
+    store.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
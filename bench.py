@@ -0,0 +1,249 @@
+"""Nobetinatör Ai performans ölçüm takımı.
+
+Tohumlu (seed) bir üreteçle sentetik aylar oluşturur, her birini farklı CP-SAT
+işçi sayılarıyla çözer ve model kurma süresi, ilk çözüm süresi, optimuma
+ulaşma süresi, amaç değeri ve boşluğu JSON-lines dosyasına yazar:
+
+    python bench.py -o bench_results.jsonl --workers 1 4 8 --time-limit 30
+
+Her satır tek bir (senaryo, işçi sayısı, tekrar) ölçümüdür; ``version`` alanı
+sayesinde farklı sürümlerin dosyaları birleştirilip gerileme aranabilir.
+
+``--scaling`` yalnızca model kurma süresini büyüyen servislerde ölçer ve hücre
+(doktor × gün) başına sürenin doğrusal kalıp kalmadığını denetler; büyüme
+eşiği aşılırsa çıkış kodu 1 olur:
+
+    python bench.py --scaling --sizes 25 50 100 200 400
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from ortools import __version__ as ortools_version
+
+import engine
+
+DEMAND_PROFILES = ["flat", "weekend", "random"]
+
+DEFAULT_SCALING_SIZES = [25, 50, 100, 200, 400]
+# En büyük servisteki hücre başı kurulum süresi en küçüğünkünün bu katını aşmamalı
+DEFAULT_SCALING_TOLERANCE = 2.0
+
+# Varsayılan senaryolar: küçük/orta/büyük servisler, farklı kısıt yoğunlukları
+DEFAULT_SUITE = [
+    {"name": "kucuk", "num_doctors": 12, "x_density": 0.05, "s_density": 0.02, "couples": 1},
+    {"name": "orta", "num_doctors": 20, "x_density": 0.05, "s_density": 0.03, "couples": 2},
+    {"name": "orta_yogun", "num_doctors": 20, "x_density": 0.12, "s_density": 0.06, "couples": 3,
+     "demand": "weekend"},
+    {"name": "buyuk", "num_doctors": 32, "x_density": 0.05, "s_density": 0.03, "couples": 4,
+     "demand": "random"},
+    {"name": "subat", "num_doctors": 16, "month": 2, "x_density": 0.08, "s_density": 0.04, "couples": 2},
+]
+
+
+# -----------------------------------------------------------------------------
+# 1. SENTETİK PROBLEM ÜRETECİ
+# -----------------------------------------------------------------------------
+def _daily_needs(rng, profile, year, month, num_days):
+    """Talep profiline göre (24h, 16h) günlük ihtiyaçlar."""
+    needs24, needs16 = {}, {}
+    for t in range(1, num_days + 1):
+        weekend = datetime(year, month, t).weekday() >= 5
+        if profile == "weekend":
+            needs24[t], needs16[t] = (2, 1) if weekend else (1, 1)
+        elif profile == "random":
+            needs24[t], needs16[t] = rng.choice([1, 1, 2]), rng.choice([0, 1, 1])
+        else:
+            needs24[t], needs16[t] = 1, 1
+    return needs24, needs16
+
+
+def _split_quota(total, doctors):
+    """Toplam ihtiyacı doktorlara olabildiğince eşit dağıtır."""
+    base, extra = divmod(total, len(doctors))
+    return {d: base + (1 if i < extra else 0) for i, d in enumerate(doctors)}
+
+
+def generate_instance(seed, num_doctors=20, year=2025, month=1, seniority_mix=(0.3, 0.5, 0.2),
+                      x_density=0.05, s_density=0.03, couples=2, demand="flat", rest_days_24h=2):
+    """Tekrarlanabilir sentetik bir ay üretir (``normalize_problem`` girdisi biçiminde).
+
+    ``seniority_mix`` Kıdemli/Orta/Çömez oranları, ``x_density``/``s_density``
+    doktor × gün hücrelerinin X/S olma olasılığıdır. Kotalar toplam ihtiyacı
+    eşit paylaşır; böylece kota sapması yalnızca kısıtlardan kaynaklanır.
+    """
+    if demand not in DEMAND_PROFILES:
+        raise ValueError(f"Bilinmeyen talep profili: {demand}")
+    rng = random.Random(seed)
+    num_days = engine.get_num_days({"year": year, "month": month})
+    doctors = [f"Dr{i:02d}" for i in range(1, num_doctors + 1)]
+
+    seniority = {d: rng.choices(engine.KIDEM_SEVIYELERI, weights=seniority_mix)[0] for d in doctors}
+    needs24, needs16 = _daily_needs(rng, demand, year, month, num_days)
+
+    manual = {}
+    for d in doctors:
+        for t in range(1, num_days + 1):
+            r = rng.random()
+            if r < x_density:
+                manual[f"{d}_{t}"] = "X"
+            elif r < x_density + s_density:
+                manual[f"{d}_{t}"] = "S"
+
+    shuffled = rng.sample(doctors, len(doctors))
+    pairs = [shuffled[2 * i:2 * i + 2] for i in range(min(couples, num_doctors // 2))]
+
+    return {
+        "year": year,
+        "month": month,
+        "doctors": doctors,
+        "daily_needs_24h": needs24,
+        "daily_needs_16h": needs16,
+        "quotas_24h": _split_quota(sum(needs24.values()), doctors),
+        "quotas_16h": _split_quota(sum(needs16.values()), doctors),
+        "seniority": seniority,
+        "manual_constraints": manual,
+        "couples": pairs,
+        "rest_days_24h": rest_days_24h,
+    }
+
+
+# -----------------------------------------------------------------------------
+# 2. ÖLÇÜM
+# -----------------------------------------------------------------------------
+def code_version():
+    """Ölçülen kodun sürümü (git kısa hash'i; git yoksa "bilinmiyor")."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return "bilinmiyor"
+    return out.stdout.strip() or "bilinmiyor"
+
+
+def run_case(problem, time_limit=engine.DEFAULT_TIME_LIMIT, num_workers=0):
+    """Tek bir problemi kurup çözer; ölçüm sözlüğü döndürür."""
+    problem = engine.normalize_problem(problem)
+    t0 = time.perf_counter()
+    sm = engine.build_model(problem)
+    build_time = time.perf_counter() - t0
+    proto = sm.model.Proto()
+
+    callback = engine.ProgressCallback(sm)
+    result = engine.solve_model(sm, time_limit, num_workers, callback=callback, collect_presolve=True)
+    return {
+        "num_vars": len(proto.variables),
+        "num_constraints": len(proto.constraints),
+        "build_time": build_time,
+        "first_solution_time": callback.progress.get("first_solution_time"),
+        "optimal_time": result["wall_time"] if result["status"] == "OPTIMAL" else None,
+        "wall_time": result["wall_time"],
+        "status": result["status"],
+        "objective": result.get("objective"),
+        "best_bound": result.get("best_bound"),
+        "gap": result.get("gap"),
+        "solutions": callback.progress["solutions"],
+        "presolve_time": result["solver_stats"]["presolve_time"],
+        "conflicts": result["solver_stats"]["conflicts"],
+        "branches": result["solver_stats"]["branches"],
+    }
+
+
+def run_suite(suite, workers, time_limit, repeats=1, seed=0, label=""):
+    """Her senaryo × işçi sayısı × tekrar için ``run_case`` ölçümlerini üretir."""
+    version = code_version()
+    for i, case in enumerate(suite):
+        params = {k: v for k, v in case.items() if k != "name"}
+        problem = generate_instance(seed + i, **params)
+        for num_workers in workers:
+            for rep in range(repeats):
+                row = {"version": version, "ortools": ortools_version, "label": label,
+                       "case": case.get("name", f"case{i}"), "seed": seed + i, "params": params,
+                       "workers": num_workers, "repeat": rep, "time_limit": time_limit}
+                row.update(run_case(problem, time_limit, num_workers))
+                yield row
+
+
+def build_scaling(sizes=DEFAULT_SCALING_SIZES, seed=0, repeats=3, label=""):
+    """Doktor sayısı büyüdükçe model kurma süresini ölçer (her boy için en iyi tekrar)."""
+    version = code_version()
+    for n in sizes:
+        problem = engine.normalize_problem(generate_instance(seed, num_doctors=n, couples=n // 10))
+        best = None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            sm = engine.build_model(problem)
+            elapsed = time.perf_counter() - t0
+            if best is None or elapsed < best[0]:
+                best = (elapsed, sm.timings)
+        cells = n * engine.get_num_days(problem)
+        yield {"version": version, "ortools": ortools_version, "label": label, "case": "scaling",
+               "seed": seed, "num_doctors": n, "cells": cells, "build_time": best[0],
+               "us_per_cell": 1e6 * best[0] / cells, "timings": best[1]}
+
+
+def check_linear(rows, tolerance=DEFAULT_SCALING_TOLERANCE):
+    """Hücre başı kurulum süresi en küçük boydan en büyüğe ``tolerance`` katından fazla arttı mı?"""
+    rows = sorted(rows, key=lambda r: r["cells"])
+    growth = rows[-1]["us_per_cell"] / rows[0]["us_per_cell"]
+    return growth <= tolerance, growth
+
+
+def _fmt(v, spec=".2f"):
+    return "-" if v is None else format(v, spec)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nobetinatör Ai çözücü performans ölçümü")
+    parser.add_argument("-o", "--output", default="bench_results.jsonl", help="JSON-lines çıktı dosyası (sona eklenir)")
+    parser.add_argument("--suite", default=None, help="Senaryo listesi içeren JSON dosyası (varsayılan: dahili takım)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8], help="Denenecek CP-SAT işçi sayıları")
+    parser.add_argument("--time-limit", type=float, default=engine.DEFAULT_TIME_LIMIT, help="Çözüm başına süre (sn)")
+    parser.add_argument("--repeat", type=int, default=1, help="Her ölçümün tekrar sayısı")
+    parser.add_argument("--seed", type=int, default=0, help="Üreteç tohumu")
+    parser.add_argument("--label", default="", help="Ölçüme eklenecek serbest etiket")
+    parser.add_argument("--scaling", action="store_true", help="Yalnızca model kurma süresinin doğrusallığını ölç")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SCALING_SIZES, help="--scaling için doktor sayıları")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_SCALING_TOLERANCE,
+                        help="--scaling için izin verilen hücre başı süre artışı (kat)")
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        return run_scaling(args)
+
+    suite = DEFAULT_SUITE
+    if args.suite:
+        with open(args.suite, encoding="utf-8") as f:
+            suite = json.load(f)
+
+    with open(args.output, "a", encoding="utf-8") as out:
+        for row in run_suite(suite, args.workers, args.time_limit, args.repeat, args.seed, args.label):
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"{row['case']:<12} w={row['workers']:<2} {row['status']:<10} "
+                  f"kurulum={_fmt(row['build_time'], '.3f')}s ilk={_fmt(row['first_solution_time'])}s "
+                  f"optimum={_fmt(row['optimal_time'])}s amaç={_fmt(row['objective'], '.0f')} "
+                  f"boşluk={_fmt(row['gap'], '.3f')}")
+    return 0
+
+
+def run_scaling(args):
+    rows = []
+    with open(args.output, "a", encoding="utf-8") as out:
+        for row in build_scaling(args.sizes, args.seed, max(args.repeat, 3), args.label):
+            rows.append(row)
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            print(f"{row['num_doctors']:>5} doktor  {row['cells']:>6} hücre  kurulum={row['build_time']:.3f}s  "
+                  f"hücre başı={row['us_per_cell']:.1f}µs")
+    ok, growth = check_linear(rows, args.tolerance)
+    print(f"Hücre başı süre artışı: {growth:.2f}x (eşik {args.tolerance:.1f}x) — {'doğrusal' if ok else 'DOĞRUSAL DEĞİL'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
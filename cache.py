@@ -0,0 +1,106 @@
+"""Problem girdilerinin kanonik hash'i ile anahtarlanan çözüm önbelleği.
+
+Aynı (veya geri alınmış) ayarlar tekrar çözülmez: sonuç bellekteki LRU
+katmanından, o yoksa isteğe bağlı disk katmanından anında döner. Nesne
+thread-safe'tir; Streamlit'te ``st.cache_resource`` ile tüm oturumlar
+arasında paylaşılır.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import engine
+
+DEFAULT_MAX_ENTRIES = 128
+
+# Bu nedenlerle duran çözümler "tam" değildir (durdurma ayarına bağlıdır); önbelleğe yazılmaz
+UNCACHEABLE_STOP_REASONS = {"user", "gap", "stall", "hard_zero"}
+# Sonucu kanıtlanmış çözümler süre sınırından bağımsız olarak yeniden kullanılır
+PROVEN_STOP_REASONS = {"optimal", "infeasible", "precheck"}
+
+
+def problem_key(problem, hint=None, change_weight=0, frozen=None):
+    """Normalize edilmiş problemin (ve sonucu etkileyen seçeneklerin) SHA-256 anahtarı.
+
+    İpucu yalnızca ``change_weight`` > 0 iken sonucu değiştirdiği için sadece
+    o durumda anahtara dahil edilir. Onarım modunda dondurulmuş hücre matrisi
+    (``engine.repair_problem``) de anahtara girer.
+    """
+    canonical = dict(engine.normalize_problem(problem))
+    canonical["couples"] = sorted(canonical["couples"])
+    canonical["manual_constraints"] = canonical["manual_constraints"].to_dict()
+    if change_weight:
+        canonical["_hint"] = hint or {}
+        canonical["_change_weight"] = change_weight
+    if frozen is not None:
+        canonical["_frozen"] = frozen.tolist()
+    payload = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SolutionCache:
+    """LRU bellek katmanı + isteğe bağlı disk katmanı (anahtar başına bir JSON dosyası)."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, disk_dir=None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    @staticmethod
+    def _usable(entry, time_limit):
+        # Optimum/çözümsüzlük kanıtlanmışsa süre önemsiz; aksi halde en az o kadar aranmış olmalı.
+        # Karar "status"a değil durma nedenine göre verilir: boşluk eşiğiyle duran çözüm de OPTIMAL döner.
+        reason = entry["result"].get("stop_reason")
+        if reason in UNCACHEABLE_STOP_REASONS:  # eski sürümlerin diske yazdığı erken durmuş kayıtlar
+            return False
+        if reason in PROVEN_STOP_REASONS:
+            return True
+        return time_limit is None or entry["time_limit"] >= time_limit
+
+    def get(self, key, time_limit=None):
+        """Önbellekteki sonucu döndürür; yoksa (veya daha kısa süreyle bulunmuşsa) None."""
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+        if entry is None and self.disk_dir:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None or not self._usable(entry, time_limit):
+            return None
+        return entry["result"]
+
+    def put(self, key, result, time_limit):
+        if result.get("stop_reason") in UNCACHEABLE_STOP_REASONS:
+            return
+        entry = {"time_limit": float(time_limit), "result": result}
+        self._remember(key, entry)
+        if self.disk_dir:
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, self._path(key))
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._mem[key] = entry
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._mem)
@@ -0,0 +1,180 @@
+"""Nobetinatör Ai komut satırı arayüzü.
+
+Bir klasördeki tüm JSON / Excel problem dosyalarını tarayıcı açmadan toplu çözer:
+
+    python cli.py girdiler/ -o sonuclar/ --time-limit 20
+
+Her girdi için ``<isim>.json`` (çizelge + istatistik) ve ``<isim>.xlsx`` (rapor)
+yazılır. ``--report-format csv parquet`` raporu sayfa başına CSV/Parquet
+dosyaları olarak da yazar; ``--combined-report yil`` tüm sonuçları JSON
+dosyalarından tek tek okuyarak sabit bellekle tek bir rapora birleştirir.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import engine
+from cache import SolutionCache, problem_key
+from excel_io import (TABLE_FORMATS, combined_sections, format_issue, read_problem_excel, report_sections,
+                      write_report_stream, write_report_tables)
+from feasibility import check_feasibility, explain_infeasibility, has_errors
+
+INPUT_SUFFIXES = {".json", ".xlsx", ".xls"}
+
+
+def load_problem_file(path, year=None, month=None, rest_days_24h=None):
+    """JSON veya Excel dosyasını normalize edilmiş problem sözlüğüne çevirir.
+
+    Excel şablonunda yıl/ay bilgisi olmadığından ``year``/``month`` parametreleri
+    kullanılır; JSON dosyasında varsa dosyadaki değer önceliklidir.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data, report = read_problem_excel(path)
+        for issue in report:
+            print(f"  ! {path.name}: {format_issue(issue)}", file=sys.stderr)
+
+    data.setdefault("year", year)
+    data.setdefault("month", month)
+    if rest_days_24h is not None:
+        data["rest_days_24h"] = rest_days_24h
+    return engine.normalize_problem(data)
+
+
+def iter_input_files(input_dir):
+    return sorted(p for p in Path(input_dir).iterdir() if p.suffix.lower() in INPUT_SUFFIXES)
+
+
+def load_previous_schedule(path):
+    """Önceki çalıştırmanın sonuç JSON'undaki çizelge (yoksa None)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("schedule")
+    except (OSError, ValueError):
+        return None
+
+
+def solve_file(path, out_dir, args, solution_cache=None):
+    problem = load_problem_file(path, args.year, args.month, args.rest_days)
+    stop = {"gap": args.gap, "stall_seconds": args.stall, "hard_zero": args.stop_when_hard_zero}
+    out_json = out_dir / f"{path.stem}.json"
+    hint = load_previous_schedule(out_json) if args.warm_start else None
+    change_weight = engine.CHANGE_PENALTY if args.keep_close else 0
+
+    issues = check_feasibility(problem)
+    result = None
+    if has_errors(issues):
+        result = {"year": problem["year"], "month": problem["month"], "status": "INFEASIBLE",
+                  "feasible": False, "wall_time": 0.0, "stop_reason": "precheck"}
+    elif solution_cache is not None:
+        key = problem_key(problem, hint, change_weight)
+        result = solution_cache.get(key, time_limit=args.time_limit)
+    if result is None:
+        sm = engine.build_model(problem, hint, change_weight)
+        result = engine.solve_model(sm, args.time_limit, args.workers, stop=stop,
+                                    collect_presolve=bool(args.stats_log))
+        if solution_cache is not None:
+            solution_cache.put(key, result, args.time_limit)
+    result = dict(result, issues=issues)
+    if args.explain and result["status"] == "INFEASIBLE":
+        core, minimal = explain_infeasibility(problem, args.time_limit, args.workers)
+        result["conflict"], result["conflict_minimal"] = core, minimal
+
+    with open(out_json, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    if result["feasible"]:
+        t0 = time.perf_counter()
+        write_outputs(out_dir / path.stem, args.report_format,
+                      lambda: report_sections(result["res_list"], result["res_grid"], result["stat_rows"],
+                                              result["warnings"]))
+        result["timings"] = dict(result.get("timings", {}), export=time.perf_counter() - t0)
+    if args.stats_log:
+        engine.log_run_stats(args.stats_log, result, source=path.name)
+    return result
+
+
+def write_outputs(base_path, formats, make_sections):
+    """Raporu istenen biçimlerde yazar; ``make_sections`` her biçim için sayfaları baştan üretir."""
+    for fmt in formats:
+        if fmt == "xlsx":
+            write_report_stream(base_path.with_name(f"{base_path.name}.xlsx"), make_sections())
+        else:
+            write_report_tables(base_path, make_sections(), fmt)
+
+
+def iter_saved_results(paths):
+    """Sonuç JSON dosyalarını sırayla (bellekte aynı anda tek dosya) ``(isim, sonuç)`` olarak okur."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+        if result.get("feasible"):
+            yield path.stem, result
+
+
+def main(argv=None):
+    now = datetime.now()
+    parser = argparse.ArgumentParser(description="Nobetinatör Ai toplu çizelge çözücü")
+    parser.add_argument("input_dir", help="JSON / Excel problem dosyalarının bulunduğu klasör")
+    parser.add_argument("-o", "--output-dir", default="sonuclar", help="Sonuçların yazılacağı klasör")
+    parser.add_argument("--year", type=int, default=now.year, help="Excel girdileri için yıl")
+    parser.add_argument("--month", type=int, default=now.month, help="Excel girdileri için ay")
+    parser.add_argument("--rest-days", type=int, default=None, help="24s sonrası izin (gün)")
+    parser.add_argument("--time-limit", type=float, default=engine.DEFAULT_TIME_LIMIT, help="Problem başına süre (sn)")
+    parser.add_argument("--workers", type=int, default=0, help="CP-SAT arama işçisi sayısı (0 = otomatik)")
+    parser.add_argument("--gap", type=float, default=0.0, help="Göreli boşluk bu değerin altına inince dur (ör. 0.02)")
+    parser.add_argument("--stall", type=float, default=0.0, help="Bu kadar saniye iyileşme olmazsa dur")
+    parser.add_argument("--stop-when-hard-zero", action="store_true", help="S ihlali ve kota sapması sıfırlanınca dur")
+    parser.add_argument("--warm-start", action="store_true", help="Çıktı klasöründeki önceki sonucu başlangıç çözümü olarak kullan")
+    parser.add_argument("--explain", action="store_true", help="Çözümsüz girdiler için çelişen kural kümesini bul")
+    parser.add_argument("--cache-dir", default=None, help="Çözüm önbelleği klasörü (aynı girdiler tekrar çözülmez)")
+    parser.add_argument("--stats-log", default=None, help="Aşama süreleri ve çözücü istatistiklerinin ekleneceği JSON-lines dosyası")
+    parser.add_argument("--report-format", nargs="+", choices=["xlsx"] + TABLE_FORMATS, default=["xlsx"],
+                        help="Rapor biçimleri (csv/parquet: sayfa başına bir dosya)")
+    parser.add_argument("--combined-report", default=None, help="Tüm sonuçların birleştirileceği rapor adı (çıktı klasöründe)")
+    parser.add_argument("--keep-close", action="store_true", help="Önceki sonuçtan değişen hücreleri cezalandır (--warm-start ile)")
+    args = parser.parse_args(argv)
+
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    files = iter_input_files(args.input_dir)
+    if not files:
+        print(f"{args.input_dir} içinde JSON/Excel dosyası bulunamadı.", file=sys.stderr)
+        return 1
+
+    solution_cache = SolutionCache(disk_dir=args.cache_dir) if args.cache_dir else None
+    failed = 0
+    for path in files:
+        try:
+            result = solve_file(path, out_dir, args, solution_cache)
+        except Exception as e:
+            failed += 1
+            print(f"{path.name}: HATA {e}", file=sys.stderr)
+            continue
+        if not result["feasible"]:
+            failed += 1
+        obj = result.get("objective", "-")
+        reason = engine.STOP_REASONS.get(result["stop_reason"], result["stop_reason"])
+        print(f"{path.name}: {result['status']} ({reason}) amaç={obj} süre={result['wall_time']:.2f}s")
+        for issue in result["issues"]:
+            if issue["level"] == "error":
+                print(f"  ! {issue['message']}", file=sys.stderr)
+        for c in result.get("conflict") or []:
+            print(f"  ✗ {c['message']}", file=sys.stderr)
+
+    if args.combined_report:
+        saved = [out_dir / f"{path.stem}.json" for path in files if (out_dir / f"{path.stem}.json").exists()]
+        write_outputs(out_dir / args.combined_report, args.report_format,
+                      lambda: combined_sections(lambda: iter_saved_results(saved)))
+        print(f"Birleşik rapor: {out_dir / args.combined_report} ({', '.join(args.report_format)})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
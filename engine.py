@@ -0,0 +1,1048 @@
+"""Nobetinatör Ai çizelgeleme motoru.
+
+Streamlit'ten bağımsızdır: düz bir problem sözlüğü alır, CP-SAT modelini kurar,
+çözer ve çizelge + istatistikleri yine düz sözlükler olarak döndürür.
+
+Problem sözlüğü (``normalize_problem`` çıktısı):
+    year, month, doctors, daily_needs_24h, daily_needs_16h, quotas_24h,
+    quotas_16h, seniority, manual_constraints (``ManualGrid``: doktor × gün
+    X/S/24/16 matrisi), couples, rest_days_24h
+"""
+import calendar
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from manual_grid import CELL_16, CELL_24, CELL_CODES, CELL_EMPTY, CELL_S, CELL_X, ManualGrid
+
+GUN_ADLARI = ['Pzt', 'Sal', 'Çar', 'Per', 'Cum', 'Cmt', 'Paz']
+KIDEM_SEVIYELERI = ["Kıdemli", "Orta", "Çömez"]
+
+# Hedef fonksiyonu ağırlıkları
+S_PENALTY = 5000        # Esnek izin (S) ihlali: yüksek ceza ama imkansız değil
+QUOTA_PENALTY = 500     # Kota sapması (nöbet başına)
+COUPLE_PENALTY = 100    # Evli çiftin farklı günlerde çalışması
+WEEKLY_PENALTY = 20     # Ardışık haftalar arası yük farkı
+SENIORITY_PENALTY = 5   # Günlük kıdemli/orta dengesizliği
+CHANGE_PENALTY = 50     # "Minimum değişiklik" modunda önceki çizelgeden sapan hücre başına
+REPAIR_CHANGE_PENALTY = 200  # Onarım modunda değişen hücre başına (denge cezalarından ağır, kota/S'den hafif)
+
+# Hedef fonksiyonu bileşenleri (raporlama için ayrı ayrı tutulur)
+OBJECTIVE_COMPONENTS = ["soft_leave", "quota", "couple", "weekly", "seniority", "change"]
+# Sıfırlandığında "iyi çizelge" sayılan ağır ceza bileşenleri (erken durdurma için)
+HARD_COMPONENTS = ["soft_leave", "quota"]
+
+# Aramanın neden durduğu (sonuç sözlüğündeki "stop_reason" -> kullanıcı metni)
+STOP_REASONS = {
+    "optimal": "optimum kanıtlandı",
+    "gap": "boşluk eşiğine ulaşıldı",
+    "stall": "iyileşme durdu",
+    "hard_zero": "S ihlali ve kota sapması sıfır",
+    "user": "kullanıcı durdurdu",
+    "time_limit": "süre doldu",
+    "infeasible": "çözüm yok",
+    "precheck": "ön kontrolde çözümsüz",
+    "error": "çözüm sırasında hata",
+}
+
+DEFAULT_REST_DAYS_24H = 2
+DEFAULT_TIME_LIMIT = 20
+REPAIR_TIME_LIMIT = 2
+
+# Zamanlaması ölçülen aşamalar (sonuç sözlüğündeki "timings" anahtarları -> kullanıcı metni)
+PHASE_LABELS = {
+    "build.variables": "Model: değişkenler",
+    "build.needs": "Model: günlük ihtiyaçlar",
+    "build.rest": "Model: yasaklar ve dinlenme",
+    "build.soft_leave": "Model: esnek izin cezaları",
+    "build.couples": "Model: evli çiftler",
+    "build.quotas": "Model: kotalar",
+    "build.weekly": "Model: haftalık denge",
+    "build.seniority": "Model: kıdem dengesi",
+    "build.symmetry": "Model: simetri kırma",
+    "build.hint": "Model: önceki çizelge",
+    "build.objective": "Model: hedef fonksiyon",
+    "build.update": "Model: yerinde güncelleme",
+    "solve": "Çözüm (CP-SAT)",
+    "decode": "Sonuçların işlenmesi",
+    "export": "Excel raporu",
+}
+
+
+# -----------------------------------------------------------------------------
+# 1. PROBLEM TANIMI
+# -----------------------------------------------------------------------------
+def get_num_days(problem):
+    return calendar.monthrange(problem["year"], problem["month"])[1]
+
+
+def day_label(year, month, t):
+    """Çizelgede kullanılan '05 Cum' biçimli gün etiketi."""
+    dt = datetime(year, month, t)
+    return f"{t:02d} {GUN_ADLARI[dt.weekday()]}"
+
+
+def normalize_problem(data):
+    """JSON, Excel veya session state'ten gelen ham veriyi motorun beklediği forma getirir.
+
+    JSON'dan gelen string gün anahtarlarını int'e çevirir, eksik günleri/doktorları
+    uygulamadaki varsayılanlarla doldurur. Manuel hücreler (eski "Doktor_Gün"
+    sözlüğü ya da ``ManualGrid``) ayın doktor listesine ve gün sayısına hizalı
+    yeni bir ``ManualGrid`` kopyasına çevrilir.
+    """
+    now = datetime.now()
+    year = int(data.get("year") or now.year)
+    month = int(data.get("month") or now.month)
+    num_days = calendar.monthrange(year, month)[1]
+    doctors = [str(d).strip() for d in data.get("doctors", [])]
+
+    needs24 = {int(k): int(v) for k, v in (data.get("daily_needs_24h") or {}).items()}
+    needs16 = {int(k): int(v) for k, v in (data.get("daily_needs_16h") or {}).items()}
+    quotas24 = data.get("quotas_24h") or {}
+    quotas16 = data.get("quotas_16h") or {}
+    seniority = data.get("seniority") or {}
+
+    manual = data.get("manual_constraints")
+    if isinstance(manual, ManualGrid):
+        manual = manual.reindex(doctors, num_days)
+    else:
+        manual = ManualGrid.from_dict(doctors, num_days, manual)
+
+    couples = []
+    for pair in data.get("couples") or []:
+        d1, d2 = str(pair[0]), str(pair[1])
+        if d1 != d2:
+            couples.append(sorted([d1, d2]))
+
+    return {
+        "year": year,
+        "month": month,
+        "doctors": doctors,
+        "daily_needs_24h": {t: needs24.get(t, 1) for t in range(1, num_days + 1)},
+        "daily_needs_16h": {t: needs16.get(t, 1) for t in range(1, num_days + 1)},
+        "quotas_24h": {d: int(quotas24.get(d, 0)) for d in doctors},
+        "quotas_16h": {d: int(quotas16.get(d, 0)) for d in doctors},
+        "seniority": {d: seniority.get(d, "Orta") for d in doctors},
+        "manual_constraints": manual,
+        "couples": couples,
+        "rest_days_24h": int(data.get("rest_days_24h") or DEFAULT_REST_DAYS_24H),
+    }
+
+
+def carry_in_cells(problem, tail):
+    """Önceki ayın son günlerindeki nöbetlerin bu ayın başında kapattığı hücreler.
+
+    ``tail`` önceki ayın çizelgesidir (doktor -> gün kodları; yalnızca son
+    ``rest_days_24h`` gün kullanılır). Son gün nöbet tutan doktor 1'inde
+    çalışamaz (peş peşe gün yasağı); ``k`` gün önce 24 saat tutan doktor
+    ``rest_days_24h - k + 1``. güne kadar izinlidir. Doktor × gün bool matrisi döndürür.
+    """
+    rest = problem["rest_days_24h"]
+    blocked = np.zeros((len(problem["doctors"]), get_num_days(problem)), dtype=bool)
+    for i, d in enumerate(problem["doctors"]):
+        row = (tail or {}).get(d) or []
+        for k in range(1, min(rest, len(row)) + 1):
+            code = row[-k]
+            if k == 1 and code in ("24", "16"):
+                blocked[i, 0] = True
+            if code == "24":
+                blocked[i, :rest - k + 1] = True
+    return blocked
+
+
+def apply_carry_in(problem, tail):
+    """Ay sınırı kurallarını (bkz. ``carry_in_cells``) X hücresi olarak ekler.
+
+    Problem kopyası ve çakışan hücreler döndürülür: kullanıcının elle
+    yazdığı 24/16 hücreleri korunur ve ``(doktor, gün)`` listesinde bildirilir;
+    boş ve S hücreleri X olur. Önceki ay yoksa (``tail`` boş) problem aynen döner.
+    """
+    blocked = carry_in_cells(problem, tail)
+    if not blocked.any():
+        return problem, []
+    grid = problem["manual_constraints"].copy()
+    fixed = (grid.codes == CELL_24) | (grid.codes == CELL_16)
+    grid.codes[blocked & ~fixed] = CELL_X
+    conflicts = [(problem["doctors"][i], j + 1) for i, j in np.argwhere(blocked & fixed).tolist()]
+    return dict(problem, manual_constraints=grid), conflicts
+
+
+# -----------------------------------------------------------------------------
+# 2. MODEL KURULUMU
+# -----------------------------------------------------------------------------
+class ScheduleModel:
+    """Kurulmuş CP-SAT modeli, karar değişkenleri ve ceza terimleri.
+
+    Karar değişkenleri tamsayı indeksli satırlardır: ``x24[i][j]`` i. doktorun
+    (``docs[i]``) j. günü (``j = gün - 1``) için BoolVar ya da değeri baştan
+    belli olan hücrelerde 0/1 sabitidir.
+    """
+
+    def __init__(self, problem, guard=False):
+        self.problem = problem
+        self.guard = guard
+        self.model = cp_model.CpModel()
+        self.docs = problem["doctors"]
+        self.index = {d: i for i, d in enumerate(self.docs)}
+        self.num_days = get_num_days(problem)
+        self.days = range(1, self.num_days + 1)
+        self.x24, self.x16 = [], []
+        self.soft = None  # Esnek izin (S) istenen hücrelerin doktor × gün maskesi
+        self.terms = {name: [] for name in OBJECTIVE_COMPONENTS}  # (ifade, ağırlık)
+        self.assumptions = []  # (varsayım literali, kısıt grubu açıklaması)
+        self.symmetry_classes = []  # birbirinin yerine geçebilen doktor grupları
+        # Yeniden kullanılabilir modelde (bkz. update_model) girdilerin kısıtlara dizini
+        self.reusable = False
+        self.structure = None  # structure_key(problem)
+        self.codes = None  # modele uygulanmış manuel hücre matrisi
+        self.need_cts = {}  # ("24"/"16", gün indeksi) -> günlük ihtiyaç kısıtı
+        self.quota_cts = {}  # ("24"/"16", doktor indeksi) -> (sapma değişkeni, alt kısıt, üst kısıt)
+        self.timings = {}  # aşama -> saniye (bkz. PHASE_LABELS)
+        self._last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        """Bir önceki işaretten bu yana geçen süreyi ``phase`` aşamasına yazar."""
+        now = time.perf_counter()
+        self.timings[phase] = self.timings.get(phase, 0.0) + now - self._last_mark
+        self._last_mark = now
+
+    def guard_literals(self, kind, message, day=None, doctor=None):
+        """Katı kısıt grubu için varsayım literali (``guard`` kapalıysa boş liste).
+
+        Dönen liste ``OnlyEnforceIf``'e verilir; böylece çözümsüzlükte
+        ``SufficientAssumptionsForInfeasibility`` hangi grupların çeliştiğini söyler.
+        """
+        if not self.guard:
+            return []
+        lit = self.model.NewBoolVar(f'a_{kind}_{len(self.assumptions)}')
+        self.assumptions.append((lit, {"kind": kind, "message": message, "day": day, "doctor": doctor}))
+        return [lit]
+
+    def add_penalty(self, component, expr, weight):
+        self.terms[component].append((expr, weight))
+
+    def objective_expr(self):
+        exprs, weights, const = [], [], 0
+        for terms in self.terms.values():
+            for expr, w in terms:
+                if isinstance(expr, int):
+                    const += expr * w
+                else:
+                    exprs.append(expr)
+                    weights.append(w)
+        return cp_model.LinearExpr.WeightedSum(exprs, weights) + const
+
+    def index_cells(self):
+        """x24/x16 hücrelerinin değişken indeksi (sabitse -1) ve sabit değer matrisleri.
+
+        ``decode_solution`` bunlarla tüm çözümü tek seferde matrise çevirir.
+        """
+        shape = (len(self.docs), self.num_days)
+        for name, rows in (("24", self.x24), ("16", self.x16)):
+            flat = [x for row in rows for x in row]
+            index = np.array([-1 if isinstance(x, int) else x.Index() for x in flat], dtype=np.int64).reshape(shape)
+            const = np.array([x if isinstance(x, int) else 0 for x in flat], dtype=np.int8).reshape(shape)
+            setattr(self, f"index{name}", index)
+            setattr(self, f"const{name}", const)
+
+    def schedule_matrix(self, solution):
+        """Çözüm vektöründen doktor × gün int8 matrisi (0 boş, ``CELL_24``, ``CELL_16``)."""
+        sol = np.asarray(solution, dtype=np.int64)
+        w24 = np.where(self.index24 >= 0, sol[np.maximum(self.index24, 0)], self.const24)
+        w16 = np.where(self.index16 >= 0, sol[np.maximum(self.index16, 0)], self.const16)
+        return (CELL_24 * w24 + CELL_16 * w16 * (1 - w24)).astype(np.int8)
+
+    def component_values(self, solution, components=OBJECTIVE_COMPONENTS):
+        """Çözüm vektöründen ceza bileşenlerinin (ağırlıklı) değerleri."""
+        sol = np.asarray(solution, dtype=np.int64)
+        out = {}
+        for name in components:
+            terms = self.terms[name]
+            total = sum(expr * w for expr, w in terms if isinstance(expr, int))
+            pairs = [(expr.Index(), w) for expr, w in terms if not isinstance(expr, int)]
+            if pairs:
+                idx, weights = np.array(pairs, dtype=np.int64).T
+                total += int(sol[idx] @ weights)
+            out[name] = int(total)
+        return out
+
+
+def _sum(xs):
+    """Sabit ve değişken karışık listeyi tek ``LinearExpr.Sum`` ifadesine çevirir."""
+    return cp_model.LinearExpr.Sum(xs)
+
+
+def build_model(problem, hint=None, change_weight=0, guard=False, reusable=False, frozen=None):
+    """Problem sözlüğünden CP-SAT modelini kurar ve ``ScheduleModel`` döndürür.
+
+    ``hint`` önceki bir çözümün ``schedule`` alanıdır (doktor -> gün kodları);
+    verilirse x24/x16 için çözüm ipucu (warm start) olarak eklenir.
+    ``change_weight`` > 0 ise ipucundan sapan her hücre bu ağırlıkla cezalandırılır.
+    ``guard`` açıksa katı kısıt grupları (gün ihtiyacı, manuel hücre, doktor
+    dinlenme kuralları) varsayım literalleriyle korunur (çelişki analizi için).
+
+    Kodlama sade tutulur: değeri baştan belli olan hücreler (X, sabit 24/16,
+    ihtiyacı 0 olan günler) değişken yerine 0/1 sabiti olarak tutulur; aynı gün
+    tek nöbet kuralı peş peşe gün yasağının içinde, S ihlali ve çift uyumsuzluğu
+    ek yardımcı değişken olmadan ifade edilir. Hangi hücrenin değişken, hangisinin
+    sabit olduğu doktor × gün maskeleriyle baştan hesaplanır; döngülerde string
+    anahtar araması yapılmaz, toplamlar ``LinearExpr.Sum`` ile tek seferde kurulur.
+
+    ``reusable`` açıksa her hücre değişkendir ve manuel hücreler değişken
+    sınırı, ihtiyaçlar ve kotalar kısıt sınırı olarak girilir; böylece model
+    ``update_model`` ile küçük düzenlemelerde yeniden kurulmadan güncellenir.
+
+    ``frozen`` onarım modunda sabitlenen hücrelerin doktor × gün kod matrisidir
+    (bkz. ``repair_problem``): ``CELL_24``/``CELL_16`` hücreleri o nöbete,
+    ``CELL_X`` hücreleri boşa sabitlenir, ``CELL_EMPTY`` hücreler serbesttir.
+    Sabit hücreler manuel hücrelerden önce gelir; S cezaları yine hesaplanır.
+    """
+    if frozen is not None and (guard or reusable):
+        raise ValueError("Dondurulmuş hücreler yalnızca normal modelde kullanılabilir.")
+    sm = ScheduleModel(problem, guard)
+    model = sm.model
+    docs, days, num_days = sm.docs, sm.days, sm.num_days
+    x24, x16 = sm.x24, sm.x16
+    rest_days_24h = problem["rest_days_24h"]
+    needs24 = [problem["daily_needs_24h"].get(t, 1) for t in days]
+    needs16 = [problem["daily_needs_16h"].get(t, 1) for t in days]
+
+    seniors = [i for i, d in enumerate(docs) if problem["seniority"].get(d) == "Kıdemli"]
+    mids = [i for i, d in enumerate(docs) if problem["seniority"].get(d) == "Orta"]
+
+    # Doktor × gün maskeleri: hangi hücre değişken, hangisi sabit
+    codes = problem["manual_constraints"].codes
+    sm.soft = codes == CELL_S
+    cells = codes if frozen is None else np.where(frozen != CELL_EMPTY, frozen, codes)
+    if guard or reusable:
+        free24 = free16 = np.ones(codes.shape, dtype=bool)
+    else:
+        open_cells = (cells != CELL_X) & (cells != CELL_24) & (cells != CELL_16)
+        free24 = open_cells & (np.array(needs24) > 0)
+        free16 = open_cells & (np.array(needs16) > 0)
+    const24 = (~free24 & (cells == CELL_24)).astype(int)
+    const16 = (~free16 & (cells == CELL_16)).astype(int)
+
+    # 1. TEMEL DEĞİŞKENLER (sabit hücreler değişken oluşturmaz)
+    new_bool = model.NewBoolVar
+    for f24, c24, f16, c16 in zip(free24.tolist(), const24.tolist(), free16.tolist(), const16.tolist()):
+        row24, row16 = [], []
+        for j in range(num_days):  # x24/x16 değişkenleri gün gün sırayla (arama sırası için)
+            row24.append(new_bool("") if f24[j] else c24[j])
+            row16.append(new_bool("") if f16[j] else c16[j])
+        x24.append(row24)
+        x16.append(row16)
+    sm.index_cells()
+    sm.structure = structure_key(problem)
+    if reusable:
+        sm.reusable, sm.codes = True, codes.copy()
+        _set_cell_bounds(sm, np.argwhere(codes != CELL_EMPTY), codes)
+
+    sm.mark("build.variables")
+
+    # 2. GÜNLÜK İHTİYAÇLAR
+    fixed24, fixed16 = const24.sum(axis=0).tolist(), const16.sum(axis=0).tolist()
+    for j, t in enumerate(days):
+        need24, need16 = needs24[j], needs16[j]
+        lits = sm.guard_literals("need", f"{t}. gün ihtiyacı ({need24}×24h + {need16}×16h)", day=t)
+        for kind, xs, free, need, fixed in (("24", x24, free24, need24, fixed24[j]), ("16", x16, free16, need16, fixed16[j])):
+            day_vars = [xs[i][j] for i in np.flatnonzero(free[:, j]).tolist()]
+            if reusable:
+                sm.need_cts[kind, j] = model.AddLinearConstraint(_sum(day_vars), need, need)
+            elif not day_vars:
+                if fixed != need:
+                    model.AddBoolOr([]).OnlyEnforceIf(lits)  # sabitler ihtiyacı karşılamıyor: çözümsüz
+            elif need - fixed == 1 and not lits:
+                model.AddExactlyOne(day_vars)
+            else:
+                model.Add(_sum(day_vars) == need - fixed).OnlyEnforceIf(lits)
+
+    sm.mark("build.needs")
+
+    # 3. YASAKLAR VE DİNLENME
+    for i, d in enumerate(docs):
+        row24, row16 = x24[i], x16[i]
+        lits = sm.guard_literals("rest", f"{d}: peş peşe gün yasağı ve 24s sonrası {rest_days_24h} gün izin", doctor=d)
+        # Peş peşe gün çalışmama (aynı gün tek nöbet kuralını da kapsar)
+        for j in range(num_days - 1):
+            _at_most_one(model, [row24[j], row16[j], row24[j + 1], row16[j + 1]], lits)
+        if num_days == 1 or guard:
+            # Guard modunda aynı gün tek nöbet kuralı dinlenme grubundan bağımsız kalmalı
+            for j in (range(num_days) if guard else [0]):
+                _at_most_one(model, [row24[j], row16[j]], [])
+
+        # 24h sonrası izin (ertesi gün zaten peş peşe gün yasağında)
+        for j in range(num_days - rest_days_24h):
+            if isinstance(row24[j], int) and not row24[j]:
+                continue
+            block = row24[j + 2:j + rest_days_24h + 1] + row16[j + 2:j + rest_days_24h + 1]
+            _forbid_if(model, block, [row24[j]] + lits)
+
+        # Manuel Kısıtlar (X, 24, 16) yalnızca guard modunda kısıt olarak eklenir
+        if guard:
+            for j in np.flatnonzero(codes[i] != CELL_EMPTY).tolist():
+                c = CELL_CODES[codes[i, j]]
+                if c == "S":
+                    continue
+                cell_lits = sm.guard_literals("manual", f"{d}: {j + 1}. gün '{c}' hücresi", day=j + 1, doctor=d)
+                if c == "24":
+                    model.Add(row24[j] == 1).OnlyEnforceIf(cell_lits)
+                elif c == "16":
+                    model.Add(row16[j] == 1).OnlyEnforceIf(cell_lits)
+                else:
+                    model.AddBoolAnd([row24[j].Not(), row16[j].Not()]).OnlyEnforceIf(cell_lits)
+
+    sm.mark("build.rest")
+
+    # Esnek İzin (S) Cezaları: hücredeki nöbet değişkenleri doğrudan cezalandırılır
+    _add_soft_leave_penalties(sm)
+
+    sm.mark("build.soft_leave")
+
+    # 4. EVLİ ÇİFTLER (ESNEK): uyumsuzluk = |w1 - w2|
+    for (d1, d2) in problem["couples"]:
+        if d1 in sm.index and d2 in sm.index:
+            i1, i2 = sm.index[d1], sm.index[d2]
+            for j in range(num_days):
+                w1 = x24[i1][j] + x16[i1][j]
+                w2 = x24[i2][j] + x16[i2][j]
+                if isinstance(w1, int) and isinstance(w2, int):
+                    sm.add_penalty("couple", abs(w1 - w2), COUPLE_PENALTY)  # iki taraf da sabit
+                    continue
+                mismatch = model.NewBoolVar("")
+                model.Add(mismatch >= w1 - w2)
+                model.Add(mismatch >= w2 - w1)
+                sm.add_penalty("couple", mismatch, COUPLE_PENALTY)
+
+    sm.mark("build.couples")
+
+    # 5. KOTALAR (Soft Constraints): sapma >= |toplam - hedef|
+    for i, d in enumerate(docs):
+        for kind, row, quotas in (("24", x24[i], problem["quotas_24h"]), ("16", x16[i], problem["quotas_16h"])):
+            total = _sum(row)
+            goal = quotas.get(d, 0)
+            diff = model.NewIntVar(0, max(num_days, goal), "")
+            sm.quota_cts[kind, i] = (diff, model.AddLinearConstraint(diff - total, -goal, cp_model.INT_MAX),
+                                     model.AddLinearConstraint(diff + total, goal, cp_model.INT_MAX))
+            sm.add_penalty("quota", diff, QUOTA_PENALTY)
+
+    sm.mark("build.quotas")
+
+    # 6. HOMOJEN DAĞILIM (Haftalık Denge): en yoğun ve en boş hafta farkı
+    weeks = [(0, 7), (7, 14), (14, 21), (21, num_days)]
+    for i in range(len(docs)):
+        week_loads = [_sum(x24[i][a:b] + x16[i][a:b]) for a, b in weeks]
+        wmax = model.NewIntVar(0, 7, "")
+        wmin = model.NewIntVar(0, 7, "")
+        for load in week_loads:
+            model.Add(wmax >= load)
+            model.Add(wmin <= load)
+        sm.add_penalty("weekly", wmax, WEEKLY_PENALTY)
+        sm.add_penalty("weekly", wmin, -WEEKLY_PENALTY)
+
+    sm.mark("build.weekly")
+
+    # 7. KIDEM DENGESİ
+    if seniors and mids:
+        for j in range(num_days):
+            cnt_s = _sum([x24[i][j] for i in seniors])
+            cnt_m = _sum([x24[i][j] for i in mids])
+            d1 = model.NewIntVar(0, max(len(seniors), len(mids)), "")
+            model.Add(d1 >= cnt_s - cnt_m)
+            model.Add(d1 >= cnt_m - cnt_s)
+            sm.add_penalty("seniority", d1, SENIORITY_PENALTY)
+
+    sm.mark("build.seniority")
+
+    # 8. SİMETRİ KIRMA (birbirinin yerine geçebilen doktorlar)
+    # Guard modunda doktor bazlı varsayımlar, minimum değişiklik modunda ipucu
+    # cezaları doktorları birbirinden ayırdığı için simetri yoktur. Yeniden
+    # kullanılabilir modelde gruplar her manuel hücre düzenlemesiyle değişebilir;
+    # bir güncellemeden sonra geçersiz kalacak sıralama kısıtı eklenmez.
+    if not guard and not change_weight and not reusable and frozen is None:
+        sm.symmetry_classes = interchangeable_classes(problem)
+        if hint:
+            sm.symmetry_classes = order_by_hint(sm.symmetry_classes, hint)
+        add_symmetry_breaking(sm, sm.symmetry_classes)
+
+    sm.mark("build.symmetry")
+
+    # 9. ÖNCEKİ ÇİZELGE (WARM START / MİNİMUM DEĞİŞİKLİK)
+    if hint:
+        add_schedule_hint(sm, hint, change_weight)
+
+    sm.mark("build.hint")
+
+    # HEDEF FONKSİYON
+    model.Minimize(sm.objective_expr())
+    if sm.assumptions:
+        model.AddAssumptions([lit for lit, _ in sm.assumptions])
+    sm.mark("build.objective")
+    return sm
+
+
+def structure_key(problem):
+    """Yeniden kullanılabilir modelin yapısını belirleyen girdiler.
+
+    Bunlardan biri değişirse (doktor listesi, ay, kıdemler, çiftler, dinlenme
+    süresi) model yeniden kurulmalıdır; manuel hücreler, ihtiyaçlar ve kotalar
+    ``update_model`` ile yerinde güncellenir.
+    """
+    return (problem["year"], problem["month"], tuple(problem["doctors"]), problem["rest_days_24h"],
+            tuple(problem["seniority"].get(d) for d in problem["doctors"]), tuple(map(tuple, problem["couples"])))
+
+
+def _add_soft_leave_penalties(sm):
+    sm.terms["soft_leave"] = []
+    for i, j in np.argwhere(sm.soft).tolist():
+        for x in (sm.x24[i][j], sm.x16[i][j]):
+            if not isinstance(x, int) or x:  # onarımda nöbete sabitlenmiş S hücresi sabit ceza
+                sm.add_penalty("soft_leave", x, S_PENALTY)
+
+
+def _set_domain(field, lo, hi):
+    # Yerinde değişiklik yalnızca model proto'su üzerinden güvenli: Constraint.Proto()
+    # sarmalayıcısı çöp toplamada çökebiliyor
+    field.clear()
+    field.extend([lo, hi])
+
+
+def _set_cell_bounds(sm, cells, codes):
+    """Verilen (i, j) hücrelerindeki x24/x16 sınırlarını manuel koda göre ayarlar."""
+    variables = sm.model.Proto().variables
+    for i, j in cells.tolist():
+        code = codes[i, j]
+        lo24, hi24 = (1, 1) if code == CELL_24 else (0, 0) if code in (CELL_X, CELL_16) else (0, 1)
+        lo16, hi16 = (1, 1) if code == CELL_16 else (0, 0) if code in (CELL_X, CELL_24) else (0, 1)
+        _set_domain(variables[sm.x24[i][j].Index()].domain, lo24, hi24)
+        _set_domain(variables[sm.x16[i][j].Index()].domain, lo16, hi16)
+
+
+def update_model(sm, problem, hint=None):
+    """``build_model(..., reusable=True)`` modelini yeni girdilere yerinde uyarlar.
+
+    Yalnızca değişen manuel hücrelerin değişken sınırları, değişen günlerin
+    ihtiyaç kısıtları ve değişen kotaların sapma kısıtları güncellenir; S
+    cezaları, ipucu ve hedef fonksiyon yeniden yazılır. Yapısal bir fark
+    varsa (bkz. ``structure_key``) hiçbir şey değiştirmeden False döner.
+    """
+    if not sm.reusable or structure_key(problem) != sm.structure:
+        return False
+    sm.timings, sm._last_mark = {}, time.perf_counter()
+    model, proto = sm.model, sm.model.Proto()
+
+    codes = problem["manual_constraints"].codes
+    _set_cell_bounds(sm, np.argwhere(codes != sm.codes), codes)
+
+    for kind in ("24", "16"):
+        old_needs, needs = sm.problem[f"daily_needs_{kind}h"], problem[f"daily_needs_{kind}h"]
+        for j, t in enumerate(sm.days):
+            if needs.get(t, 1) != old_needs.get(t, 1):
+                _set_domain(proto.constraints[sm.need_cts[kind, j].Index()].linear.domain, needs[t], needs[t])
+
+        old_quotas, quotas = sm.problem[f"quotas_{kind}h"], problem[f"quotas_{kind}h"]
+        for i, d in enumerate(sm.docs):
+            goal = quotas.get(d, 0)
+            if goal != old_quotas.get(d, 0):
+                diff, lo, hi = sm.quota_cts[kind, i]
+                _set_domain(proto.variables[diff.Index()].domain, 0, max(sm.num_days, goal))
+                _set_domain(proto.constraints[lo.Index()].linear.domain, -goal, cp_model.INT_MAX)
+                _set_domain(proto.constraints[hi.Index()].linear.domain, goal, cp_model.INT_MAX)
+
+    sm.problem, sm.codes, sm.soft = problem, codes.copy(), codes == CELL_S
+    _add_soft_leave_penalties(sm)
+    model.ClearHints()
+    if hint:
+        add_schedule_hint(sm, hint)
+    model.Minimize(sm.objective_expr())
+    sm.mark("build.update")
+    return True
+
+
+def reuse_or_build(problem, hint=None, change_weight=0, previous=None):
+    """``previous`` yerinde güncellenebiliyorsa onu, değilse yeni bir model döndürür.
+
+    İlk çözüm normal modelle (sıkı kodlama ve simetri kırma) kurulur. Aynı
+    yapıdaki bir problem yeniden çözülmek istendiğinde (küçük düzenlemeler)
+    yeniden kullanılabilir model kurulur; sonraki düzenlemeler ona yerinde
+    uygulanır. Minimum değişiklik modu (``change_weight``) ipucuna bağlı yeni
+    değişkenler eklediğinden her seferinde normal modelle kurulur.
+    """
+    if change_weight:
+        return build_model(problem, hint, change_weight)
+    if previous is not None and update_model(previous, problem, hint):
+        return previous
+    if previous is not None and previous.structure == structure_key(problem):
+        return build_model(problem, hint, reusable=True)
+    return build_model(problem, hint)
+
+
+class ModelCache:
+    """Anahtar (ör. servis/yıl/ay) başına son kurulan model (bkz. ``reuse_or_build``).
+
+    CP-SAT modeli çözülürken değiştirilemeyeceğinden her anahtarın bir kilidi
+    vardır: ``checkout`` bloğu boyunca model yalnızca o işe aittir; önceki
+    çözüm iptal edilmişse onun bitmesi beklenir.
+    """
+
+    def __init__(self):
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self, key, problem, hint=None, change_weight=0):
+        with self._lock:
+            slot = self._slots.setdefault(key, {"lock": threading.Lock(), "model": None})
+        with slot["lock"]:
+            sm = reuse_or_build(problem, hint, change_weight, slot["model"])
+            if not change_weight:
+                slot["model"] = sm
+            yield sm
+
+
+def interchangeable_classes(problem):
+    """Modelde birbirinden ayırt edilemeyen doktor grupları (en az 2 kişilik).
+
+    Aynı kıdem ve 24h/16h kotasına sahip, hiç manuel hücresi olmayan ve bir
+    çiftte yer almayan doktorlar her kısıt ve cezada aynı şekilde geçer;
+    çizelgelerinin yer değiştirmesi aynı amaç değerini verir.
+    """
+    in_couples = {d for pair in problem["couples"] for d in pair}
+    grid = problem["manual_constraints"]
+    with_cells = {grid.doctors[i] for i in np.flatnonzero(grid.codes.any(axis=1)).tolist()}
+    groups = {}
+    for d in problem["doctors"]:
+        if d in in_couples or d in with_cells:
+            continue
+        key = (problem["seniority"].get(d), problem["quotas_24h"].get(d, 0), problem["quotas_16h"].get(d, 0))
+        groups.setdefault(key, []).append(d)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def _first_day_code(sm, d):
+    """Doktorun ilk gün durumunu tek tamsayıda kodlayan ifade (boş 0, 24h 1, 16h 2)."""
+    i = sm.index[d]
+    return sm.x24[i][0] + 2 * sm.x16[i][0]
+
+
+def _first_day_rank(row):
+    return {"24": 1, "16": 2}.get(row[0] if row else "", 0)
+
+
+def add_symmetry_breaking(sm, classes):
+    """Her grupta doktorları ilk gün durumuna göre sıralı olmaya zorlar.
+
+    Grup içinde önce gelen doktorun ilk gün kodu (boş < 24h < 16h) daha
+    büyük ya da eşit olmalıdır. Her çizelgenin grup içi bir permütasyonu bu
+    sırayı sağladığından optimum kaybolmaz.
+
+    Gün gün tam lex ve toplam yük sıralaması da denendi; CP-SAT presolve'u bu
+    simetrileri zaten kullandığından ikisi de ispat süresini 2-4 kat uzattı.
+    Tek günlük sıralama presolve'un işine karışmadan kopyaların bir kısmını eler.
+    """
+    for group in classes:
+        keys = [_first_day_code(sm, d) for d in group]
+        for ka, kb in zip(keys, keys[1:]):
+            sm.model.Add(ka >= kb)
+
+
+def order_by_hint(classes, hint):
+    """Her grubu ipucundaki ilk gün durumuna göre simetri kırma sırasına dizer.
+
+    Grup içi doktorlar birbirinin yerine geçebildiğinden sıralama kısıtının
+    hangi sırayla ekleneceği serbesttir; ipucunu sağlayan sırayı seçmek
+    satırları doktorlar arasında taşımadan ipucunu kısıtlarla uyumlu kılar.
+    """
+    ordered = []
+    for group in classes:
+        if all(d in hint for d in group):
+            group = sorted(group, key=lambda d: _first_day_rank(hint[d]), reverse=True)
+        ordered.append(group)
+    return ordered
+
+
+def _at_most_one(model, literals, enforce):
+    """Sabitleri ayıklayarak "en fazla bir" kısıtı ekler."""
+    ones = sum(1 for x in literals if isinstance(x, int) and x)
+    free = [x for x in literals if not isinstance(x, int)]
+    if ones > 1:
+        model.AddBoolOr([]).OnlyEnforceIf(enforce)
+    elif ones == 1:
+        if free:
+            model.AddBoolAnd([x.Not() for x in free]).OnlyEnforceIf(enforce)
+    elif len(free) > 1:
+        if enforce:
+            model.Add(sum(free) <= 1).OnlyEnforceIf(enforce)
+        else:
+            model.AddAtMostOne(free)
+
+
+def _forbid_if(model, literals, enforce):
+    """``enforce`` literallerinin hepsi doğruysa ``literals`` hepsi 0 olmalı."""
+    enforce = [x for x in enforce if not isinstance(x, int)]
+    if any(isinstance(x, int) and x for x in literals):
+        if enforce:
+            model.AddBoolOr([x.Not() for x in enforce])
+        else:
+            model.AddBoolOr([])
+        return
+    free = [x.Not() for x in literals if not isinstance(x, int)]
+    if free:
+        model.AddBoolAnd(free).OnlyEnforceIf(enforce)
+
+
+def add_schedule_hint(sm, schedule, change_weight=0):
+    """Önceki çizelgeyi CP-SAT'a ipucu olarak verir.
+
+    Yeni problemde artık olmayan doktorlar/günler atlanır. ``change_weight`` > 0
+    ise değişen hücre sayısı ``change`` ceza bileşenine eklenir.
+    """
+    changed = []
+    for d, codes in schedule.items():
+        i = sm.index.get(d)
+        if i is None:
+            continue
+        row24, row16 = sm.x24[i], sm.x16[i]
+        for j, code in enumerate(codes[:sm.num_days]):
+            for x, val in ((row24[j], code == "24"), (row16[j], code == "16")):
+                if not isinstance(x, int):
+                    sm.model.AddHint(x, val)
+            if code == "24":
+                changed.append(1 - row24[j])
+            elif code == "16":
+                changed.append(1 - row16[j])
+            else:
+                changed.append(row24[j] + row16[j])
+
+    if change_weight and changed:
+        n_changes = sm.model.NewIntVar(0, len(changed), 'changes')
+        sm.model.Add(n_changes == _sum(changed))
+        sm.add_penalty("change", n_changes, change_weight)
+
+
+def count_changes(old_schedule, new_schedule):
+    """İki çizelge arasında farklı olan (doktor, gün) hücre sayısı."""
+    n = 0
+    for d, codes in new_schedule.items():
+        old = old_schedule.get(d, [""] * len(codes))
+        n += sum(1 for a, b in zip(old, codes) if a != b)
+    return n
+
+
+def repair_problem(problem, schedule, first, last, today=None):
+    """Ay ortası onarım: ``first``..``last`` penceresi dışındaki hücreleri dondurur.
+
+    ``schedule`` ayın mevcut çizelgesidir (doktor -> gün kodları). Pencere
+    dışındaki günlerde ve ``today``'den önceki (çalışılmış) günlerde her
+    doktorun nöbeti olduğu gibi sabitlenir. Pencere dışında olup yeni
+    girdilerle artık uyuşmayan gelecek günler (yeni X/24/16 hücresi, değişen
+    ihtiyaç) pencereye katılır. Geçmiş günler değiştirilemeyeceği için orada
+    manuel hücreler yok sayılır ve ihtiyaç çizelgedeki sayıya eşitlenir.
+
+    ``(problem kopyası, dondurulmuş kod matrisi, serbest günler)`` döndürür;
+    matris ``build_model(..., frozen=...)`` içindir. Çizelgede olmayan
+    doktorlar pencere dışında boş sayılır.
+    """
+    num_days = get_num_days(problem)
+    today = max(int(today or 1), 1)
+    old = np.zeros((len(problem["doctors"]), num_days), dtype=np.int8)
+    for i, d in enumerate(problem["doctors"]):
+        row = [CELL_CODES.index(c) if c in ("24", "16") else CELL_EMPTY for c in schedule.get(d, [])[:num_days]]
+        old[i, :len(row)] = row
+    work = np.where(old == CELL_EMPTY, CELL_X, old).astype(np.int8)
+
+    days = np.arange(1, num_days + 1)
+    past = days < today
+    window = (days >= max(first, today)) & (days <= last)
+
+    # Pencere dışında yeni girdilerle çelişen gelecek günler de yeniden planlanır
+    codes = problem["manual_constraints"].codes
+    clash = ((codes == CELL_X) & (old != CELL_EMPTY)) | ((codes == CELL_24) & (old != CELL_24)) \
+        | ((codes == CELL_16) & (old != CELL_16))
+    count24, count16 = (old == CELL_24).sum(axis=0), (old == CELL_16).sum(axis=0)
+    needs24 = np.array([problem["daily_needs_24h"].get(t, 1) for t in days.tolist()])
+    needs16 = np.array([problem["daily_needs_16h"].get(t, 1) for t in days.tolist()])
+    window |= ~past & (clash.any(axis=0) | (count24 != needs24) | (count16 != needs16))
+
+    frozen = np.where(window, CELL_EMPTY, work).astype(np.int8)
+    problem = dict(problem)
+    for kind, counts in (("24", count24), ("16", count16)):
+        needs = dict(problem[f"daily_needs_{kind}h"])
+        needs.update({t: int(counts[t - 1]) for t in days[past].tolist()})
+        problem[f"daily_needs_{kind}h"] = needs
+    return problem, frozen, days[window].tolist()
+
+
+# -----------------------------------------------------------------------------
+# 3. ÇÖZÜM VE SONUÇLARI İŞLEME
+# -----------------------------------------------------------------------------
+def make_solver(time_limit=DEFAULT_TIME_LIMIT, num_workers=0):
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(time_limit)
+    if num_workers:
+        solver.parameters.num_search_workers = int(num_workers)
+    return solver
+
+
+def decode_solution(sm, solution):
+    """Çözümü uygulamadaki tablolara dönüştürür.
+
+    ``solution`` değişken indeksine göre sıralı çözüm vektörüdür
+    (``response_proto.solution``). Önce tek seferde doktor × gün matrisine
+    çevrilir; listeler, sayımlar, kota sapmaları ve S ihlalleri bu matris
+    üzerinde dizi işlemleriyle çıkarılır.
+    """
+    problem = sm.problem
+    docs = np.array(sm.docs, dtype=object)
+    matrix = sm.schedule_matrix(solution)
+    is24, is16 = matrix == CELL_24, matrix == CELL_16
+    labels = np.array(["", "", "", "24h", "16h"], dtype=object)[matrix]
+    day_labels = [day_label(problem["year"], problem["month"], t) for t in sm.days]
+
+    schedule = dict(zip(sm.docs, np.array(CELL_CODES, dtype=object)[matrix].tolist()))
+    res_grid = [dict({"Tarih": t_str}, **dict(zip(sm.docs, col))) for t_str, col in zip(day_labels, labels.T.tolist())]
+    res_list = [{
+        "Tarih": t_str,
+        "🔴 24 Saat Ekibi": ", ".join(docs[is24[:, j]]),
+        "🟢 16 Saat Ekibi": ", ".join(docs[is16[:, j]]),
+    } for j, t_str in enumerate(day_labels)]
+
+    # Esnek izin ihlalleri (gün sırasıyla)
+    warnings = [f"⚠️ {sm.docs[i]}: {j + 1}. gün esnek izin (S) istemişti ama {labels[i, j]} nöbet yazıldı."
+                for j, i in np.argwhere((sm.soft & (matrix != CELL_EMPTY)).T).tolist()]
+
+    got24, got16 = is24.sum(axis=1).tolist(), is16.sum(axis=1).tolist()
+    goal24 = [problem["quotas_24h"].get(d, 0) for d in sm.docs]
+    goal16 = [problem["quotas_16h"].get(d, 0) for d in sm.docs]
+    stat_rows = [{
+        "Doktor": d,
+        "Kıdem": problem["seniority"].get(d),
+        "24h (Hedef/Gerçek)": f"{h24} / {g24}",
+        "16h (Hedef/Gerçek)": f"{h16} / {g16}",
+        "Sapma Durumu": "✅ Tam" if g24 == h24 else f"⚠️ {g24 - h24:+d}",
+    } for d, h24, g24, h16, g16 in zip(sm.docs, goal24, got24, goal16, got16)]
+
+    return {
+        "schedule": schedule,
+        "res_list": res_list,
+        "res_grid": res_grid,
+        "stat_rows": stat_rows,
+        "warnings": warnings,
+        "components": sm.component_values(solution),
+    }
+
+
+class ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Her yeni çözümde amaç, en iyi sınır ve geçen süreyi paylaşılan sözlüğe yazar.
+
+    Son çözümün değişken değerleri de saklanır; böylece arama durdurulduğunda
+    (ya da başka bir thread'den) o ana kadarki en iyi çizelge çözülebilir.
+    """
+
+    def __init__(self, sm, progress=None, lock=None, stop=None):
+        super().__init__()
+        self.sm = sm
+        self.progress = progress if progress is not None else {}
+        self.lock = lock or threading.Lock()
+        self.stop = stop or {}
+        self.stop_reason = None
+        self.last_improvement = time.monotonic()
+        self.progress.setdefault("solutions", 0)
+
+    def OnSolutionCallback(self):
+        values = list(self.response_proto.solution)
+        with self.lock:
+            if not self.progress["solutions"]:
+                self.progress["first_solution_time"] = self.WallTime()
+            self.progress["objective"] = self.ObjectiveValue()
+            self.progress["best_bound"] = self.BestObjectiveBound()
+            self.progress["elapsed"] = self.WallTime()
+            self.progress["solutions"] += 1
+            self.progress["values"] = values
+        self.last_improvement = time.monotonic()
+
+        if self.stop.get("hard_zero") and not any(self.sm.component_values(values, HARD_COMPONENTS).values()):
+            self.request_stop("hard_zero")
+        if self.stop_reason is not None:
+            # Durma isteği arama başlamadan gelmiş olabilir (StopSearch kaybolur); ilk çözümde durulur
+            self.StopSearch()
+
+    def request_stop(self, reason):
+        """Durma nedenini kaydeder (ilk neden geçerlidir)."""
+        if self.stop_reason is None:
+            self.stop_reason = reason
+
+    def best_solution(self):
+        """Son bulunan çözümü decode eder (henüz çözüm yoksa None)."""
+        with self.lock:
+            values = self.progress.get("values")
+        if values is None:
+            return None
+        return decode_solution(self.sm, values)
+
+
+class _PresolveClock:
+    """CP-SAT günlüğünden presolve süresini ("Starting search at ...s") yakalar."""
+
+    _pattern = re.compile(r"Starting search at ([0-9.]+)s")
+
+    def __init__(self, solver):
+        self.seconds = None
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = self
+
+    def __call__(self, line):
+        if self.seconds is None:
+            m = self._pattern.search(line)
+            if m:
+                self.seconds = float(m.group(1))
+
+
+def solver_stats(sm, solver, feasible, presolve_time=None):
+    """Model boyutu ve CP-SAT arama istatistikleri."""
+    proto = sm.model.Proto()
+    stats = {
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "conflicts": solver.NumConflicts(),
+        "branches": solver.NumBranches(),
+        "presolve_time": presolve_time,
+        "best_bound": None,
+        "gap": None,
+    }
+    if feasible:
+        stats["best_bound"] = solver.BestObjectiveBound()
+        stats["gap"] = relative_gap(solver.ObjectiveValue(), stats["best_bound"])
+    return stats
+
+
+def relative_gap(objective, bound):
+    """CP-SAT'ın tanımıyla göreli boşluk: |amaç - sınır| / max(1, |amaç|)."""
+    return abs(objective - bound) / max(1.0, abs(objective))
+
+
+def _watch_stall(solver, callback, stall_seconds, done):
+    """Son iyileşmeden bu yana ``stall_seconds`` geçtiyse aramayı durdurur."""
+    while not done.wait(0.1):
+        if callback.progress["solutions"] and time.monotonic() - callback.last_improvement >= stall_seconds:
+            callback.request_stop("stall")
+            solver.StopSearch()
+            return
+
+
+def solve_model(sm, time_limit=DEFAULT_TIME_LIMIT, num_workers=0, solver=None, callback=None, stop=None,
+                collect_presolve=False):
+    """Kurulmuş modeli çözer; sonuç sözlüğü döndürür.
+
+    ``stop`` erken durdurma ölçütleridir (hepsi isteğe bağlı):
+        gap            -- göreli boşluk bu değerin altına inince dur (ör. 0.02)
+        stall_seconds  -- bu kadar saniye iyileşme olmazsa dur
+        hard_zero      -- S ihlali ve kota sapması cezaları sıfırlanınca dur
+
+    ``collect_presolve`` açıksa presolve süresi CP-SAT günlüğünden okunur;
+    günlüğün her satırı Python'a geri çağrı yaptığından yalnızca istatistik
+    toplanırken açılmalıdır (kapalıyken ``presolve_time`` None kalır).
+    """
+    if solver is None:
+        solver = make_solver(time_limit, num_workers)
+    stop = stop or {}
+    if stop.get("gap"):
+        solver.parameters.relative_gap_limit = float(stop["gap"])
+    if callback is None and (stop.get("stall_seconds") or stop.get("hard_zero")):
+        callback = ProgressCallback(sm)
+    if callback is not None and stop:
+        callback.stop = stop
+
+    presolve = _PresolveClock(solver) if collect_presolve else None
+    watchdog_done = threading.Event()
+    if stop.get("stall_seconds"):
+        threading.Thread(target=_watch_stall, args=(solver, callback, float(stop["stall_seconds"]), watchdog_done),
+                         daemon=True).start()
+    t0 = time.perf_counter()
+    try:
+        if callback is not None:
+            status = solver.Solve(sm.model, callback)
+        else:
+            status = solver.Solve(sm.model)
+    finally:
+        watchdog_done.set()
+    timings = dict(sm.timings, solve=time.perf_counter() - t0)
+
+    result = {
+        "year": sm.problem["year"],
+        "month": sm.problem["month"],
+        "status": solver.StatusName(status),
+        "feasible": status in [cp_model.OPTIMAL, cp_model.FEASIBLE],
+        "wall_time": solver.WallTime(),
+    }
+    if result["feasible"]:
+        result["objective"] = solver.ObjectiveValue()
+        result["best_bound"] = solver.BestObjectiveBound()
+        result["gap"] = relative_gap(result["objective"], result["best_bound"])
+        t0 = time.perf_counter()
+        result.update(decode_solution(sm, solver.response_proto.solution))
+        timings["decode"] = time.perf_counter() - t0
+    result["timings"] = timings
+    result["solver_stats"] = solver_stats(sm, solver, result["feasible"], presolve and presolve.seconds)
+
+    if callback is not None and callback.stop_reason:
+        result["stop_reason"] = callback.stop_reason
+    elif status == cp_model.OPTIMAL:
+        result["stop_reason"] = "optimal" if result["gap"] == 0 else "gap"
+    elif status == cp_model.INFEASIBLE:
+        result["stop_reason"] = "infeasible"
+    else:
+        result["stop_reason"] = "time_limit"
+    return result
+
+
+def solve_problem(problem, time_limit=DEFAULT_TIME_LIMIT, num_workers=0, stop=None):
+    """Ham problem verisini normalize edip kurar ve çözer."""
+    problem = normalize_problem(problem)
+    return solve_model(build_model(problem), time_limit, num_workers, stop=stop)
+
+
+def solve_repair(problem, schedule, first, last, today=None, time_limit=REPAIR_TIME_LIMIT, num_workers=0):
+    """Mevcut çizelgeyi yalnızca ``first``..``last`` penceresinde (bkz. ``repair_problem``) yeniden planlar.
+
+    Pencere dışı sabit olduğundan model küçüktür ve birkaç saniyede çözülür;
+    değişen her hücre ``REPAIR_CHANGE_PENALTY`` ile cezalandırılır. Sonuca
+    ``repair`` alanı (serbest bırakılan günler, değişen hücre sayısı) eklenir.
+    """
+    problem, frozen, days = repair_problem(normalize_problem(problem), schedule, first, last, today)
+    sm = build_model(problem, schedule, REPAIR_CHANGE_PENALTY, frozen=frozen)
+    result = solve_model(sm, time_limit, num_workers)
+    if result["feasible"]:
+        result["repair"] = {"days": days, "changes": count_changes(schedule, result["schedule"])}
+    return result
+
+
+# -----------------------------------------------------------------------------
+# 4. PERFORMANS KAYDI
+# -----------------------------------------------------------------------------
+def log_run_stats(path, result, **extra):
+    """Sonucun aşama süreleri ve çözücü istatistiklerini JSON-lines dosyasına ekler.
+
+    ``extra`` alanları (ör. kaynak dosya, önbellekten gelip gelmediği) satıra
+    olduğu gibi eklenir.
+    """
+    row = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "year": result.get("year"),
+        "month": result.get("month"),
+        "status": result.get("status"),
+        "stop_reason": result.get("stop_reason"),
+        "objective": result.get("objective"),
+        "timings": result.get("timings", {}),
+        "solver_stats": result.get("solver_stats", {}),
+    }
+    row.update(extra)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
@@ -0,0 +1,382 @@
+"""Excel giriş/çıkış yardımcıları (Streamlit'ten bağımsız)."""
+import calendar
+import csv
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from engine import KIDEM_SEVIYELERI
+from manual_grid import MANUEL_KODLAR, ManualGrid
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# -----------------------------------------------------------------------------
+# EXCEL VERİ YÜKLEME (MATRİS YAPISI)
+# -----------------------------------------------------------------------------
+class ExcelImportError(ValueError):
+    """Zorunlu sayfa veya sütun eksik; ``issues`` hata raporudur."""
+
+    def __init__(self, issues):
+        self.issues = issues
+        super().__init__("; ".join(format_issue(i) for i in issues))
+
+
+def _issue(sheet, message, row=None, column=None, value=None):
+    """Rapor satırı; ``row`` Excel satır numarasıdır (başlık = 1)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    return {"sheet": sheet, "row": row, "column": column, "value": value, "message": message}
+
+
+def format_issue(issue):
+    """Rapor satırını "Sayfa satır 5, 'Sütun': mesaj" biçiminde metne çevirir."""
+    where = issue["sheet"]
+    if issue["row"] is not None:
+        where += f" satır {issue['row']}"
+    if issue["column"] is not None:
+        where += f", '{issue['column']}'"
+    value = f" (değer: {issue['value']!r})" if issue["value"] is not None else ""
+    return f"{where}: {issue['message']}{value}"
+
+
+def _flag(issues, sheet, mask, column, message, values=None):
+    """``mask`` ile işaretli satırları rapora ekler (satır no = konum + 2, başlık 1. satır)."""
+    for pos in np.flatnonzero(np.asarray(mask, dtype=bool)).tolist():
+        value = None if values is None else values.iloc[pos]
+        issues.append(_issue(sheet, message, pos + 2, column, value))
+
+
+def _int_column(df, sheet, column, default, issues):
+    """Sütunu negatif olmayan tamsayıya çevirir; boşlar ``default``, geçersizler raporlanıp ``default`` olur."""
+    if column not in df:
+        return pd.Series(default, index=df.index, dtype=int)
+    raw = df[column]
+    num = pd.to_numeric(raw, errors="coerce")
+    bad = raw.notna() & (num.isna() | (num != num.round()) | (num < 0))
+    _flag(issues, sheet, bad, column, f"Negatif olmayan bir tamsayı olmalı; {default} kabul edildi.", raw)
+    return num.where(~bad & num.notna(), default).astype(int)
+
+
+def _require(sheets, sheet, columns):
+    """Sayfa ve zorunlu sütunlar var mı? Yoksa ``ExcelImportError``."""
+    if sheet not in sheets:
+        raise ExcelImportError([_issue(sheet, "Sayfa bulunamadı.")])
+    missing = [c for c in columns if c not in sheets[sheet].columns]
+    if missing:
+        raise ExcelImportError([_issue(sheet, "Zorunlu sütun eksik.", 1, c) for c in missing])
+    return sheets[sheet]
+
+
+def _read_personel(df, issues):
+    sheet = "Personel"
+    names = df["İsim"].astype("string").str.strip()
+    empty = names.isna() | (names == "")
+    _flag(issues, sheet, empty, "İsim", "İsim boş; satır atlandı.")
+    dup = names.duplicated() & ~empty
+    _flag(issues, sheet, dup, "İsim", "Aynı isim daha önce geçiyor; satır atlandı.", names)
+
+    seniority = df["Kıdem"].astype("string").str.strip() if "Kıdem" in df else pd.Series(pd.NA, index=df.index)
+    bad_sen = seniority.notna() & ~seniority.isin(KIDEM_SEVIYELERI)
+    _flag(issues, sheet, bad_sen, "Kıdem", f"Kıdem {'/'.join(KIDEM_SEVIYELERI)} olmalı; Orta kabul edildi.", seniority)
+    seniority = seniority.where(seniority.notna() & ~bad_sen, "Orta")
+
+    q24 = _int_column(df, sheet, "24h Kotası", 0, issues)
+    q16 = _int_column(df, sheet, "16h Kotası", 0, issues)
+
+    keep = (~empty & ~dup).to_numpy()
+    doctors = names[keep].tolist()
+    return (doctors,
+            dict(zip(doctors, q24[keep].tolist())),
+            dict(zip(doctors, q16[keep].tolist())),
+            dict(zip(doctors, seniority[keep].tolist())))
+
+
+def _read_needs(df, issues):
+    sheet = "Günlük İhtiyaçlar"
+    raw = df["Gün"]
+    day = pd.to_numeric(raw, errors="coerce")
+    bad = day.isna() | (day != day.round()) | (day < 1) | (day > 31)
+    _flag(issues, sheet, bad & raw.notna(), "Gün", "Gün 1-31 arasında bir tamsayı olmalı; satır atlandı.", raw)
+    dup = day.duplicated() & ~bad
+    _flag(issues, sheet, dup, "Gün", "Bu gün daha önce tanımlanmış; satır atlandı.", raw)
+
+    n24 = _int_column(df, sheet, "24h Sayısı", 1, issues)
+    n16 = _int_column(df, sheet, "16h Sayısı", 1, issues)
+    keep = (~bad & ~dup).to_numpy()
+    days = day[keep].astype(int).tolist()
+    return dict(zip(days, n24[keep].tolist())), dict(zip(days, n16[keep].tolist()))
+
+
+def _read_leaves(df, doctors, issues):
+    sheet = "İzinler"
+    day_cols = []
+    for col in df.columns:
+        if col == "Doktor":
+            continue
+        try:
+            t = int(col)
+        except (TypeError, ValueError):
+            t = None
+        if t is None or not 1 <= t <= 31:
+            issues.append(_issue(sheet, "Sütun başlığı 1-31 arasında bir gün olmalı; sütun atlandı.", 1, str(col)))
+        else:
+            day_cols.append(col)
+
+    # Doktor adı boş satırlar atlanır; rapor satır numaraları sayfadaki konuma göre kalır
+    named = df["Doktor"].map(lambda d: not pd.isna(d) and str(d).strip() != "").to_numpy()
+    rows = np.flatnonzero(named) + 2
+    df = df[named]
+    grid = ManualGrid.from_frame(df[["Doktor"] + day_cols])
+    cells = df[day_cols]
+    text = cells.astype("string").apply(lambda c: c.str.strip())
+    filled = (cells.notna() & (text != "")).to_numpy()
+    codes = grid.codes[:, [int(c) - 1 for c in day_cols]] if day_cols else np.zeros(filled.shape, dtype=np.int8)
+    for i, j in np.argwhere(filled & (codes == 0)).tolist():
+        issues.append(_issue(sheet, f"Geçersiz kod; {'/'.join(MANUEL_KODLAR)} veya boş olmalı. Hücre yok sayıldı.",
+                             int(rows[i]), str(day_cols[j]), cells.iat[i, j]))
+
+    unknown = ~pd.Series(grid.doctors).isin(doctors) & grid.codes.any(axis=1)
+    for i in np.flatnonzero(unknown.to_numpy()).tolist():
+        issues.append(_issue(sheet, "Personel sayfasında olmayan doktor; satır yok sayıldı.",
+                             int(rows[i]), "Doktor", grid.doctors[i]))
+    return grid
+
+
+def read_problem_excel(source):
+    """Excel dosyasından problem verilerini okur.
+
+    Çalışma kitabı bir kez açılır (``pd.ExcelFile``, openpyxl salt-okunur
+    modu); sayfalar toplu okunur ve sütunlar vektörel doğrulanır.
+
+    ``(veri, rapor)`` döndürür; rapor geçersiz hücre/satır/sütunlar için
+    ``sheet``, ``row`` (Excel satır numarası), ``column``, ``value``,
+    ``message`` alanlı sözlüklerdir (metne çevirmek için ``format_issue``).
+    Personel / Günlük İhtiyaçlar sayfası veya zorunlu sütunları yoksa
+    ``ExcelImportError``; İzinler sayfası yoksa yalnızca rapora eklenir.
+    """
+    issues = []
+    with pd.ExcelFile(source) as xls:
+        sheets = {name: xls.parse(name) for name in ("Personel", "Günlük İhtiyaçlar", "İzinler")
+                  if name in xls.sheet_names}
+
+    # 1. Personel Sayfası
+    doctors_list, quotas_24h, quotas_16h, seniority = _read_personel(_require(sheets, "Personel", ["İsim"]), issues)
+
+    # 2. Günlük İhtiyaçlar Sayfası
+    daily_needs_24h, daily_needs_16h = _read_needs(_require(sheets, "Günlük İhtiyaçlar", ["Gün"]), issues)
+
+    # 3. İzinler Sayfası (MATRİS YAPISI)
+    manual_constraints = ManualGrid(doctors_list, 0)
+    try:
+        manual_constraints = _read_leaves(_require(sheets, "İzinler", ["Doktor"]), doctors_list, issues)
+    except ExcelImportError as e:
+        issues.extend(e.issues)
+
+    data = {
+        "doctors": doctors_list,
+        "quotas_24h": quotas_24h,
+        "quotas_16h": quotas_16h,
+        "seniority": seniority,
+        "daily_needs_24h": daily_needs_24h,
+        "daily_needs_16h": daily_needs_16h,
+        "manual_constraints": manual_constraints
+    }
+    return data, issues
+
+
+# -----------------------------------------------------------------------------
+# EXCEL ŞABLONU
+# -----------------------------------------------------------------------------
+def write_template(target, data):
+    """Personel, Günlük İhtiyaçlar ve İzinler (matris) sayfalı giriş şablonunu yazar.
+
+    ``data`` ``read_problem_excel`` çıktısıyla aynı alanları (ve ``year`` /
+    ``month``) taşır; ``manual_constraints`` bir ``ManualGrid`` olmalıdır.
+    """
+    doctors = data["doctors"]
+    num_days = calendar.monthrange(data["year"], data["month"])[1]
+
+    with pd.ExcelWriter(target, engine='xlsxwriter') as writer:
+        # 1. Personel Sayfası
+        pd.DataFrame({
+            "İsim": doctors,
+            "Kıdem": [data["seniority"].get(d, "Orta") for d in doctors],
+            "24h Kotası": [data["quotas_24h"].get(d, 8) for d in doctors],
+            "16h Kotası": [data["quotas_16h"].get(d, 0) for d in doctors]
+        }).to_excel(writer, sheet_name="Personel", index=False)
+
+        # 2. Günlük İhtiyaçlar Sayfası
+        pd.DataFrame({
+            "Gün": list(range(1, num_days + 1)),
+            "24h Sayısı": [data["daily_needs_24h"].get(t, 1) for t in range(1, num_days + 1)],
+            "16h Sayısı": [data["daily_needs_16h"].get(t, 1) for t in range(1, num_days + 1)]
+        }).to_excel(writer, sheet_name="Günlük İhtiyaçlar", index=False)
+
+        # 3. İzinler Sayfası (MATRİS YAPISI)
+        data["manual_constraints"].to_frame().to_excel(writer, sheet_name="İzinler", index=False)
+
+        # Formatlama
+        header_fmt = writer.book.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1})
+        for ws in writer.sheets.values():
+            ws.set_row(0, None, header_fmt)
+        writer.sheets['İzinler'].set_column('A:A', 15)
+        writer.sheets['İzinler'].set_column('B:AF', 4)
+
+
+def template_bytes(data):
+    """``write_template`` çıktısını bellekte üretir."""
+    buf = io.BytesIO()
+    write_template(buf, data)
+    return buf.getvalue()
+
+
+# -----------------------------------------------------------------------------
+# EXCEL RAPORU (AKIŞ / SABİT BELLEK)
+# -----------------------------------------------------------------------------
+# Rapor sayfaları: (sayfa adı, sonuç alanı); CSV/Parquet dosya son ekleri sayfa adının küçük harflisidir
+REPORT_SHEETS = [("Liste", "res_list"), ("Cizelge", "res_grid"), ("Istatistik", "stat_rows"), ("Uyarilar", "warnings")]
+TABLE_FORMATS = ["csv", "parquet"]
+# Parquet dosyalarına bu kadar satırlık gruplar halinde yazılır
+PARQUET_BATCH_ROWS = 10_000
+
+
+def report_sections(res_list, res_grid, stat_rows, warnings=None):
+    """Tek bir sonucun rapor sayfaları: ``(sayfa, sütunlar, satır yineleyicisi)`` listesi."""
+    sections = [
+        ("Liste", list(res_list[0]) if res_list else ["Tarih"], res_list),
+        ("Cizelge", list(res_grid[0]) if res_grid else ["Tarih"], res_grid),
+        ("Istatistik", list(stat_rows[0]) if stat_rows else ["Doktor"], stat_rows),
+    ]
+    if warnings:
+        sections.append(("Uyarilar", ["Uyarılar"], ({"Uyarılar": w} for w in warnings)))
+    return sections
+
+
+def combined_sections(load_results):
+    """Birden çok sonucu (aylar, servisler) tek rapora akış halinde birleştirir.
+
+    ``load_results`` her çağrıda ``(etiket, sonuç)`` çiftlerini baştan üreten
+    bir fonksiyondur (ör. JSON dosyalarını tek tek okuyan bir üreteç); her
+    sayfa için yeniden çağrılır, böylece bellekte aynı anda tek sonuç durur.
+    Doktor kümesi sonuçtan sonuca değiştiğinden çizelge uzun biçimde
+    (Kaynak, Tarih, Doktor, Nöbet; yalnızca dolu hücreler) yazılır.
+    """
+    def rows(field):
+        for label, result in load_results():
+            for row in result.get(field) or []:
+                yield dict({"Kaynak": label}, **row)
+
+    def grid_rows():
+        for label, result in load_results():
+            for row in result.get("res_grid") or []:
+                for doctor, shift in row.items():
+                    if doctor != "Tarih" and shift:
+                        yield {"Kaynak": label, "Tarih": row["Tarih"], "Doktor": doctor, "Nöbet": shift}
+
+    def warning_rows():
+        for label, result in load_results():
+            for w in result.get("warnings") or []:
+                yield {"Kaynak": label, "Uyarılar": w}
+
+    return [
+        ("Liste", ["Kaynak", "Tarih", "🔴 24 Saat Ekibi", "🟢 16 Saat Ekibi"], rows("res_list")),
+        ("Cizelge", ["Kaynak", "Tarih", "Doktor", "Nöbet"], grid_rows()),
+        ("Istatistik", ["Kaynak", "Doktor", "Kıdem", "24h (Hedef/Gerçek)", "16h (Hedef/Gerçek)", "Sapma Durumu"],
+         rows("stat_rows")),
+        ("Uyarilar", ["Kaynak", "Uyarılar"], warning_rows()),
+    ]
+
+
+def write_report_stream(target, sections):
+    """Rapor sayfalarını xlsxwriter ``constant_memory`` kipinde satır satır yazar.
+
+    Her satır yazıldıktan sonra diske aktarıldığından bellek kullanımı satır
+    sayısından bağımsızdır; ``sections`` içindeki satırlar üreteç olabilir.
+    Çizelge sayfasındaki 24h/16h hücreleri koşullu biçimle renklendirilir.
+    """
+    wb = xlsxwriter.Workbook(target, {"constant_memory": True})
+    header_fmt = wb.add_format({'bold': True, 'border': 1})
+    fmt_red = wb.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'})
+    fmt_grn = wb.add_format({'bg_color': '#C6EFCE', 'font_color': '#006100'})
+    try:
+        for sheet, columns, rows in sections:
+            ws = wb.add_worksheet(sheet)
+            ws.write_row(0, 0, columns, header_fmt)
+            r = 0
+            for r, row in enumerate(rows, start=1):
+                ws.write_row(r, 0, [row.get(c) for c in columns])
+            if sheet == "Cizelge" and r:
+                # Excel Renklendirme
+                first_col = columns.index("Tarih") + 1
+                for value, fmt in (("24h", fmt_red), ("16h", fmt_grn)):
+                    ws.conditional_format(1, first_col, r, len(columns) - 1,
+                                          {'type': 'text', 'criteria': 'containing', 'value': value, 'format': fmt})
+    finally:
+        wb.close()
+
+
+def write_report_tables(base_path, sections, fmt="csv"):
+    """Rapor sayfalarını ``<base_path>_<sayfa>.csv`` / ``.parquet`` dosyalarına akış halinde yazar.
+
+    Parquet için pyarrow gerekir; satırlar ``PARQUET_BATCH_ROWS``'luk
+    gruplar halinde yazılır, tüm değerler metin sütunu olarak saklanır.
+    Yazılan dosya yollarının listesini döndürür.
+    """
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Bilinmeyen tablo biçimi: {fmt}")
+    base_path = Path(base_path)
+    paths = []
+    for sheet, columns, rows in sections:
+        path = base_path.with_name(f"{base_path.name}_{sheet.lower()}.{fmt}")
+        if fmt == "csv":
+            # utf-8-sig: Excel Türkçe karakterleri doğru açsın
+            with open(path, "w", encoding="utf-8-sig", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            _write_parquet(path, columns, rows)
+        paths.append(path)
+    return paths
+
+
+def _write_parquet(path, columns, rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet çıktısı için pyarrow kurulu olmalı (pip install pyarrow).") from e
+    schema = pa.schema([(c, pa.string()) for c in columns])
+
+    def batch_table(batch):
+        return pa.Table.from_pydict({c: [None if row.get(c) is None else str(row.get(c)) for row in batch]
+                                     for c in columns}, schema=schema)
+
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(batch_table(batch))
+                batch = []
+        if batch:
+            writer.write_table(batch_table(batch))
+
+
+def write_report(target, res_list, res_grid, stat_rows, warnings=None):
+    """Liste, Çizelge, İstatistik (ve varsa Uyarılar) sayfalı raporu yazar.
+
+    ``target`` dosya yolu veya yazılabilir bir dosya nesnesi olabilir.
+    """
+    write_report_stream(target, report_sections(res_list, res_grid, stat_rows, warnings))
+
+
+def report_bytes(result):
+    """Çözüm sonucundan indirilebilir Excel raporu üretir."""
+    buf = io.BytesIO()
+    write_report(buf, result["res_list"], result["res_grid"], result["stat_rows"], result.get("warnings"))
+    return buf.getvalue()
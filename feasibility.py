@@ -0,0 +1,243 @@
+"""Model kurulmadan önce çalışan hızlı uygulanabilirlik ön kontrolü.
+
+Tüm kontroller doktor × gün üzerinde doğrusal zamanda çalışır ve
+``engine.build_model``'daki katı kuralların birebir gerekli koşullarıdır;
+yani burada "error" çıkan bir ay CP-SAT'a verilse de kesin çözümsüz olur.
+
+Ön kontrolü geçip CP-SAT'ta yine de çözümsüz çıkan aylar için
+``explain_infeasibility`` varsayım literalleriyle çelişen en küçük kural
+kümesini bulur.
+
+Her bulgu şu alanları içeren bir sözlüktür:
+    level   -- "error" (kesin çözümsüz) veya "warning" (çözülebilir ama sorunlu)
+    message -- kullanıcıya gösterilecek metin
+    days    -- ilgili günler
+    doctors -- ilgili doktorlar
+"""
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+import engine
+
+DEFAULT_EXPLAIN_TIME_LIMIT = 30
+
+
+def _issue(level, message, days=(), doctors=()):
+    return {"level": level, "message": message, "days": list(days), "doctors": list(doctors)}
+
+
+def _cells(problem):
+    """Doktor başına gün -> manuel kod sözlüğü (yalnızca dolu hücreler)."""
+    grid = problem["manual_constraints"]
+    cells = {d: {} for d in problem["doctors"]}
+    for i, j in np.argwhere(grid.codes != engine.CELL_EMPTY).tolist():
+        cells[grid.doctors[i]][j + 1] = engine.CELL_CODES[grid.codes[i, j]]
+    return cells
+
+
+def _rest_block(t, code, num_days, rest_days):
+    """``t`` gününde ``code`` nöbeti tutan doktorun çalışamayacağı sonraki günler.
+
+    Modeldeki kuralları birebir izler: peş peşe gün yasağı her nöbet için,
+    24h sonrası izin bloğu yalnızca ay içinde tam sığan bloklar için geçerlidir.
+    """
+    blocked = {t + 1} if t < num_days else set()
+    if code == "24" and t <= num_days - rest_days:
+        blocked.update(range(t + 1, t + rest_days + 1))
+    return blocked
+
+
+def check_fixed_conflicts(problem, cells):
+    """Aynı doktorun sabit 24/16 hücreleri peş peşe gün / dinlenme kuralıyla çakışıyor mu?"""
+    num_days = engine.get_num_days(problem)
+    issues = []
+    for d, row in cells.items():
+        fixed = {t: c for t, c in row.items() if c in ("24", "16")}
+        for t, c in sorted(fixed.items()):
+            for u in sorted(_rest_block(t, c, num_days, problem["rest_days_24h"])):
+                if u in fixed:
+                    rule = "24s sonrası izin" if u > t + 1 else "peş peşe gün yasağı"
+                    issues.append(_issue(
+                        "error",
+                        f"{d}: {t}. gün sabit {c}h ve {u}. gün sabit {fixed[u]}h nöbet {rule} kuralıyla çakışıyor.",
+                        [t, u], [d]))
+    return issues
+
+
+def _blocked_days(problem, cells):
+    """Doktor başına çalışamayacağı günler: X hücreleri + sabit nöbetlerin komşuları."""
+    num_days = engine.get_num_days(problem)
+    blocked = {}
+    for d, row in cells.items():
+        b = {t for t, c in row.items() if c == "X"}
+        for t, c in row.items():
+            if c in ("24", "16"):
+                b.update(_rest_block(t, c, num_days, problem["rest_days_24h"]))
+                if t > 1:
+                    b.add(t - 1)  # önceki gün de peş peşe gün yasağına girer
+        blocked[d] = b - {t for t, c in row.items() if c in ("24", "16")}
+    return blocked
+
+
+def check_daily_capacity(problem, cells, blocked):
+    """Gün bazında müsait doktor sayısı ve sabit nöbetler ihtiyacı karşılıyor mu?"""
+    num_days = engine.get_num_days(problem)
+    docs = problem["doctors"]
+    needs24, needs16 = problem["daily_needs_24h"], problem["daily_needs_16h"]
+    issues = []
+
+    for t in range(1, num_days + 1):
+        need = needs24.get(t, 1) + needs16.get(t, 1)
+        avail = [d for d in docs if t not in blocked[d]]
+        if len(avail) < need:
+            out = [d for d in docs if t in blocked[d]]
+            detail = f" (izinli/bloklu: {', '.join(out)})" if out else ""
+            issues.append(_issue(
+                "error",
+                f"{t}. gün: ihtiyaç {need} kişi ({needs24.get(t, 1)}×24h + {needs16.get(t, 1)}×16h) "
+                f"ama yalnızca {len(avail)} doktor müsait{detail}.",
+                [t], out))
+
+        for code, needs in (("24", needs24), ("16", needs16)):
+            fixed = [d for d in docs if cells[d].get(t) == code]
+            if len(fixed) > needs.get(t, 1):
+                issues.append(_issue(
+                    "error",
+                    f"{t}. gün: {len(fixed)} doktora sabit {code}h yazılmış ama ihtiyaç {needs.get(t, 1)}.",
+                    [t], fixed))
+    return issues
+
+
+def check_rest_capacity(problem, blocked):
+    """Peş peşe gün ve 24s sonrası izin kurallarının ima ettiği pencere kapasiteleri.
+
+    * Ardışık iki günde bir doktor en fazla bir nöbet tutabilir.
+    * ``rest_days_24h + 1`` günlük bir pencerede bir doktor en fazla bir 24h tutabilir.
+    """
+    num_days = engine.get_num_days(problem)
+    docs = problem["doctors"]
+    rest = problem["rest_days_24h"]
+    needs24, needs16 = problem["daily_needs_24h"], problem["daily_needs_16h"]
+    issues = []
+
+    for t in range(1, num_days):
+        need = sum(needs24.get(u, 1) + needs16.get(u, 1) for u in (t, t + 1))
+        avail = sum(1 for d in docs if t not in blocked[d] or t + 1 not in blocked[d])
+        if need > avail:
+            issues.append(_issue(
+                "error",
+                f"{t}.–{t + 1}. günler: toplam {need} nöbet var ama peş peşe gün yasağıyla "
+                f"en fazla {avail} doktor çalışabilir.",
+                [t, t + 1]))
+
+    # Ay sonuna yakın pencerelerde 24h izin bloğu tam sığmadığından kural gevşer;
+    # yalnızca pencerenin içindeki tüm olası 24h'lerin bloğu ay içinde kalan pencereler
+    last_start = min(num_days - rest, num_days - 2 * rest + 2)
+    for t in range(1, last_start + 1):
+        window = range(t, t + rest + 1)
+        need = sum(needs24.get(u, 1) for u in window)
+        avail = sum(1 for d in docs if any(u not in blocked[d] for u in window))
+        if need > avail:
+            issues.append(_issue(
+                "error",
+                f"{t}.–{t + rest}. günler: {need} adet 24h nöbet var ama {rest} gün dinlenme kuralıyla "
+                f"bu pencerede en fazla {avail} doktor 24h tutabilir.",
+                list(window)))
+    return issues
+
+
+def check_quota_totals(problem):
+    """Toplam kota ile toplam ihtiyaç uyumlu mu? (Kotalar esnek olduğundan yalnızca uyarı.)"""
+    issues = []
+    docs = problem["doctors"]
+    for code, needs, quotas in (("24", problem["daily_needs_24h"], problem["quotas_24h"]),
+                                ("16", problem["daily_needs_16h"], problem["quotas_16h"])):
+        tot_req = sum(needs.values())
+        tot_quota = sum(quotas.get(d, 0) for d in docs)
+        if tot_req != tot_quota:
+            issues.append(_issue(
+                "warning",
+                f"{code}h: toplam ihtiyaç {tot_req}, toplam kota {tot_quota} "
+                f"(fark {tot_quota - tot_req:+d}); kota sapması kaçınılmaz."))
+    return issues
+
+
+def check_feasibility(problem):
+    """Tüm ön kontrolleri çalıştırır; bulguları (önce hatalar) döndürür."""
+    problem = engine.normalize_problem(problem)
+    if not problem["doctors"]:
+        return [_issue("error", "Personel listesi boş.")]
+
+    cells = _cells(problem)
+    blocked = _blocked_days(problem, cells)
+    issues = []
+    issues += check_fixed_conflicts(problem, cells)
+    issues += check_daily_capacity(problem, cells, blocked)
+    issues += check_rest_capacity(problem, blocked)
+    issues += check_quota_totals(problem)
+    return sorted(issues, key=lambda i: i["level"] != "error")
+
+
+def has_errors(issues):
+    return any(i["level"] == "error" for i in issues)
+
+
+# -----------------------------------------------------------------------------
+# ÇELİŞKİ ÇEKİRDEĞİ (VARSAYIM LİTERALLERİ)
+# -----------------------------------------------------------------------------
+def _infeasible_core(sm, lits, time_limit, num_workers):
+    """Yalnızca ``lits`` varsayılarak çözer.
+
+    ``(durum, literal_indeksleri)`` döndürür; indeksler yalnızca çözümsüzse
+    doludur. Süre dolduysa durum ``UNKNOWN`` olur ve sonuç bilinmez.
+    """
+    sm.model.ClearAssumptions()
+    sm.model.AddAssumptions(lits)
+    solver = engine.make_solver(time_limit, num_workers)
+    status = solver.Solve(sm.model)
+    if status != cp_model.INFEASIBLE:
+        return status, None
+    return status, set(solver.SufficientAssumptionsForInfeasibility())
+
+
+def explain_infeasibility(problem, time_limit=DEFAULT_EXPLAIN_TIME_LIMIT, num_workers=0):
+    """Birbiriyle çelişen katı kural gruplarını bulur.
+
+    Her gün ihtiyacı, her manuel X/24/16 hücresi ve her doktorun dinlenme
+    kuralları bir varsayım literaliyle korunur. CP-SAT'ın döndürdüğü yeterli
+    küme, grupları tek tek çıkarıp yeniden çözerek (süre yettiği sürece)
+    en küçük hale getirilir.
+
+    ``(çekirdek, minimal_mi)`` döndürür; çekirdek ``guard_literals``
+    açıklamalarının listesidir. Model çözümsüz değilse (veya süre içinde
+    kanıtlanamadıysa) ``(None, False)``.
+    """
+    problem = engine.normalize_problem(problem)
+    sm = engine.build_model(problem, guard=True)
+    sm.model.ClearObjective()  # Yalnızca uygulanabilirlik aranıyor
+    info = {lit.Index(): desc for lit, desc in sm.assumptions}
+    deadline = time.monotonic() + time_limit
+
+    _, found = _infeasible_core(sm, [lit for lit, _ in sm.assumptions], time_limit, num_workers)
+    if found is None:
+        return None, False
+    core = [lit for lit, _ in sm.assumptions if lit.Index() in found]
+
+    # Silme tabanlı küçültme: bir grup çıkarılınca hâlâ çözümsüzse o grup gereksizdir
+    i, minimal = 0, True
+    while i < len(core):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            minimal = False
+            break
+        trial = core[:i] + core[i + 1:]
+        status, sub = _infeasible_core(sm, trial, remaining, num_workers)
+        if sub is not None:
+            core = [lit for lit in trial if lit.Index() in sub]
+        else:
+            if status == cp_model.UNKNOWN:
+                minimal = False  # Grubun gerekli olduğu kanıtlanamadı; yine de çekirdekte tutulur
+            i += 1
+    return [info[lit.Index()] for lit in core], minimal
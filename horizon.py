@@ -0,0 +1,168 @@
+"""Çok aylı (kayan ufuk) planlama.
+
+Depodaki ardışık aylar sırayla çözülür; her ayın son günlerindeki nöbetler
+bir sonraki aya sınır kısıtı olarak taşınır (``engine.apply_carry_in``):
+31'inde nöbet tutan doktor 1'inde yazılmaz, 24 saat sonrası izin ay başına
+da uygulanır. Her pencere tek bir ay modelidir; çeyrek ya da yıl tek dev
+model kurulmadan planlanır:
+
+    python horizon.py --db nobetinator.db --department Genel --start 2025-01 --months 3
+
+``--parallel`` ile tüm aylar önce aynı anda (thread havuzunda; CP-SAT çözüm
+sırasında GIL'i bırakır) önceki ayı bilmeden çözülür, ardından sınırlar
+sırayla denetlenir: önceki ayın kesinleşen sonuyla çelişmeyen ay olduğu gibi
+kabul edilir, çelişen ayın yalnızca başı onarılır (``engine.solve_repair``);
+onarım yetmezse ay sınırla birlikte baştan çözülür.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import engine
+from manual_grid import CELL_X
+from storage import DEFAULT_DEPARTMENT, MonthStore
+
+# Ayın nasıl kesinleştiği (sonuç satırındaki "mode" -> kullanıcı metni)
+HORIZON_MODES = {
+    "sequential": "sırayla çözüldü",
+    "parallel": "paralel çözüm sınıra uydu",
+    "repair": "ay başı onarıldı",
+    "resolve": "sınırla yeniden çözüldü",
+    "missing": "depoda kayıt yok",
+}
+
+
+def previous_month(year, month):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def horizon_months(year, month, count):
+    """``(yıl, ay)`` ile başlayan ``count`` ardışık ay."""
+    months = []
+    for _ in range(count):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def load_month_problem(store, department, year, month, rest_days_24h):
+    """Depodaki ayın normalize edilmiş problemi; kayıt yoksa None."""
+    data = store.load(department, year, month)
+    if data is None:
+        return None
+    return engine.normalize_problem(dict(data, year=year, month=month, rest_days_24h=rest_days_24h))
+
+
+def violates_leave(problem, schedule):
+    """Çizelge problemin X hücrelerinden birine nöbet yazıyor mu?"""
+    grid = problem["manual_constraints"]
+    for i, d in enumerate(grid.doctors):
+        row = np.array([c in ("24", "16") for c in schedule.get(d, [])[:grid.num_days]], dtype=bool)
+        if (row & (grid.codes[i, :len(row)] == CELL_X)).any():
+            return True
+    return False
+
+
+def _solve(problem, hint, time_limit, num_workers, stop=None):
+    return engine.solve_model(engine.build_model(problem, hint), time_limit, num_workers, stop=stop)
+
+
+def solve_horizon(store, department, year, month, count, rest_days_24h=engine.DEFAULT_REST_DAYS_24H,
+                  time_limit=engine.DEFAULT_TIME_LIMIT, num_workers=0, stop=None, parallel=False,
+                  max_workers=None, save=True, on_month=None):
+    """``(yıl, ay)``'dan başlayan ``count`` ayı sınırları taşıyarak çözer.
+
+    İlk ayın sınırı depodaki bir önceki ayın çizelgesinden alınır. Her ay
+    için ``{"year", "month", "mode", "result", "carried", "conflicts"}``
+    sözlüğü döner; ``carried`` sınırdan kapanan hücre sayısı, ``conflicts``
+    sınırla çakışan elle yazılmış 24/16 hücreleridir. ``save`` açıksa
+    bulunan çizelgeler depoya yazılır (sonraki çözümlerin başlangıç noktası).
+    Depoda kaydı olmayan ay atlanır; zincir o ayın kayıtlı çizelgesiyle sürer.
+    ``on_month(i, satır)`` her ay kesinleştiğinde çağrılır.
+    """
+    months = horizon_months(year, month, count)
+    problems = [load_month_problem(store, department, y, m, rest_days_24h) for y, m in months]
+    hints = [store.load_schedule(department, y, m) for y, m in months]
+    tail = store.load_schedule(department, *previous_month(year, month))
+
+    speculative = [None] * len(months)
+    if parallel:
+        jobs = [k for k, p in enumerate(problems) if p is not None]
+        max_workers = max_workers or min(len(jobs), os.cpu_count() or 1) or 1
+        # İşçi sayısı verilmemişse çekirdekler eşzamanlı aylar arasında paylaştırılır
+        per_job = num_workers or max(1, (os.cpu_count() or 1) // max_workers)
+        first = engine.apply_carry_in(problems[jobs[0]], tail)[0] if jobs else None
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {k: pool.submit(_solve, first if k == jobs[0] else problems[k], hints[k], time_limit, per_job, stop)
+                       for k in jobs}
+            speculative = [futures[k].result() if k in futures else None for k in range(len(months))]
+
+    rows = []
+    for k, ((y, m), problem) in enumerate(zip(months, problems)):
+        row = {"year": y, "month": m, "mode": "missing", "result": None, "carried": 0, "conflicts": []}
+        if problem is None:
+            tail = hints[k]
+        else:
+            bounded, row["conflicts"] = engine.apply_carry_in(problem, tail)
+            row["carried"] = int(engine.carry_in_cells(problem, tail).sum())
+            result = speculative[k]
+            if result is None:
+                row["mode"], result = "sequential", _solve(bounded, hints[k], time_limit, num_workers, stop)
+            elif result["feasible"] and violates_leave(bounded, result["schedule"]):
+                row["mode"] = "repair"
+                result = engine.solve_repair(bounded, result["schedule"], 1, rest_days_24h, num_workers=num_workers)
+                if not result["feasible"]:
+                    row["mode"], result = "resolve", _solve(bounded, hints[k], time_limit, num_workers, stop)
+            else:
+                row["mode"] = "parallel"
+            row["result"] = result
+            if result["feasible"]:
+                tail = result["schedule"]
+                if save:
+                    store.save_schedule(department, y, m, tail)
+            else:
+                tail = hints[k]
+        rows.append(row)
+        if on_month is not None:
+            on_month(k, row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nobetinatör Ai çok aylı planlama (ay sınırları taşınarak)")
+    parser.add_argument("--db", default=os.environ.get("NOBETINATOR_DB", "nobetinator.db"), help="Ay deposu (SQLite)")
+    parser.add_argument("--department", default=DEFAULT_DEPARTMENT, help="Servis")
+    parser.add_argument("--start", required=True, help="İlk ay (YYYY-AA)")
+    parser.add_argument("--months", type=int, default=3, help="Planlanacak ay sayısı")
+    parser.add_argument("--rest-days", type=int, default=engine.DEFAULT_REST_DAYS_24H, help="24s sonrası izin (gün)")
+    parser.add_argument("--time-limit", type=float, default=engine.DEFAULT_TIME_LIMIT, help="Ay başına süre (sn)")
+    parser.add_argument("--workers", type=int, default=0, help="Ay başına CP-SAT işçi sayısı (0 = otomatik)")
+    parser.add_argument("--parallel", action="store_true", help="Ayları aynı anda çöz, sınırları sonra denetle")
+    parser.add_argument("--dry-run", action="store_true", help="Bulunan çizelgeleri depoya yazma")
+    args = parser.parse_args(argv)
+
+    year, month = (int(x) for x in args.start.split("-"))
+    store = MonthStore(args.db)
+
+    def report(k, row):
+        label = f"{row['year']}-{row['month']:02d}"
+        result = row["result"]
+        if result is None:
+            print(f"{label}: {HORIZON_MODES[row['mode']]}")
+            return
+        print(f"{label}: {result['status']} ({HORIZON_MODES[row['mode']]}) amaç={result.get('objective', '-')} "
+              f"süre={result['wall_time']:.2f}s sınırdan kapanan hücre={row['carried']}")
+        for d, t in row["conflicts"]:
+            print(f"  ! {d}: {t}. gün elle yazılmış nöbet önceki ayın dinlenme kuralıyla çakışıyor", file=sys.stderr)
+
+    rows = solve_horizon(store, args.department, year, month, args.months, args.rest_days, args.time_limit,
+                         args.workers, parallel=args.parallel, save=not args.dry_run, on_month=report)
+    store.close()
+    return 0 if all(r["result"] is not None and r["result"]["feasible"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Arka planda (ayrı thread'de) çizelge çözümü.
+
+CP-SAT ``Solve`` sırasında GIL'i bıraktığından çözüm bir worker thread'de
+çalışırken Streamlit sayfası yanıt vermeye devam eder. İlerleme bilgisi
+``ProgressCallback`` üzerinden ``SolveJob.progress`` sözlüğüne yazılır.
+``models`` (``engine.ModelCache``) verilirse aynı ay yeniden çözüldüğünde
+model bir kez yeniden kullanılabilir biçimde kurulur; sonraki küçük
+düzenlemeler ona yerinde uygulanır. ``frozen``
+verilen onarım işleri (bkz. ``engine.repair_problem``) her zaman küçük,
+normal bir modelle çözülür.
+"""
+import threading
+import time
+
+import numpy as np
+
+import engine
+from manual_grid import CELL_EMPTY
+
+# İş durumları
+BEKLIYOR = "bekliyor"
+CALISIYOR = "çalışıyor"
+BITTI = "bitti"
+IPTAL = "iptal"
+HATA = "hata"
+
+
+class SolveJob:
+    """Tek bir çözümü arka planda yürütür; iptal ve erken kabul destekler."""
+
+    def __init__(self, problem, time_limit=engine.DEFAULT_TIME_LIMIT, num_workers=0, stop=None,
+                 hint=None, change_weight=0, cache=None, cache_key=None, models=None, model_key=None,
+                 frozen=None, department=None):
+        self.problem = problem
+        self.department = department  # çözümün ait olduğu servis; sonuç bu servise gösterilir ve kaydedilir
+        self.time_limit = float(time_limit)
+        self.num_workers = num_workers
+        self.stop = stop
+        self.hint = hint
+        self.change_weight = change_weight
+        self.cache = cache
+        self.cache_key = cache_key
+        self.models = models
+        self.model_key = model_key
+        self.frozen = frozen  # onarım modunda dondurulmuş hücreler (doktor × gün kod matrisi)
+        self.from_cache = False
+        self.conflict = None  # çözümsüzse feasibility.explain_infeasibility çıktısı
+        self.stats_logged = False  # performans kaydı (engine.log_run_stats) yazıldı mı
+        self.state = BEKLIYOR
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.lock = threading.Lock()
+        self.progress = {"objective": None, "best_bound": None, "elapsed": 0.0, "solutions": 0}
+        self._solver = None
+        self._callback = None
+        self._cancelled = False
+        self._preview, self._preview_n = None, 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @classmethod
+    def from_result(cls, problem, result, time_limit=engine.DEFAULT_TIME_LIMIT, hint=None, frozen=None, department=None):
+        """Önbellekten gelen hazır sonuç için bitmiş bir iş nesnesi."""
+        job = cls(problem, time_limit, hint=hint, frozen=frozen, department=department)
+        job.result = result
+        job.state = BITTI
+        job.from_cache = True
+        return job
+
+    @property
+    def running(self):
+        return self.state in (BEKLIYOR, CALISIYOR)
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.state = CALISIYOR
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            if self.models is not None and self.frozen is None:
+                with self.models.checkout(self.model_key, self.problem, self.hint, self.change_weight) as sm:
+                    result = self._solve(sm)
+            else:
+                result = self._solve(engine.build_model(self.problem, self.hint, self.change_weight, frozen=self.frozen))
+            if result is None:
+                self.state = IPTAL
+                return
+        except Exception as e:
+            self.error = str(e)
+            self.state = HATA
+            return
+        self.result = result
+        self.state = IPTAL if self._cancelled else BITTI
+        if self.state == BITTI and self.cache is not None and self.cache_key:
+            self.cache.put(self.cache_key, result, self.time_limit)
+
+    def _solve(self, sm):
+        self._solver = engine.make_solver(self.time_limit, self.num_workers)
+        self._callback = engine.ProgressCallback(sm, self.progress, self.lock)
+        if self._cancelled:
+            return None
+        return engine.solve_model(sm, solver=self._solver, callback=self._callback, stop=self.stop)
+
+    def repair_days(self):
+        """Onarım işinde yeniden planlanan günler (normal işte None)."""
+        if self.frozen is None:
+            return None
+        return (np.flatnonzero((self.frozen == CELL_EMPTY).all(axis=0)) + 1).tolist()
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return time.monotonic() - self.started_at
+
+    def snapshot(self):
+        """İlerleme sözlüğünün (çözüm değerleri hariç) thread-safe bir kopyası."""
+        with self.lock:
+            return {k: v for k, v in self.progress.items() if k != "values"}
+
+    def best_so_far(self):
+        """Şimdiye kadar bulunan en iyi çizelge (anytime önizleme).
+
+        Çözüm yalnızca yeni bir iyileşme geldiğinde yeniden decode edilir;
+        arada yapılan yenilemeler önbellekteki tabloyu kullanır.
+        """
+        if self._callback is None:
+            return None
+        n = self.snapshot()["solutions"]
+        if n and n != self._preview_n:
+            self._preview = self._callback.best_solution()
+            self._preview_n = n
+        return self._preview
+
+    def accept(self):
+        """Aramayı durdurur; o ana kadarki en iyi çizelge sonuç olarak kalır."""
+        if self._callback is not None:
+            self._callback.request_stop("user")
+        if self._solver is not None:
+            self._solver.StopSearch()
+
+    def cancel(self):
+        """Aramayı durdurur ve sonucu yok sayar."""
+        self._cancelled = True
+        if self._callback is not None:
+            self._callback.request_stop("user")
+        if self._solver is not None:
+            self._solver.StopSearch()
+
+    def wait(self, timeout=None):
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        return self.result
@@ -0,0 +1,132 @@
+"""Manuel hücrelerin (X / S / 24 / 16) doktor × gün matris gösterimi.
+
+Eski ``"Doktor_Gün" -> kod`` sözlüğü her yeniden çalıştırmada hücre hücre
+taranıyordu ve isminde "_" geçen doktorlarda anahtar ayrıştırması şaşıyordu.
+``ManualGrid`` aynı bilgiyi int8 bir matriste tutar (değer = ``CELL_CODES``
+indeksi); Excel/DataFrame dönüşümleri ve toplu düzenlemeler dizi dilimleriyle
+yapılır. JSON yedekleri için eski sözlük biçimine çevrilebilir.
+"""
+import numpy as np
+import pandas as pd
+
+MANUEL_KODLAR = ["X", "S", "24", "16"]
+# Matris hücre kodları (int8 değer = listedeki indeks)
+CELL_CODES = [""] + MANUEL_KODLAR
+CELL_EMPTY, CELL_X, CELL_S, CELL_24, CELL_16 = range(len(CELL_CODES))
+
+_CODE_LABELS = np.array(CELL_CODES, dtype=object)
+
+
+def parse_codes(values):
+    """Metin/sayı hücre dizisini kod matrisine çevirir; tanınmayan değerler boş sayılır.
+
+    Excel'den gelen ``24.0`` gibi sayılar ve küçük harfler de kabul edilir.
+    """
+    arr = np.asarray(pd.DataFrame(values).fillna("").astype(str), dtype=str)
+    arr = np.char.upper(np.char.strip(arr))
+    arr = np.where(np.char.endswith(arr, ".0"), np.char.replace(arr, ".0", ""), arr)
+    codes = np.zeros(arr.shape, dtype=np.int8)
+    for code, text in enumerate(CELL_CODES[1:], start=1):
+        codes[arr == text] = code
+    return codes
+
+
+class ManualGrid:
+    """Doktor × gün manuel hücre matrisi; satırlar ``doctors`` sırasını izler."""
+
+    def __init__(self, doctors, num_days, codes=None):
+        self.doctors = list(doctors)
+        self.num_days = int(num_days)
+        self.index = {d: i for i, d in enumerate(self.doctors)}
+        shape = (len(self.doctors), self.num_days)
+        self.codes = np.zeros(shape, dtype=np.int8) if codes is None else np.asarray(codes, dtype=np.int8).reshape(shape)
+
+    # -- Dönüşümler ----------------------------------------------------------
+    @classmethod
+    def from_dict(cls, doctors, num_days, cells):
+        """Eski ``"Doktor_Gün" -> kod`` sözlüğünden (JSON yedekleri, eski girdiler)."""
+        grid = cls(doctors, num_days)
+        for key, val in (cells or {}).items():
+            d, _, t = str(key).rpartition("_")
+            i = grid.index.get(d)
+            val = str(val).strip().upper()
+            if i is not None and t.isdigit() and 1 <= int(t) <= grid.num_days and val in MANUEL_KODLAR:
+                grid.codes[i, int(t) - 1] = CELL_CODES.index(val)
+        return grid
+
+    def to_dict(self):
+        """JSON'a yazılabilir ``"Doktor_Gün" -> kod`` sözlüğü (yalnızca dolu hücreler)."""
+        return {f"{self.doctors[i]}_{j + 1}": CELL_CODES[self.codes[i, j]]
+                for i, j in np.argwhere(self.codes != CELL_EMPTY).tolist()}
+
+    @classmethod
+    def from_frame(cls, frame, num_days=None, doctor_col="Doktor"):
+        """``Doktor`` sütunu + gün numarası sütunlarından oluşan tablodan toplu okur.
+
+        ``num_days`` verilmezse en büyük gün sütunu kullanılır; ay dışı veya
+        sayı olmayan sütunlar yok sayılır; doktor adı boş satırlar atlanır.
+        """
+        names = frame[doctor_col].map(lambda d: "" if pd.isna(d) else str(d).strip())
+        named = (names != "").to_numpy()
+        frame = frame[named]
+        doctors = names[named].tolist()
+        day_cols = {}
+        for col in frame.columns:
+            try:
+                day_cols[int(col)] = col
+            except (TypeError, ValueError):
+                continue
+        if num_days is None:
+            num_days = max(day_cols, default=0)
+        grid = cls(doctors, num_days)
+        days = sorted(t for t in day_cols if 1 <= t <= num_days)
+        if days and doctors:
+            grid.codes[:, np.array(days) - 1] = parse_codes(frame[[day_cols[t] for t in days]].to_numpy())
+        return grid
+
+    def to_frame(self, doctor_col="Doktor"):
+        """Veri düzenleyici / Excel için ``Doktor`` + "1".."n" sütunlu tablo."""
+        frame = pd.DataFrame(_CODE_LABELS[self.codes].reshape(len(self.doctors), self.num_days),
+                             columns=[str(t) for t in range(1, self.num_days + 1)])
+        frame.insert(0, doctor_col, self.doctors)
+        return frame
+
+    def reindex(self, doctors, num_days=None):
+        """Yeni doktor listesi / ay uzunluğuyla hizalanmış kopya (ortak hücreler korunur)."""
+        num_days = self.num_days if num_days is None else num_days
+        grid = ManualGrid(doctors, num_days)
+        keep = min(num_days, self.num_days)
+        rows = [(i, self.index[d]) for i, d in enumerate(grid.doctors) if d in self.index]
+        if rows and keep:
+            new_rows, old_rows = np.array(rows).T
+            grid.codes[new_rows, :keep] = self.codes[old_rows, :keep]
+        return grid
+
+    def copy(self):
+        return ManualGrid(self.doctors, self.num_days, self.codes.copy())
+
+    # -- Erişim / düzenleme ------------------------------------------------------
+    def get(self, doctor, day):
+        i = self.index.get(doctor)
+        if i is None or not 1 <= day <= self.num_days:
+            return ""
+        return CELL_CODES[self.codes[i, day - 1]]
+
+    def set(self, doctor, days, code):
+        """``doctor`` satırında verilen günlerin hepsine ``code`` yazar ("" = temizle)."""
+        days = np.asarray(list(days), dtype=int)
+        self.codes[self.index[doctor], days - 1] = CELL_CODES.index(code)
+
+    def row(self, doctor):
+        return self.codes[self.index[doctor]]
+
+    def count(self):
+        """Dolu hücre sayısı."""
+        return int(np.count_nonzero(self.codes))
+
+    def __eq__(self, other):
+        return (isinstance(other, ManualGrid) and self.doctors == other.doctors
+                and self.num_days == other.num_days and np.array_equal(self.codes, other.codes))
+
+    def __repr__(self):
+        return f"ManualGrid({len(self.doctors)} doktor × {self.num_days} gün, {self.count()} dolu hücre)"
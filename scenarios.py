@@ -0,0 +1,138 @@
+"""Paralel "ya şöyle olsaydı" senaryo karşılaştırması.
+
+Temel bir problem ve parametre değişikliklerinden oluşan senaryo listesi
+alınır; her senaryo ayrı bir süreçte (``batch.solve_batch``) sınırlı sayıda
+CP-SAT işçisiyle çözülür ve ceza bileşenleri yan yana tablolanır:
+
+    python scenarios.py ay.json senaryolar.json -o karsilastirma.csv
+
+Senaryo sözlüğü (hepsi isteğe bağlı):
+    name                      -- tablodaki ad
+    rest_days_24h, couples    -- değerin yerine geçer
+    daily_needs_24h/16h, quotas_24h/16h, seniority
+                              -- temel sözlüğün üzerine yazılır (yalnızca verilen anahtarlar)
+    manual_constraints        -- ``"Doktor_Gün" -> kod`` hücreleri; "" hücreyi temizler
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+import engine
+from batch import solve_batch
+from manual_grid import CELL_CODES, CELL_EMPTY, MANUEL_KODLAR
+
+MERGED_FIELDS = ["daily_needs_24h", "daily_needs_16h", "quotas_24h", "quotas_16h", "seniority"]
+REPLACED_FIELDS = ["rest_days_24h", "couples"]
+
+# Tablo sütunu -> (ceza bileşeni, birim ağırlık): ağırlıklı ceza birim sayıya çevrilir
+COMPARISON_COLUMNS = {
+    "S İhlali": ("soft_leave", engine.S_PENALTY),
+    "Kota Sapması": ("quota", engine.QUOTA_PENALTY),
+    "Çift Uyumsuzluğu": ("couple", engine.COUPLE_PENALTY),
+    "Haftalık Fark": ("weekly", engine.WEEKLY_PENALTY),
+    "Kıdem Dengesizliği": ("seniority", engine.SENIORITY_PENALTY),
+}
+
+
+def apply_overrides(problem, overrides):
+    """Normalize edilmiş ``problem``'in senaryo değişiklikleri uygulanmış kopyası."""
+    unknown = set(overrides) - set(MERGED_FIELDS) - set(REPLACED_FIELDS) - {"name", "manual_constraints"}
+    if unknown:
+        raise ValueError(f"Bilinmeyen senaryo alanı: {', '.join(sorted(unknown))}")
+    data = dict(problem)
+    for field in MERGED_FIELDS:
+        if field in overrides:
+            day_keyed = field.startswith("daily_needs")  # JSON'dan gelen "5" gibi anahtarlar güne çevrilir
+            data[field] = {**problem[field], **{int(k) if day_keyed else k: v for k, v in overrides[field].items()}}
+    for field in REPLACED_FIELDS:
+        if field in overrides:
+            data[field] = overrides[field]
+    if "manual_constraints" in overrides:
+        grid = problem["manual_constraints"].copy()
+        for key, code in overrides["manual_constraints"].items():
+            d, _, t = str(key).rpartition("_")
+            code = str(code).strip().upper()
+            if d in grid.index and t.isdigit() and 1 <= int(t) <= grid.num_days and code in [""] + MANUEL_KODLAR:
+                grid.codes[grid.index[d], int(t) - 1] = CELL_CODES.index(code) if code else CELL_EMPTY
+        data["manual_constraints"] = grid
+    return engine.normalize_problem(data)
+
+
+def summarize(name, result):
+    """Karşılaştırma tablosu için sonucun küçük özeti."""
+    summary = {key: result.get(key) for key in ("status", "feasible", "objective", "gap", "wall_time", "stop_reason")}
+    summary.update(name=name, components=result.get("components"), timings=result.get("timings", {}))
+    return summary
+
+
+def run_scenarios(base, scenarios, time_limit=engine.DEFAULT_TIME_LIMIT, num_workers=1, max_workers=None,
+                  stop=None, on_result=None):
+    """Senaryoları süreç havuzunda eşzamanlı çözer; senaryo sırasıyla özet listesi döndürür.
+
+    İlk satır değişiklik yapılmamış temel problemdir. ``num_workers`` her
+    çözümün CP-SAT işçi sayısıdır; ``max_workers`` verilmezse çekirdekler bu
+    sayıya bölünerek havuz boyu bulunur. ``on_result(satır)`` her senaryo
+    bittiğinde (bitiş sırasıyla) çağrılır.
+    """
+    base = engine.normalize_problem(base)
+    named = [("Temel", base)] + [(s.get("name") or f"Senaryo {k}", apply_overrides(base, s))
+                                 for k, s in enumerate(scenarios, start=1)]
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 1) // max(num_workers, 1))
+    max_workers = min(max_workers, len(named))
+
+    rows = [None] * len(named)
+    for k, result in solve_batch(list(enumerate(problem for _, problem in named)), time_limit,
+                                 cpu_budget=max_workers * num_workers, num_workers=num_workers, stop=stop,
+                                 precheck=False):
+        rows[k] = summarize(named[k][0], result)
+        if on_result is not None:
+            on_result(rows[k])
+    return rows
+
+
+def comparison_table(rows):
+    """Senaryo özetlerinden karşılaştırma tablosu (birim cinsinden ceza bileşenleri ve süreler)."""
+    table = []
+    for row in rows:
+        line = {"Senaryo": row["name"], "Durum": row["status"], "Amaç": row["objective"]}
+        components = row["components"] or {}
+        for column, (component, weight) in COMPARISON_COLUMNS.items():
+            value = components.get(component)
+            line[column] = None if value is None else value // weight
+        line["Çözüm (sn)"] = round(row["wall_time"], 2)
+        line["Model (sn)"] = round(sum(v for k, v in row["timings"].items() if k.startswith("build.")), 3)
+        table.append(line)
+    return pd.DataFrame(table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nobetinatör Ai senaryo karşılaştırması")
+    parser.add_argument("problem", help="Temel problem (JSON)")
+    parser.add_argument("scenarios", help="Senaryo listesi (JSON)")
+    parser.add_argument("-o", "--output", default=None, help="Karşılaştırma tablosunun yazılacağı CSV dosyası")
+    parser.add_argument("--time-limit", type=float, default=engine.DEFAULT_TIME_LIMIT, help="Senaryo başına süre (sn)")
+    parser.add_argument("--workers", type=int, default=1, help="Senaryo başına CP-SAT işçi sayısı")
+    parser.add_argument("--processes", type=int, default=None, help="Eşzamanlı senaryo sayısı (varsayılan: çekirdek / işçi)")
+    args = parser.parse_args(argv)
+
+    with open(args.problem, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.scenarios, encoding="utf-8") as f:
+        scenarios = json.load(f)
+
+    rows = run_scenarios(base, scenarios, args.time_limit, args.workers, args.processes,
+                         on_result=lambda r: print(f"{r['name']}: {r['status']} amaç={r['objective']} "
+                                                   f"süre={r['wall_time']:.2f}s", file=sys.stderr))
+    table = comparison_table(rows)
+    print(table.to_string(index=False))
+    if args.output:
+        table.to_csv(args.output, index=False)
+    return 0 if all(r["feasible"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
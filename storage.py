@@ -0,0 +1,254 @@
+"""Ay verilerinin kalıcı deposu (SQLite, servis / yıl / ay anahtarlı).
+
+Her ayın girdileri (personel, kotalar, ihtiyaçlar, manuel hücreler, çiftler)
+ve o ay için bulunan son çizelge tek bir veritabanı dosyasında tutulur;
+sunucu yeniden başlasa da veriler kaybolmaz ve yalnızca görüntülenen ay
+okunur. Bağlantı WAL kipinde açılır: Streamlit oturumları (``st.cache_resource``
+ile paylaşılan tek nesne) ve aynı dosyayı kullanan başka süreçler (ör. CLI)
+birbirini kilitlemeden okuyup yazabilir. Her kayıt tek bir işlemdir.
+
+Yedekler (``MonthStore.snapshot``) tüm ayları ve çizelgeleri gzip'li tek bir
+JSON belgesinde taşır. Fark yedekleri yalnızca bir önceki yedekten beri
+değişen kayıtları (ve silinenleri) içerir; ``MonthStore.restore`` tam yedek
+ve ardından gelen fark yedeklerini sırayla tek işlemde uygular.
+"""
+import calendar
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from manual_grid import ManualGrid
+
+DEFAULT_DEPARTMENT = "Genel"
+# Başka bir bağlantı yazarken beklenecek en uzun süre (sn)
+BUSY_TIMEOUT = 10.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS months (
+    department TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (department, year, month)
+);
+CREATE TABLE IF NOT EXISTS schedules (
+    department TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    schedule TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (department, year, month)
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id TEXT PRIMARY KEY,
+    base TEXT,
+    created_at REAL NOT NULL,
+    manifest TEXT NOT NULL
+);
+"""
+
+SNAPSHOT_FORMAT = "nobetinator-yedek"
+SNAPSHOT_VERSION = 1
+# Yedeklenen tablolar ve veri sütunları
+SNAPSHOT_TABLES = {"months": "data", "schedules": "schedule"}
+
+# Ay kaydındaki sözlük alanları ve gün anahtarlı olanlar (JSON'da metne dönen anahtarlar geri çevrilir)
+MONTH_FIELDS = ["doctors", "daily_needs_24h", "daily_needs_16h", "quotas_24h", "quotas_16h", "seniority",
+                "manual_constraints", "couples"]
+_DAY_KEYED = ("daily_needs_24h", "daily_needs_16h")
+
+
+def encode_month(data):
+    """Ay verisini JSON'a yazılabilir sözlüğe çevirir (``ManualGrid`` -> ``"Doktor_Gün"`` sözlüğü)."""
+    out = {k: data[k] for k in MONTH_FIELDS if k in data}
+    grid = out.get("manual_constraints")
+    if isinstance(grid, ManualGrid):
+        out["manual_constraints"] = grid.to_dict()
+    return out
+
+
+def decode_month(payload, year, month):
+    """``encode_month`` çıktısını uygulamanın kullandığı biçime geri çevirir."""
+    data = dict(payload)
+    for field in _DAY_KEYED:
+        data[field] = {int(t): v for t, v in data.get(field, {}).items()}
+    doctors = data.get("doctors", [])
+    data["manual_constraints"] = ManualGrid.from_dict(doctors, calendar.monthrange(year, month)[1],
+                                                      data.get("manual_constraints"))
+    data["couples"] = [list(p) for p in data.get("couples", [])]
+    return data
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class SnapshotError(ValueError):
+    """Yedek dosyası okunamadı veya fark yedeği mevcut duruma uymuyor."""
+
+
+class MonthStore:
+    """Servis / yıl / ay anahtarlı SQLite deposu; thread-safe."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        with self._lock, self._conn:
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, sql, params=()):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    # -- Ay verileri -------------------------------------------------------------
+    def load(self, department, year, month):
+        """Ayın kayıtlı verisi (``decode_month`` biçiminde); kayıt yoksa None."""
+        rows = self._query("SELECT data FROM months WHERE department=? AND year=? AND month=?",
+                           (department, year, month))
+        return decode_month(json.loads(rows[0][0]), year, month) if rows else None
+
+    def save(self, department, year, month, data):
+        """Ay verisini tek işlemde yazar (varsa üzerine)."""
+        self._write("INSERT OR REPLACE INTO months VALUES (?, ?, ?, ?, ?)",
+                    (department, year, month, _dumps(encode_month(data)), time.time()))
+
+    def delete(self, department, year, month):
+        with self._lock, self._conn:
+            for table in ("months", "schedules"):
+                self._conn.execute(f"DELETE FROM {table} WHERE department=? AND year=? AND month=?",
+                                   (department, year, month))
+
+    def months(self, department=None):
+        """Kayıtlı ``(servis, yıl, ay)`` üçlüleri (sıralı)."""
+        if department is None:
+            return [tuple(r) for r in self._query("SELECT department, year, month FROM months ORDER BY 1, 2, 3")]
+        return [tuple(r) for r in self._query(
+            "SELECT department, year, month FROM months WHERE department=? ORDER BY 2, 3", (department,))]
+
+    def departments(self):
+        return [r[0] for r in self._query("SELECT DISTINCT department FROM months ORDER BY 1")]
+
+    # -- Çizelgeler --------------------------------------------------------------
+    def load_schedule(self, department, year, month):
+        """Ay için kaydedilmiş son çizelge (``{doktor: [kod, ...]}``); yoksa None."""
+        rows = self._query("SELECT schedule FROM schedules WHERE department=? AND year=? AND month=?",
+                           (department, year, month))
+        return json.loads(rows[0][0]) if rows else None
+
+    def save_schedule(self, department, year, month, schedule):
+        self._write("INSERT OR REPLACE INTO schedules VALUES (?, ?, ?, ?, ?)",
+                    (department, year, month, _dumps(schedule), time.time()))
+
+    # -- Yedekler ----------------------------------------------------------------
+    def _rows(self):
+        """Tüm kayıtlar: ``"tablo/servis/yıl/ay" -> (tablo, servis, yıl, ay, JSON metni)``.
+
+        Kilit altında çağrılmalıdır.
+        """
+        rows = {}
+        for table, column in SNAPSHOT_TABLES.items():
+            for dep, y, m, text in self._conn.execute(f"SELECT department, year, month, {column} FROM {table}"):
+                rows[f"{table}/{dep}/{y}/{m}"] = (table, dep, y, m, text)
+        return rows
+
+    @staticmethod
+    def _manifest(rows):
+        """Kayıt başına içerik özeti ve bu duruma ait yedek kimliği."""
+        manifest = {key: hashlib.sha1(row[4].encode("utf-8")).hexdigest() for key, row in rows.items()}
+        return manifest, hashlib.sha256(_dumps(manifest).encode("utf-8")).hexdigest()[:16]
+
+    def _record_snapshot(self, snap_id, base, manifest):
+        self._conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                           (snap_id, base, time.time(), _dumps(manifest)))
+
+    def last_snapshot_id(self):
+        """Bu depodan alınan (veya bu depoya geri yüklenen) son yedeğin kimliği."""
+        rows = self._query("SELECT id FROM snapshots ORDER BY created_at DESC LIMIT 1")
+        return rows[0][0] if rows else None
+
+    def snapshot(self, base=None):
+        """Tüm depo için sıkıştırılmış yedek (bytes).
+
+        ``base`` daha önce bu depodan alınmış bir yedeğin kimliğiyse yalnızca
+        o yedekten beri değişen ve silinen kayıtları içeren fark yedeği
+        üretilir. Kayıtlar veritabanındaki JSON metinleriyle aynen taşınır.
+        """
+        with self._lock, self._conn:
+            rows = self._rows()
+            manifest, snap_id = self._manifest(rows)
+            changed, deleted = list(rows), []
+            if base is not None:
+                found = self._conn.execute("SELECT manifest FROM snapshots WHERE id=?", (base,)).fetchone()
+                if found is None:
+                    raise SnapshotError(f"Temel yedek bulunamadı: {base}")
+                old = json.loads(found[0])
+                changed = [key for key in rows if old.get(key) != manifest[key]]
+                deleted = sorted(set(old) - set(rows))
+            self._record_snapshot(snap_id, base, manifest)
+        doc = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "id": snap_id, "base": base,
+               "created_at": time.time(), "rows": [rows[key] for key in changed], "deleted": deleted}
+        return gzip.compress(_dumps(doc).encode("utf-8"), compresslevel=9, mtime=0)
+
+    def restore(self, blobs):
+        """Tam yedek ve (varsa) ardından gelen fark yedeklerini sırayla tek işlemde uygular.
+
+        Tam yedekle başlanırsa depodaki ay ve çizelgelerin yerini alır; yalnızca
+        fark yedekleri verilirse ilkinin temeli depodaki son yedek olmalıdır.
+        Yazılan kayıt sayısını döndürür.
+        """
+        docs = [read_snapshot(blob) for blob in blobs]
+        current = self.last_snapshot_id() if docs and docs[0]["base"] is not None else None
+        for doc in docs:
+            if doc["base"] != current:
+                raise SnapshotError(f"{doc['id']} fark yedeğinin temeli ({doc['base']}) eksik; "
+                                    f"önce o yedeği geri yükleyin.")
+            current = doc["id"]
+
+        restored = 0
+        with self._lock, self._conn:
+            for doc in docs:
+                if doc["base"] is None:
+                    for table in SNAPSHOT_TABLES:
+                        self._conn.execute(f"DELETE FROM {table}")
+                for key in doc["deleted"]:
+                    table, rest = key.split("/", 1)
+                    dep, y, m = rest.rsplit("/", 2)
+                    self._conn.execute(f"DELETE FROM {table} WHERE department=? AND year=? AND month=?",
+                                       (dep, int(y), int(m)))
+                now = time.time()
+                for table in SNAPSHOT_TABLES:
+                    batch = [(dep, y, m, text, now) for t, dep, y, m, text in doc["rows"] if t == table]
+                    self._conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?)", batch)
+                    restored += len(batch)
+            # Geri yüklenen durum sonraki fark yedeklerinin temeli olur
+            manifest, _ = self._manifest(self._rows())
+            self._record_snapshot(current, None, manifest)
+        return restored
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def read_snapshot(blob):
+    """Yedek dosyasını (gzip'li JSON) çözer ve biçimini doğrular."""
+    try:
+        doc = json.loads(gzip.decompress(blob))
+    except (OSError, EOFError, ValueError) as e:
+        raise SnapshotError(f"Yedek dosyası okunamadı: {e}") from e
+    if not isinstance(doc, dict) or doc.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError("Bu dosya bir Nobetinatör yedeği değil.")
+    if doc.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Desteklenmeyen yedek sürümü: {doc.get('version')}")
+    return doc
@@ -0,0 +1,22 @@
+import batch
+from bench import generate_instance
+
+
+def test_plan_workers_respects_cpu_budget():
+    assert batch.plan_workers(3, cpu_budget=8) == (3, 2)
+    assert batch.plan_workers(10, cpu_budget=4) == (4, 1)
+    assert batch.plan_workers(5, cpu_budget=8, num_workers=2) == (4, 2)
+    # İstenen işçi sayısı bütçeyi aşsa bile toplam bütçeyle sınırlı kalır
+    assert batch.plan_workers(2, cpu_budget=4, num_workers=8) == (1, 4)
+
+
+def test_solve_batch_streams_in_completion_order():
+    over = generate_instance(3, num_doctors=10)
+    over["daily_needs_24h"][1] = 50  # ön kontrolde çözümsüz: havuza gönderilmez
+    problems = [("uzun", generate_instance(2, num_doctors=40)), ("kisa", generate_instance(1, num_doctors=40)),
+                ("fazla", over)]
+    results = list(batch.solve_batch(problems, {"uzun": 2.0, "kisa": 0.3}, cpu_budget=2))
+    assert [key for key, _ in results] == ["fazla", "kisa", "uzun"]
+    res = dict(results)
+    assert res["fazla"]["stop_reason"] == "precheck"
+    assert res["kisa"]["wall_time"] < 1.0 < res["uzun"]["wall_time"]
@@ -0,0 +1,25 @@
+import engine
+from bench import build_scaling, check_linear, generate_instance
+
+# Zamanlama CI makinelerinde gürültülü; hücre başı sürenin 3 kattan fazla artması doğrusal dışı kabul edilir
+CI_SCALING_TOLERANCE = 3.0
+
+
+def _model_size(num_doctors):
+    problem = engine.normalize_problem(generate_instance(0, num_doctors=num_doctors, x_density=0, s_density=0,
+                                                         couples=0))
+    proto = engine.build_model(problem).model.Proto()
+    return len(proto.variables), len(proto.constraints)
+
+
+def test_build_time_scales_linearly():
+    rows = list(build_scaling((25, 50, 100), repeats=3))
+    assert [r["num_doctors"] for r in rows] == [25, 50, 100]
+    linear, growth = check_linear(rows, CI_SCALING_TOLERANCE)
+    assert linear, f"hücre başı kurulum süresi {growth:.2f} kat arttı"
+
+
+def test_model_size_per_doctor():
+    # Ocak 2025 (31 gün), manuel hücre ve çift yok: doktor başına 62 hücre + 4 yardımcı değişken
+    for n in (25, 50, 100):
+        assert _model_size(n) == (66 * n + 31, 72 * n + 118)
@@ -0,0 +1,44 @@
+import json
+
+from bench import generate_instance
+from cache import SolutionCache, problem_key
+
+
+def _result(status, stop_reason):
+    return {"status": status, "feasible": status != "INFEASIBLE", "stop_reason": stop_reason, "objective": 0}
+
+
+def test_gap_stopped_result_not_served():
+    key = problem_key(generate_instance(0, num_doctors=6))
+    cache = SolutionCache()
+    cache.put(key, _result("OPTIMAL", "gap"), time_limit=5)
+    assert cache.get(key, time_limit=60) is None
+    assert cache.get(key) is None
+
+
+def test_early_stopped_results_not_stored(tmp_path):
+    cache = SolutionCache(disk_dir=str(tmp_path))
+    for k, reason in enumerate(["gap", "stall", "hard_zero", "user"]):
+        cache.put(f"k{k}", _result("FEASIBLE", reason), time_limit=5)
+    assert len(cache) == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_legacy_gap_entry_on_disk_ignored(tmp_path):
+    # Eski sürümler boşluk eşiğiyle duran sonuçları da diske yazıyordu
+    entry = {"time_limit": 5.0, "result": _result("OPTIMAL", "gap")}
+    (tmp_path / "k.json").write_text(json.dumps(entry), encoding="utf-8")
+    assert SolutionCache(disk_dir=str(tmp_path)).get("k", time_limit=60) is None
+
+
+def test_proven_optimum_served_for_any_time_limit():
+    cache = SolutionCache()
+    cache.put("k", _result("OPTIMAL", "optimal"), time_limit=5)
+    assert cache.get("k", time_limit=600)["stop_reason"] == "optimal"
+
+
+def test_time_limited_result_needs_enough_search():
+    cache = SolutionCache()
+    cache.put("k", _result("FEASIBLE", "time_limit"), time_limit=10)
+    assert cache.get("k", time_limit=5) is not None
+    assert cache.get("k", time_limit=30) is None
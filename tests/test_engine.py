@@ -0,0 +1,105 @@
+import engine
+from bench import generate_instance
+
+
+def _problem(**kwargs):
+    # Manuel hücresi olmayan eş doktorlar simetri sınıfı oluşturur
+    return engine.normalize_problem(generate_instance(0, num_doctors=8, x_density=0, s_density=0, couples=0, **kwargs))
+
+
+def test_first_checkout_uses_symmetry_breaking():
+    problem = _problem()
+    with engine.ModelCache().checkout("k", problem) as sm:
+        assert not sm.reusable
+        assert sm.symmetry_classes
+        assert sm.symmetry_classes == engine.build_model(problem).symmetry_classes
+
+
+def test_resolve_switches_to_reusable_model():
+    problem = _problem()
+    models = engine.ModelCache()
+    with models.checkout("k", problem) as first:
+        pass
+    problem["daily_needs_24h"][1] += 1
+    with models.checkout("k", problem) as second:
+        assert second.reusable and second is not first
+    problem["daily_needs_24h"][2] += 1
+    with models.checkout("k", problem) as third:
+        assert third is second
+
+
+def test_other_structure_builds_normal_model():
+    models = engine.ModelCache()
+    with models.checkout("k", _problem()):
+        pass
+    with models.checkout("k", _problem(month=2)) as sm:
+        assert not sm.reusable and sm.symmetry_classes
+
+
+def test_hint_orders_symmetry_classes_without_moving_rows():
+    problem = _problem()
+    group = engine.interchangeable_classes(problem)[0]
+    hint = {d: [""] * 28 for d in group}
+    hint[group[-1]] = ["16"] + [""] * 27
+    sm = engine.build_model(problem, hint)
+    assert sm.symmetry_classes[0][0] == group[-1]
+    assert sorted(sm.symmetry_classes[0]) == sorted(group)
+
+
+def _solved_month():
+    # 8 doktorlu ay birkaç saniyede optimum çözülür; onarım testleri bu çizelgeyi temel alır
+    raw = generate_instance(0, num_doctors=8, couples=0)
+    return raw, engine.solve_problem(raw, time_limit=30)["schedule"]
+
+
+def test_repair_without_new_inputs_changes_nothing():
+    raw, schedule = _solved_month()
+    result = engine.solve_repair(engine.normalize_problem(raw), schedule, 9, 12)
+    assert result["repair"] == {"days": [9, 10, 11, 12], "changes": 0}
+    assert result["schedule"] == schedule
+
+
+def test_repair_only_touches_the_window():
+    raw, schedule = _solved_month()
+    doctor = "Dr01"
+    day = next(t for t in range(10, 21) if schedule[doctor][t - 1] in ("24", "16"))
+    manual = dict(raw["manual_constraints"], **{f"{doctor}_{day}": "X"})
+    result = engine.solve_repair(engine.normalize_problem(dict(raw, manual_constraints=manual)),
+                                 schedule, day - 1, day + 1)
+    assert result["feasible"]
+    window = result["repair"]["days"]
+    assert day in window
+    changed = {(d, t + 1) for d, row in schedule.items() for t, code in enumerate(row)
+               if result["schedule"][d][t] != code}
+    assert all(t in window for _, t in changed)
+    assert result["schedule"][doctor][day - 1] == ""
+    assert result["repair"]["changes"] == len(changed)
+
+
+def test_carry_in_blocks_rest_after_last_days():
+    problem = _problem(rest_days_24h=2)
+    d = problem["doctors"]
+    tail = {d[0]: ["", "", "24"], d[1]: ["", "24", ""], d[2]: ["", "", "16"], d[3]: ["24", "", ""]}
+    blocked = engine.carry_in_cells(problem, tail)
+    assert blocked[:4, :3].tolist() == [[True, True, False], [True, False, False],
+                                       [True, False, False], [False, False, False]]
+    assert not blocked[4:].any()
+
+
+def test_carry_in_from_month_shorter_than_rest():
+    problem = _problem(rest_days_24h=3)
+    d = problem["doctors"]
+    blocked = engine.carry_in_cells(problem, {d[0]: ["24"], d[1]: ["24", ""], d[2]: []})
+    assert blocked[:3, :4].tolist() == [[True, True, True, False], [True, True, False, False],
+                                       [False, False, False, False]]
+
+
+def test_carry_in_keeps_manual_shifts_and_reports_them():
+    problem = _problem(rest_days_24h=2)
+    d = problem["doctors"]
+    problem["manual_constraints"].codes[0, 1] = engine.CELL_24
+    carried, conflicts = engine.apply_carry_in(problem, {d[0]: ["", "24"]})
+    codes = carried["manual_constraints"].codes
+    assert codes[0, :3].tolist() == [engine.CELL_X, engine.CELL_24, engine.CELL_EMPTY]
+    assert conflicts == [(d[0], 2)]
+    assert problem["manual_constraints"].codes[0, 0] == engine.CELL_EMPTY
@@ -0,0 +1,59 @@
+import io
+
+import pandas as pd
+
+from excel_io import read_problem_excel
+from manual_grid import CELL_16, CELL_X
+
+
+def _workbook(sheets):
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    buf.seek(0)
+    return buf
+
+
+def _report(issues):
+    return {(i["sheet"], i["row"], i["column"], i["value"]) for i in issues}
+
+
+def test_import_report_lists_invalid_cells():
+    source = _workbook({
+        "Personel": pd.DataFrame({"İsim": ["Dr. A", None, "Dr. B", "Dr. A"],
+                                  "Kıdem": ["Kıdemli", "Orta", "Uzman", "Orta"],
+                                  "24h Kotası": [3, 1, "x", 2],
+                                  "16h Kotası": [2, 1, 2, -1]}),
+        "Günlük İhtiyaçlar": pd.DataFrame({"Gün": [1, 2, 2, 40, "a"],
+                                           "24h Sayısı": [1, 2, 1, 1, 1],
+                                           "16h Sayısı": [1, 1.5, 1, 1, 1]}),
+        "İzinler": pd.DataFrame({"Doktor": ["Dr. A", None, "Dr. Z", "Dr. B"],
+                                 1: ["X", "24", "X", None],
+                                 2: ["q", None, None, "16"],
+                                 40: [None, None, None, None]}),
+    })
+    data, issues = read_problem_excel(source)
+
+    assert _report(issues) == {
+        ("Personel", 3, "İsim", None),
+        ("Personel", 5, "İsim", "Dr. A"),
+        ("Personel", 4, "Kıdem", "Uzman"),
+        ("Personel", 4, "24h Kotası", "x"),
+        ("Personel", 5, "16h Kotası", -1),
+        ("Günlük İhtiyaçlar", 4, "Gün", 2),
+        ("Günlük İhtiyaçlar", 5, "Gün", 40),
+        ("Günlük İhtiyaçlar", 6, "Gün", "a"),
+        ("Günlük İhtiyaçlar", 3, "16h Sayısı", 1.5),
+        ("İzinler", 1, "40", None),
+        ("İzinler", 2, "2", "q"),
+        # Doktor adı boş 3. satır sessizce atlanır; sonraki satırlar sayfadaki numarasını korur
+        ("İzinler", 4, "Doktor", "Dr. Z"),
+    }
+    assert data["doctors"] == ["Dr. A", "Dr. B"]
+    assert data["quotas_24h"] == {"Dr. A": 3, "Dr. B": 0}
+    assert data["seniority"] == {"Dr. A": "Kıdemli", "Dr. B": "Orta"}
+    assert data["daily_needs_24h"] == {1: 1, 2: 2}
+    assert data["daily_needs_16h"] == {1: 1, 2: 1}
+    grid = data["manual_constraints"].reindex(data["doctors"], 2)
+    assert grid.codes[0, :2].tolist() == [CELL_X, 0] and grid.codes[1, :2].tolist() == [0, CELL_16]
@@ -0,0 +1,74 @@
+import engine
+from feasibility import check_feasibility
+
+NUM_DAYS = 28  # Şubat 2026
+
+
+def _month(doctors, needs24=(), needs16=(), rest=2, manual=None, quota24=None, quota16=None):
+    """Elle kurulmuş küçük ay; ``needs*`` yalnızca ihtiyacı olan günler (diğerleri 0)."""
+    needs24, needs16 = dict(needs24), dict(needs16)
+    quota24 = quota24 or {}
+    quota16 = quota16 or {}
+    return engine.normalize_problem({
+        "year": 2026, "month": 2, "doctors": doctors, "rest_days_24h": rest,
+        "daily_needs_24h": {t: needs24.get(t, 0) for t in range(1, NUM_DAYS + 1)},
+        "daily_needs_16h": {t: needs16.get(t, 0) for t in range(1, NUM_DAYS + 1)},
+        "quotas_24h": {d: quota24.get(d, sum(needs24.values()) // len(doctors)) for d in doctors},
+        "quotas_16h": {d: quota16.get(d, sum(needs16.values()) // len(doctors)) for d in doctors},
+        "manual_constraints": manual or {},
+    })
+
+
+def _errors(problem):
+    return [i for i in check_feasibility(problem) if i["level"] == "error"]
+
+
+def _status(problem):
+    return engine.solve_problem(problem, time_limit=10)["status"]
+
+
+def test_day_without_enough_available_doctors():
+    problem = _month(["A", "B"], {10: 1}, {10: 1}, manual={"A_10": "X"})
+    [issue] = _errors(problem)
+    assert issue["days"] == [10] and issue["doctors"] == ["A"]
+    assert _status(problem) == "INFEASIBLE"
+
+
+def test_more_fixed_shifts_than_needed():
+    problem = _month(["A", "B"], {5: 1}, manual={"A_5": "24", "B_5": "24"})
+    [issue] = _errors(problem)
+    assert issue["days"] == [5] and sorted(issue["doctors"]) == ["A", "B"]
+
+
+def test_consecutive_days_over_capacity():
+    problem = _month(["A", "B", "C"], {5: 1, 6: 1}, {5: 1, 6: 1})
+    assert [i["days"] for i in _errors(problem)] == [[5, 6]]
+    assert _status(problem) == "INFEASIBLE"
+
+
+def test_last_checked_rest_window():
+    # rest=3: son denetlenen pencere 24.–27. gün; 25'teki 24h'nin bloğu 26–28'i kapsar
+    problem = _month(["A"], {25: 1, 27: 1}, rest=3)
+    assert [i["days"] for i in _errors(problem)] == [[24, 25, 26, 27]]
+    assert _status(problem) == "INFEASIBLE"
+
+
+def test_rest_window_past_month_end_not_checked():
+    # 26 > 28-3: 26'daki 24h'nin izin bloğu aya sığmaz, 26 ve 28 birlikte tutulabilir
+    problem = _month(["A"], {26: 1, 28: 1}, rest=3)
+    assert _errors(problem) == []
+    assert _status(problem) in ("OPTIMAL", "FEASIBLE")
+
+
+def test_quota_mismatch_is_only_a_warning():
+    problem = _month(["A", "B"], {1: 1, 3: 1, 5: 1}, quota24={"A": 1, "B": 1})
+    [issue] = check_feasibility(problem)
+    assert issue["level"] == "warning" and "fark -1" in issue["message"]
+
+
+def test_tight_month_passes():
+    # Her gün bir 24h, üç doktor, 2 gün izin: her doktor üç günde bir nöbet tutarak tam sığar
+    doctors = ["A", "B", "C"]
+    problem = _month(doctors, {t: 1 for t in range(1, NUM_DAYS + 1)}, quota24={"A": 10, "B": 9, "C": 9})
+    assert check_feasibility(problem) == []
+    assert _status(problem) in ("OPTIMAL", "FEASIBLE")
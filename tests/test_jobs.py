@@ -0,0 +1,20 @@
+import engine
+import jobs
+from bench import generate_instance
+from jobs import SolveJob
+
+
+def test_cancel_before_search_starts_still_stops(monkeypatch):
+    job = SolveJob(engine.normalize_problem(generate_instance(2, num_doctors=40)), time_limit=30)
+    solve_model = engine.solve_model
+
+    def cancel_then_solve(*args, **kwargs):
+        # İptal, çözücü nesnesi kurulduktan sonra ama Solve çağrılmadan önce gelir
+        job.cancel()
+        return solve_model(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "solve_model", cancel_then_solve)
+    job.start().wait(15)
+    assert job.state == jobs.IPTAL
+    assert job.result["stop_reason"] == "user"
+    assert job.result["wall_time"] < 5
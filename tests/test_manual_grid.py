@@ -0,0 +1,30 @@
+import numpy as np
+
+from manual_grid import CELL_16, CELL_24, CELL_S, CELL_X, ManualGrid
+
+DOCTORS = ["Dr", "Dr_1", "Dr_Ali_2", "A_B", "12", "Dr. Ayşe 3"]
+
+
+def test_dict_round_trip_with_underscores_and_digits():
+    grid = ManualGrid(DOCTORS, 30)
+    # "Dr" doktorunun 1. günü ("Dr_1") ile "Dr_1" doktorunun anahtarları ("Dr_1_1") karışmamalı
+    grid.codes[0, 0] = CELL_X
+    grid.codes[1, 0] = CELL_24
+    grid.codes[1, 10] = CELL_S
+    grid.codes[2, 1] = CELL_16
+    grid.codes[3, 29] = CELL_X
+    grid.codes[4, 11] = CELL_24
+    grid.codes[5, 2] = CELL_S
+    cells = grid.to_dict()
+    assert cells["Dr_1"] == "X" and cells["Dr_1_1"] == "24" and cells["Dr_Ali_2_2"] == "16"
+    assert len(cells) == 7
+
+    back = ManualGrid.from_dict(DOCTORS, 30, cells)
+    assert back.doctors == DOCTORS
+    assert np.array_equal(back.codes, grid.codes)
+
+
+def test_from_dict_skips_unknown_and_invalid_entries():
+    grid = ManualGrid.from_dict(DOCTORS, 28, {"Dr_Ali_2_5": "x", "Dr_30": "X", "Yok_1": "X", "Dr_2": "Q", "Dr_1_": "X"})
+    assert grid.to_dict() == {"Dr_Ali_2_5": "X"}
+
@@ -0,0 +1,71 @@
+import pytest
+
+from storage import MonthStore, SnapshotError, encode_month, read_snapshot
+
+
+def _month(doctors, manual):
+    return {"doctors": doctors, "daily_needs_24h": {1: 2, 2: 1}, "daily_needs_16h": {1: 1},
+            "quotas_24h": {d: 3 for d in doctors}, "quotas_16h": {d: 2 for d in doctors},
+            "seniority": {d: "Orta" for d in doctors}, "manual_constraints": manual, "couples": []}
+
+
+def _state(store):
+    return {key: (encode_month(store.load(*key)), store.load_schedule(*key)) for key in store.months()}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MonthStore(tmp_path / "kaynak.db")
+    store.save("Genel", 2025, 1, _month(["Dr. A", "Dr. B"], {"Dr. A_3": "X"}))
+    store.save("Acil", 2025, 1, _month(["Dr. C"], {}))
+    store.save_schedule("Genel", 2025, 1, {"Dr. A": ["24", "", "X"], "Dr. B": ["", "16", ""]})
+    yield store
+    store.close()
+
+
+def test_full_and_delta_snapshots_round_trip(store, tmp_path):
+    full = store.snapshot()
+    base = store.last_snapshot_id()
+    store.save("Genel", 2025, 1, _month(["Dr. A", "Dr. B", "Dr. D"], {"Dr. D_2": "S"}))
+    store.save("Genel", 2025, 2, _month(["Dr. A"], {}))
+    store.delete("Acil", 2025, 1)
+    delta = store.snapshot(base=base)
+
+    doc = read_snapshot(delta)
+    assert doc["base"] == base
+    assert {row[0] + "/" + row[1] for row in doc["rows"]} == {"months/Genel"}
+    assert doc["deleted"] == ["months/Acil/2025/1"]
+
+    copy = MonthStore(tmp_path / "kopya.db")
+    copy.save("Eski", 2024, 12, _month(["Dr. Z"], {}))  # tam yedek depodaki kayıtların yerini alır
+    assert copy.restore([full, delta]) == 5
+    assert _state(copy) == _state(store)
+    copy.close()
+
+
+def test_delta_restored_on_top_of_restored_full(store, tmp_path):
+    full = store.snapshot()
+    store.save_schedule("Acil", 2025, 1, {"Dr. C": ["24", "", ""]})
+    delta = store.snapshot(base=read_snapshot(full)["id"])
+
+    copy = MonthStore(tmp_path / "kopya.db")
+    copy.restore([full])
+    assert copy.restore([delta]) == 1
+    assert _state(copy) == _state(store)
+    copy.close()
+
+
+def test_delta_without_its_base_is_rejected(store, tmp_path):
+    store.snapshot()
+    store.save("Acil", 2025, 3, _month(["Dr. C"], {}))
+    delta = store.snapshot(base=store.last_snapshot_id())
+
+    copy = MonthStore(tmp_path / "kopya.db")
+    with pytest.raises(SnapshotError):
+        copy.restore([delta])
+    assert copy.months() == []
+    with pytest.raises(SnapshotError):
+        store.snapshot(base="yok")
+    with pytest.raises(SnapshotError):
+        read_snapshot(b"gzip degil")
+    copy.close()